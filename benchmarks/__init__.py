@@ -0,0 +1,6 @@
+"""
+Repository benchmarks — synthetic data at scale + timed repository calls.
+
+    python -m benchmarks.run --scale 100k                  # build + benchmark
+    python -m benchmarks.run --scale 100k --compare old.json
+"""
@@ -0,0 +1,309 @@
+"""
+Benchmark every db.repository function plus the app's hot read paths.
+
+Builds (or reuses) a synthetic DB at the requested scale, times each case
+for N iterations and writes p50/p95 per case as JSON. With --compare, prints
+the ratio against an earlier result file and flags regressions.
+
+Usage:
+    python -m benchmarks.run --scale 10k
+    python -m benchmarks.run --scale 1M --db /tmp/bench_1m.db --reuse --iterations 20
+    python -m benchmarks.run --scale 100k --compare benchmarks/results/old.json
+"""
+import argparse
+import inspect
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import generate, parse_scale, table_counts
+from db import repository as repo
+from db.connection import close_all
+from db.models import init_db
+from db.records import Article, Reflection, Session
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+REGRESSION_RATIO = 1.2
+NOISE_FLOOR_MS = 0.05  # ignore ratio swings on sub-50µs cases
+
+# Repository functions deliberately not timed (with the reason)
+SKIPPED = {
+    "reset_article_statuses": "rewrites every article; dev tool, not a hot path",
+}
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def build_cases(db_path: str, rng: random.Random) -> dict:
+    """name → (callable, iterations override or None)."""
+    from bot.telegram_handler import calculate_streak
+    from services.raindrop import pick_next_article
+    from services.synthesizer import WeeklyResult, _gather_week_data
+
+    conn = sqlite3.connect(db_path)
+    max_id = conn.execute("SELECT MAX(id) FROM articles").fetchone()[0]
+    conn.close()
+    today = date.today()
+    week_ago = today - timedelta(days=7)
+    counter = iter(range(10**9))
+
+    def some_id() -> int:
+        return rng.randint(1, max_id)
+
+    def status_view():
+        # Same reads as /status
+        repo.count_articles_by_status(db_path)
+        calculate_streak(db_path)
+        repo.get_activity_summary(db_path)
+        repo.get_activity_summary(db_path, today.isoformat(), today.isoformat())
+
+    def claim_cycle():
+        row = repo.claim_next_article(db_path, 60, columns=("id",))
+        if row:
+            repo.release_claim(db_path, row["id"], row["lease_owner"])
+
+    def claim_specific():
+        row = repo.claim_article(db_path, some_id(), 60, columns=("id",))
+        if row:
+            repo.complete_claim(db_path, row["id"], row["lease_owner"], "sent")
+
+    def add_bulk():
+        base = next(counter)
+        repo.add_articles_bulk(db_path, [
+            {"raindrop_id": f"bench_bulk_{base}_{i}", "title": f"Bulk {i}",
+             "source_url": f"https://bulk.example/{base}/{i}", "raw_content": "bulk body " * 50}
+            for i in range(100)
+        ])
+
+    def first(iterator, n=1000):
+        for i, _ in enumerate(iterator):
+            if i + 1 >= n:
+                break
+
+    summary = repo.ARTICLE_SUMMARY_FIELDS
+    return {
+        # ── Articles ──
+        "add_article": (lambda: repo.add_article(
+            db_path, f"bench_add_{next(counter)}", "Bench", "https://bench.example",
+            raw_content="benchmark body " * 80), None),
+        "add_articles_bulk (100 rows)": (add_bulk, 10),
+        "get_existing_raindrop_ids (500 ids)": (lambda: repo.get_existing_raindrop_ids(
+            db_path, [f"synthetic_{some_id()}" for _ in range(500)]), None),
+        "get_article_by_id": (lambda: repo.get_article_by_id(db_path, some_id()), None),
+        "get_article_by_raindrop_id": (lambda: repo.get_article_by_raindrop_id(
+            db_path, f"synthetic_{some_id()}"), None),
+        "get_articles_by_status (digest_reviewed, summary cols)": (
+            lambda: repo.get_articles_by_status(db_path, "digest_reviewed", columns=summary), 5),
+        "get_article_fields (raw_content)": (lambda: repo.get_article_fields(
+            db_path, some_id(), ("raw_content",)), None),
+        "update_article_status": (lambda: repo.update_article_status(
+            db_path, some_id(), rng.choice(("sent", "skipped"))), None),
+        "update_article_analysis": (lambda: repo.update_article_analysis(
+            db_path, some_id(), summary="bench summary " * 20,
+            synthesizer_output="bench synthesis " * 100), None),
+        "update_article_raw_content": (lambda: repo.update_article_raw_content(
+            db_path, some_id(), "better extraction " * 200), None),
+        "get_next_queued_article": (lambda: repo.get_next_queued_article(
+            db_path, columns=summary), None),
+        "get_top_queued_article": (lambda: repo.get_top_queued_article(
+            db_path, columns=summary), None),
+        "get_newest_queued_articles (5, with raw_content)": (
+            lambda: repo.get_newest_queued_articles(
+                db_path, 5, columns=("id", "title", "source_url", "raw_content")), None),
+        "get_processed_articles_between (7 days)": (
+            lambda: repo.get_processed_articles_between(
+                db_path, week_ago.isoformat(), today.isoformat() + "T23:59:59",
+                columns=("id", "title", "summary", "status")), None),
+        "count_articles_by_status": (lambda: repo.count_articles_by_status(db_path), None),
+        # ── Queue claims ──
+        "claim_next_article + release_claim": (claim_cycle, None),
+        "claim_article + complete_claim": (claim_specific, None),
+        "reap_expired_leases": (lambda: repo.reap_expired_leases(db_path), None),
+        # ── Reflections / sessions / activity ──
+        "add_reflection": (lambda: repo.add_reflection(
+            db_path, some_id(), "bench insight", "bench action", rng.randint(1, 10)), None),
+        "get_reflections_by_article": (lambda: repo.get_reflections_by_article(
+            db_path, some_id()), None),
+        "get_recent_reflections (7 days)": (lambda: repo.get_recent_reflections(db_path, 7), None),
+        "add_session": (lambda: repo.add_session(
+            db_path, today.isoformat(), "08:00", "08:30", 30, "reading"), None),
+        "get_sessions_by_date": (lambda: repo.get_sessions_by_date(
+            db_path, today.isoformat()), None),
+        "get_activity_summary (all time)": (lambda: repo.get_activity_summary(db_path), None),
+        "get_daily_activity (30 days)": (lambda: repo.get_daily_activity(
+            db_path, (today - timedelta(days=30)).isoformat(), today.isoformat()), None),
+        "get_reflection_days": (lambda: repo.get_reflection_days(db_path), None),
+        # ── Streaming ──
+        "iter_articles (first 1000, Article records)": (lambda: first(repo.iter_articles(
+            db_path, columns=summary, record=Article)), 10),
+        "iter_reflections (first 1000, records)": (lambda: first(repo.iter_reflections(
+            db_path, record=Reflection)), 10),
+        "iter_sessions (all, records)": (lambda: first(repo.iter_sessions(
+            db_path, record=Session), 10**9), 10),
+        # ── Digests / reports / search ──
+        "add_batch_digest": (lambda: repo.add_batch_digest(
+            db_path, [some_id() for _ in range(5)], "bench digest " * 50), None),
+        "get_latest_digest": (lambda: repo.get_latest_digest(db_path), None),
+        "add_weekly_report": (lambda: repo.add_weekly_report(
+            db_path, week_ago.isoformat(), "themes", "gap", "build"), None),
+        "get_latest_report": (lambda: repo.get_latest_report(db_path), None),
+        "search (2 terms)": (lambda: repo.search(db_path, "retrieval pipeline"), None),
+        "search (page 2)": (lambda: repo.search(
+            db_path, "kiến trúc",
+            cursor=repo.search(db_path, "kiến trúc")["next_cursor"]), 10),
+        # ── App-level paths ──
+        "/status aggregation": (status_view, None),
+        "pick_next_article": (lambda: pick_next_article(
+            db_path, summary + ("raw_content",)), None),
+        "_gather_week_data": (lambda: _gather_week_data(
+            db_path, week_ago, today, WeeklyResult()), 10),
+    }
+
+
+def _covered(cases: dict) -> set[str]:
+    """Function names a case name starts with ("a + b (note)" covers a and b)."""
+    return {part.split(" ")[0] for name in cases for part in name.split(" + ")}
+
+
+def check_coverage(cases: dict) -> list[str]:
+    """Public repository functions with neither a case nor a SKIPPED entry."""
+    public = [
+        name for name, fn in inspect.getmembers(repo, inspect.isfunction)
+        if not name.startswith("_") and fn.__module__ == repo.__name__
+    ]
+    covered = _covered(cases)
+    return sorted(n for n in public if n not in covered and n not in SKIPPED)
+
+
+def run_cases(cases: dict, iterations: int, warmup: int = 2) -> dict:
+    results = {}
+    for name, (fn, override) in cases.items():
+        n = override or iterations
+        for _ in range(min(warmup, n)):
+            fn()
+        samples = []
+        for _ in range(n):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        results[name] = {
+            "n": n,
+            "p50_ms": round(_percentile(samples, 50), 4),
+            "p95_ms": round(_percentile(samples, 95), 4),
+            "mean_ms": round(statistics.fmean(samples), 4),
+        }
+        print(f"  {name:<55}{results[name]['p50_ms']:>10.3f}{results[name]['p95_ms']:>10.3f}")
+    return results
+
+
+def compare(current: dict, baseline_path: str) -> int:
+    """Print p50/p95 ratios vs a baseline file. Returns number of regressions."""
+    data = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    baseline = data["results"]
+    regressions = 0
+    print(f"\n  vs {baseline_path} ({data['meta'].get('git_commit') or '?'}, "
+          f"scale {data['meta'].get('scale')})")
+    print(f"  {'case':<55}{'p50 x':>8}{'p95 x':>8}")
+    for name, cur in current.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        r50 = cur["p50_ms"] / old["p50_ms"] if old["p50_ms"] else float("inf")
+        r95 = cur["p95_ms"] / old["p95_ms"] if old["p95_ms"] else float("inf")
+        slower = r50 > REGRESSION_RATIO and cur["p50_ms"] - old["p50_ms"] > NOISE_FLOOR_MS
+        flag = "  ⚠ regression" if slower else ""
+        regressions += bool(flag)
+        print(f"  {name:<55}{r50:>8.2f}{r95:>8.2f}{flag}")
+    return regressions
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).resolve().parent.parent, timeout=10,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", default="10k", help="articles: 10k, 100k, 1M, ...")
+    parser.add_argument("--db", help="DB path (default: temp file)")
+    parser.add_argument("--reuse", action="store_true", help="reuse an existing --db")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="result JSON path (default: benchmarks/results/)")
+    parser.add_argument("--compare", help="baseline result JSON to compare against")
+    args = parser.parse_args()
+
+    n_articles = parse_scale(args.scale)
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), f"bench_{args.scale}.db")
+
+    if not (args.reuse and os.path.exists(db_path)):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        init_db(db_path)
+        print(f"Generating {n_articles:,} synthetic articles → {db_path}")
+        start = time.perf_counter()
+        generate(db_path, n_articles, seed=args.seed, progress=lambda done, total: print(
+            f"\r  {done:,}/{total:,}", end="", flush=True))
+        print(f"\n  generated in {time.perf_counter() - start:.1f}s")
+    else:
+        init_db(db_path)  # bring an older bench DB up to the current schema
+
+    cases = build_cases(db_path, random.Random(args.seed))
+    missing = check_coverage(cases)
+    if missing:
+        print(f"  ⚠ repository functions without a benchmark case: {missing}")
+
+    print(f"\n  {'case':<55}{'p50 ms':>10}{'p95 ms':>10}")
+    results = run_cases(cases, args.iterations)
+    close_all()
+
+    payload = {
+        "meta": {
+            "scale": args.scale,
+            "tables": table_counts(db_path),
+            "db_size_mb": round(os.path.getsize(db_path) / 1024 / 1024, 2),
+            "iterations": args.iterations,
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "skipped": SKIPPED,
+        },
+        "results": results,
+    }
+    out = Path(args.out) if args.out else RESULTS_DIR / (
+        f"{payload['meta']['timestamp'].replace(':', '')}_{args.scale}.json"
+    )
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\n  Results → {out}")
+
+    if args.compare:
+        return 1 if compare(results, args.compare) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Synthetic data generator — realistic articles, reflections, sessions, digests.
+
+Writes through the same storage paths as the app (compressed content store,
+FTS and daily_activity triggers) so the generated DB has production shape:
+mostly queued articles, a tail of analyzed ones with LLM outputs, reflections
+and sessions spread over the archive's lifetime.
+
+Usage:
+    from benchmarks.synthetic import generate, parse_scale
+
+    counts = generate(db_path, parse_scale("100k"))
+"""
+import json
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+from db.connection import get_connection
+from db.content_store import put_content_many
+
+# Status mix of a long-lived archive (most bookmarks never get read)
+STATUS_WEIGHTS = {
+    "queued": 0.70, "sent": 0.15, "reflected": 0.08,
+    "skipped": 0.05, "digest_reviewed": 0.02,
+}
+COLLECTIONS = ("AI", "Backend", "DevOps", "Product", "Reading list", None)
+
+_VOCAB = (
+    "retrieval augmented generation embedding chunking reranker pipeline latency "
+    "token context window agent evaluation benchmark production cache index vector "
+    "hybrid search prompt model fine-tuning inference throughput architecture "
+    "kiến trúc hệ thống tối ưu hiệu năng dữ liệu truy vấn mô hình triển khai "
+    "kubernetes docker observability tracing queue event sourcing microservice"
+).split()
+_HEADINGS = ("## 🔬 Scout", "## 🏗️ Builder", "## 🤔 Debater", "## 📝 Chief")
+
+
+def parse_scale(scale: str) -> int:
+    """'10k' → 10_000, '1M' → 1_000_000, '2500' → 2500."""
+    s = scale.strip().lower().replace("_", "")
+    mult = {"k": 1_000, "m": 1_000_000}.get(s[-1:], 1)
+    return int(float(s[:-1] if mult > 1 else s) * mult)
+
+
+def _words(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(_VOCAB) for _ in range(n))
+
+
+def _analysis(rng: random.Random) -> dict:
+    outputs = {
+        heading: "\n".join(f"- {_words(rng, rng.randint(8, 20))}" for _ in range(4))
+        for heading in _HEADINGS
+    }
+    return {
+        "summary": _words(rng, 60),
+        "researcher_output": f"{_HEADINGS[0]}\n{outputs[_HEADINGS[0]]}",
+        "synthesizer_output": "\n\n".join(f"{h}\n{o}" for h, o in outputs.items()),
+    }
+
+
+def generate(
+    db_path: str,
+    n_articles: int,
+    *,
+    seed: int = 42,
+    days: int = 3 * 365,
+    batch_size: int = 5000,
+    progress=None,
+) -> dict:
+    """
+    Fill an initialized (init_db) database with synthetic data.
+
+    Args:
+        n_articles: Number of articles; other tables scale with it.
+        days: Archive lifetime — timestamps are spread over this many days.
+        progress: Optional callable(done, total) for long runs.
+
+    Returns:
+        Row counts per table.
+    """
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+    statuses = list(STATUS_WEIGHTS)
+    weights = list(STATUS_WEIGHTS.values())
+    conn = get_connection(db_path)
+    cur = conn.cursor()
+    cur.row_factory = None
+
+    next_id = (cur.execute("SELECT coalesce(MAX(id), 0) FROM articles").fetchone()[0]) + 1
+    analyzed_ids: list[tuple[int, str]] = []  # (article_id, created_at) for reflections
+
+    for start in range(0, n_articles, batch_size):
+        count = min(batch_size, n_articles - start)
+        rows, content = [], []
+        for i in range(count):
+            article_id = next_id + start + i
+            created = now - timedelta(seconds=rng.randint(0, days * 86400))
+            status = rng.choices(statuses, weights)[0]
+            rows.append((
+                article_id, f"synthetic_{article_id}",
+                f"{_words(rng, rng.randint(4, 10)).capitalize()}",
+                f"https://example.com/{article_id}",
+                created.isoformat(), status, created.isoformat(),
+                rng.choice(COLLECTIONS), 1 if rng.random() < 0.03 else 0,
+                created.strftime("%Y-%m-%d %H:%M:%S"),
+            ))
+            fields = {"raw_content": _words(rng, rng.randint(120, 400))}
+            if status != "queued":
+                fields.update(_analysis(rng))
+                analyzed_ids.append((article_id, created))
+            content.append((article_id, fields))
+
+        with conn:
+            cur.executemany(
+                """INSERT INTO articles
+                   (id, raindrop_id, title, source_url, date, status, queued_at,
+                    collection_name, priority, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                rows,
+            )
+            put_content_many(conn, content)
+        if progress:
+            progress(start + count, n_articles)
+
+    # Reflections: most reflected/sent articles get one, some get two
+    reflections = []
+    for article_id, created in analyzed_ids:
+        for _ in range(rng.choice((0, 1, 1, 1, 2))):
+            at = min(now, created + timedelta(hours=rng.randint(1, 72)))
+            reflections.append((
+                article_id, _words(rng, rng.randint(10, 30)), _words(rng, 8),
+                rng.randint(3, 10), at.strftime("%Y-%m-%d %H:%M:%S"),
+            ))
+
+    # Sessions: roughly one every other day, more for larger archives
+    sessions = []
+    per_day = max(1, n_articles // 20_000)
+    for day in range(days):
+        if rng.random() < 0.5:
+            continue
+        d = (now - timedelta(days=day)).date()
+        for _ in range(rng.randint(1, per_day)):
+            h = rng.randint(6, 22)
+            minutes = rng.randint(10, 90)
+            sessions.append((
+                d.isoformat(), f"{h:02d}:00", f"{h:02d}:{minutes % 60:02d}",
+                minutes, rng.choice(("reading", "reflection", "overview")),
+            ))
+
+    # Digests: one per ~200 articles, each over 5 random analyzed ones
+    digests = []
+    for _ in range(max(1, n_articles // 200)):
+        picked = [a for a, _ in rng.sample(analyzed_ids, min(5, len(analyzed_ids)))]
+        at = now - timedelta(seconds=rng.randint(0, days * 86400))
+        digests.append((
+            json.dumps(picked), _words(rng, 200), json.dumps(picked[:1]),
+            at.strftime("%Y-%m-%d %H:%M:%S"),
+        ))
+
+    with conn:
+        cur.executemany(
+            """INSERT INTO reflections
+               (article_id, reflection_text, action_item, confidence_score, created_at)
+               VALUES (?, ?, ?, ?, ?)""",
+            reflections,
+        )
+        cur.executemany(
+            """INSERT INTO sessions
+               (date, start_time, end_time, duration_minutes, activity_type)
+               VALUES (?, ?, ?, ?, ?)""",
+            sessions,
+        )
+        cur.executemany(
+            """INSERT INTO batch_digests
+               (article_ids, digest_output, deep_dive_selected, created_at)
+               VALUES (?, ?, ?, ?)""",
+            digests,
+        )
+    conn.execute("ANALYZE")
+
+    return {
+        "articles": n_articles,
+        "analyzed": len(analyzed_ids),
+        "reflections": len(reflections),
+        "sessions": len(sessions),
+        "batch_digests": len(digests),
+    }
+
+
+def table_counts(db_path: str) -> dict:
+    """Current row counts of the main tables (for result metadata)."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("articles", "reflections", "sessions", "batch_digests")
+        }
+    finally:
+        conn.close()
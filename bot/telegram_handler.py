@@ -2,11 +2,14 @@
 Telegram bot handler — commands, message sending, error handling.
 """
 import logging
+import time
 from datetime import datetime, date, timedelta
+from typing import Optional
 
 from strings import t
 
 from telegram import Update
+from telegram.error import BadRequest, RetryAfter
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -17,19 +20,10 @@ from telegram.ext import (
 )
 
 import config
-from db.repository import (
-    add_reflection,
-    add_session,
-    count_articles_by_status,
-    get_articles_by_status,
-    get_article_by_id,
-    get_recent_reflections,
-    get_sessions_by_date,
-    update_article_analysis,
-    update_article_status,
-)
-from services.analyzer import analyze_article
-from services.raindrop import pick_next_article
+from db import async_repository as adb
+from db import llm_cache
+from db.repository import ARTICLE_SUMMARY_FIELDS, get_reflection_days
+from services.analyzer import aanalyze_article
 
 logger = logging.getLogger(__name__)
 
@@ -60,7 +54,7 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     """Handle /status — show article statistics + streak + session."""
     try:
         db_path = str(config.DATABASE_PATH)
-        counts = count_articles_by_status(db_path)
+        counts = await adb.count_articles_by_status(db_path)
         total = sum(counts.values()) if counts else 0
 
         lines = ["📊 *Status*\n"]
@@ -70,6 +64,7 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         else:
             status_emoji = {
                 "queued": "📥",
+                "processing": "⚙️",
                 "sent": "📤",
                 "reflected": "💭",
                 "digest_reviewed": "📋",
@@ -78,31 +73,62 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             for status, count in counts.items():
                 emoji = status_emoji.get(status, "•")
                 lines.append(f"{emoji} {status}: {count}")
+            ready = await adb.count_batch_analyzed(db_path)
+            if ready:
+                lines.append(f"🗂️ đã phân tích sẵn (batch): {ready}")
             lines.append(f"📚 Total: {total}")
 
         # Streak
-        streak = calculate_streak(db_path)
+        streak = await adb.run_read(calculate_streak, db_path)
         lines.append(f"\n🔥 Streak: {streak} ngày")
 
-        # Total reflections
-        recent = get_recent_reflections(db_path, days=9999)
-        total_reflections = len(recent) if recent else 0
+        # Total reflections + average confidence (from the daily rollup)
+        activity = await adb.get_activity_summary(db_path)
+        total_reflections = activity["reflections"]
         lines.append(f"💭 Reflections: {total_reflections}")
-
-        # Average confidence
         if total_reflections > 0:
-            avg_conf = sum(r["confidence_score"] for r in recent) / total_reflections
-            lines.append(f"📈 Avg confidence: {avg_conf:.1f}/10")
+            lines.append(f"📈 Avg confidence: {activity['avg_confidence']:.1f}/10")
 
         # Today's session time
         today_str = date.today().isoformat()
-        sessions = get_sessions_by_date(db_path, today_str)
-        total_minutes = sum(s["duration_minutes"] for s in sessions) if sessions else 0
+        today = await adb.get_activity_summary(db_path, today_str, today_str)
+        total_minutes = today["session_minutes"]
         if total_minutes > 0:
             lines.append(f"\n⏱️ Học hôm nay: {total_minutes} phút")
         else:
             lines.append(f"\n⏱️ Chưa có session hôm nay")
 
+        # LLM response cache (process counters since start + stored entries)
+        cache = await adb.run_read(llm_cache.stats, db_path)
+        if cache["hits"] or cache["misses"]:
+            lines.append(
+                f"🧠 LLM cache: {cache['hits']} hit / {cache['misses']} miss"
+                f" ({cache['hit_rate']:.0%}), {cache['entries']} entries"
+            )
+
+        # Prompt registry render counters (per-template detail in logs/stats())
+        from services import prompt_registry
+        prompts = prompt_registry.stats()
+        renders = sum(p["renders"] for p in prompts.values())
+        if renders:
+            total_ms = sum(p["total_ms"] for p in prompts.values())
+            memo_hits = sum(p["memo_hits"] for p in prompts.values())
+            lines.append(
+                f"📝 Prompts: {renders} renders ({memo_hits / renders:.0%} memo),"
+                f" avg {total_ms / renders:.2f} ms"
+            )
+
+        # Single-flight: duplicate in-flight extractions/LLM calls that waited instead
+        from services import single_flight
+        flights = single_flight.stats()
+        if any(g["leaders"] for g in flights.values()):
+            lines.append(
+                "🪢 Dedup: " + ", ".join(
+                    f"{name} {g['coalesced']}/{g['leaders'] + g['coalesced']} gộp"
+                    for name, g in flights.items() if g["leaders"]
+                )
+            )
+
         text = "\n".join(lines)
         await update.message.reply_text(text, parse_mode="Markdown")
     except Exception as e:
@@ -111,147 +137,172 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
 
 async def analyze_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle /analyze [id] — pick next or specific article, extract, analyze."""
+    """Handle /analyze [id] [fresh] — pick next or specific article, extract, analyze."""
     import asyncio
     from functools import partial
+    from services.batch_analysis import aload_analyzed
     from services.extractor import extract_content
 
     db_path = str(config.DATABASE_PATH)
 
-    # 1. Pick article: by ID if provided, else from queue
+    # "fresh" bypasses the LLM response cache (re-run with new answers)
+    fresh = bool(context.args) and context.args[-1].lower() == "fresh"
+
+    # 1. Claim article (atomic lease): by ID if provided, else from queue
+    columns = ARTICLE_SUMMARY_FIELDS + ("raw_content",)
     article = None
     if context.args and context.args[0].isdigit():
         target_id = int(context.args[0])
-        from db.repository import get_article_by_id
-        article = get_article_by_id(db_path, target_id)
+        article = await adb.claim_article(
+            db_path, target_id, config.ANALYSIS_LEASE_SECONDS, columns=columns
+        )
         if not article:
+            exists = await adb.get_article_fields(db_path, target_id, ("id",))
             await update.message.reply_text(
-                f"❌ Không tìm thấy bài với ID={target_id}."
+                f"⏳ Bài #{target_id} đang được phân tích, thử lại sau."
+                if exists else f"❌ Không tìm thấy bài với ID={target_id}."
             )
             return
     else:
-        article = pick_next_article(db_path)
+        article = await adb.claim_next_article(
+            db_path, config.ANALYSIS_LEASE_SECONDS, columns=columns, include_analyzed=True,
+        )
         if not article:
             await update.message.reply_text(
                 "📭 Queue trống! Dùng /sync để lấy bài mới từ Raindrop."
             )
             return
 
+    lease = article["lease_owner"]
+    completed = False
     article_id = article["id"]
     title = article.get("title", "Untitled")
     source_url = article.get("source_url", "")
     excerpt = article.get("raw_content", "")
 
+    # Analyzed by a batch run: the saved analysis is sent unless "fresh"
+    stored = bool(article.get("batch_analyzed_at")) and not fresh
+
     await update.message.reply_text(
         f"⏳ Đang xử lý: *{title}*\n"
         f"🆔 ID: {article_id}\n"
         f"🔗 {source_url}\n\n"
-        f"Bước 1/3: Extracting content...",
+        + ("🗂️ Đã phân tích sẵn (batch) — gửi kết quả đã lưu." if stored
+           else "Bước 1/3: Extracting content..."),
         parse_mode="Markdown",
     )
 
     try:
-        loop = asyncio.get_event_loop()
+        extraction = None
+        if stored:
+            # Analyzed by a batch run — send the saved analysis, no LLM call
+            result, live = await aload_analyzed(db_path, article), None
+        else:
+            loop = asyncio.get_event_loop()
 
-        # 2. Extract content (smart: detect type → extract text + images)
-        extraction = await loop.run_in_executor(
-            None, partial(extract_content, source_url, excerpt)
-        )
+            # 2. Extract content (smart: detect type → extract text + images)
+            extraction = await loop.run_in_executor(
+                None, partial(extract_content, source_url, excerpt)
+            )
 
-        # Send extraction info
-        type_emoji = {"article": "📝", "youtube": "🎬", "short_video": "📱"}
-        status_parts = [
-            f"{type_emoji.get(extraction.content_type, '📄')} Type: {extraction.content_type}",
-            f"📊 Words: {extraction.word_count}",
-            f"🖼️ Images: {len(extraction.images)}",
-            f"📡 Source: {extraction.source}",
-        ]
+            # Send extraction info
+            type_emoji = {"article": "📝", "youtube": "🎬", "short_video": "📱"}
+            status_parts = [
+                f"{type_emoji.get(extraction.content_type, '📄')} Type: {extraction.content_type}",
+                f"📊 Words: {extraction.word_count}",
+                f"🖼️ Images: {len(extraction.images)}",
+                f"📡 Source: {extraction.source}",
+            ]
 
-        if extraction.warnings:
-            for w in extraction.warnings:
-                await update.message.reply_text(w)
+            if extraction.warnings:
+                for w in extraction.warnings:
+                    await update.message.reply_text(w)
 
-        await update.message.reply_text(
-            "Bước 2/3: Analyzing with LLM...\n\n" + "\n".join(status_parts)
-        )
+            await update.message.reply_text(
+                "Bước 2/3: Analyzing with LLM...\n\n" + "\n".join(status_parts)
+            )
 
-        # Update raw_content in DB if we got better content
-        if extraction.content and extraction.source != "excerpt":
-            from db.repository import _connect
-            with _connect(db_path) as conn:
-                conn.execute(
-                    "UPDATE articles SET raw_content = ? WHERE id = ?",
-                    (extraction.content[:10000], article_id),
+            # Update raw_content in DB if we got better content
+            if extraction.content and extraction.source != "excerpt":
+                await adb.update_article_raw_content(
+                    db_path, article_id, extraction.content[:10000]
                 )
 
-        # 3. Run LLM analysis (multimodal if images available)
-        if not extraction.content:
-            await update.message.reply_text(
-                "❌ Không extract được content. Dùng /analyze để thử bài khác."
-            )
-            return
+            # 3. Run LLM analysis (multimodal if images available)
+            if not extraction.content:
+                await update.message.reply_text(
+                    "❌ Không extract được content. Dùng /analyze để thử bài khác."
+                )
+                return
 
-        result = await loop.run_in_executor(
-            None,
-            partial(
-                analyze_article,
+            result, live = await _run_analysis(
+                context.bot, update.effective_chat.id,
+                f"📰 {title}\n🆔 ID: {article_id}\n🔗 {source_url}\n\n",
                 extraction.content,
                 article_link=source_url,
                 images=extraction.images if extraction.images else None,
-            ),
-        )
-
-        # 4. Update DB
-        update_article_analysis(
-            db_path,
-            article_id,
-            summary=result.stage_2_output or result.stage_1_output or "",
-            researcher_output=result.stage_1_output or "",
-            synthesizer_output=result.stage_2_output or "",
-        )
-        update_article_status(db_path, article_id, "sent")
-
-        # 5. Format and send
-        lines = [f"📰 *{title}*\n🆔 ID: {article_id}\n🔗 {source_url}\n"]
-
-        if result.stage_1_output:
-            lines.append(result.stage_1_output)
-        if result.stage_2_output:
-            lines.append("\n" + result.stage_2_output)
-        if result.warning:
-            lines.append("\n⚠️ " + result.warning)
-
-        output_text = "\n".join(lines)
+                use_cache=not fresh,
+            )
 
-        MAX_LEN = 4096
-        if len(output_text) <= MAX_LEN:
-            await update.message.reply_text(output_text)
+            # 4. Update DB
+            await adb.update_article_analysis(
+                db_path,
+                article_id,
+                summary=result.stage_2_output or result.stage_1_output or "",
+                researcher_output=result.stage_1_output or "",
+                synthesizer_output=result.stage_2_output or "",
+            )
+        completed = await adb.complete_claim(db_path, article_id, lease, "sent")
+        if not completed:
+            logger.warning(f"Lease lost for article #{article_id} — analysis saved anyway")
+
+        # 5. Format and send (already on screen when streamed)
+        if live is None:
+            lines = [f"📰 {title}\n🆔 ID: {article_id}\n🔗 {source_url}\n"]
+
+            if result.stage_1_output:
+                lines.append(result.stage_1_output)
+            if result.stage_2_output:
+                lines.append("\n" + result.stage_2_output)
+            if result.warning:
+                lines.append("\n⚠️ " + result.warning)
+
+            output_text = "\n".join(lines)
+
+            MAX_LEN = 4096
+            if len(output_text) <= MAX_LEN:
+                await update.message.reply_text(output_text)
+            else:
+                chunks = []
+                current = ""
+                for line in output_text.split("\n"):
+                    if len(current) + len(line) + 1 > MAX_LEN:
+                        if current:
+                            chunks.append(current)
+                        current = line
+                    else:
+                        current = current + "\n" + line if current else line
+                if current:
+                    chunks.append(current)
+                for chunk in chunks:
+                    await update.message.reply_text(chunk)
+
+            logger.info(f"Analysis sent: id={article_id}, {len(output_text)} chars")
         else:
-            chunks = []
-            current = ""
-            for line in output_text.split("\n"):
-                if len(current) + len(line) + 1 > MAX_LEN:
-                    if current:
-                        chunks.append(current)
-                    current = line
-                else:
-                    current = current + "\n" + line if current else line
-            if current:
-                chunks.append(current)
-            for chunk in chunks:
-                await update.message.reply_text(chunk)
-
-        logger.info(f"Analysis sent: id={article_id}, {len(output_text)} chars")
+            logger.info(
+                f"Analysis streamed: id={article_id}, {live.total_chars} chars "
+                f"in {len(live.messages)} message(s)"
+            )
 
         # 6. If short content, prompt user to paste link from comments
-        if extraction.word_count < 200 and extraction.source == "og_meta":
+        if extraction and extraction.word_count < 200 and extraction.source == "og_meta":
             await update.message.reply_text(
                 "📎 Bài ngắn (Facebook preview). Nếu có link ở comment, "
                 "gửi URL trực tiếp ở đây — mình sẽ extract & phân tích bổ sung."
             )
 
         # 7. Show GitHub links found in content
-        if extraction.github_links:
+        if extraction and extraction.github_links:
             gh_text = "🔗 *GitHub repos trong bài:*\n"
             for gh_url in extraction.github_links:
                 gh_text += f"  → {gh_url}\n"
@@ -263,6 +314,9 @@ async def analyze_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             f"❌ Phân tích thất bại: {e}\n\n"
             "Kiểm tra:\n• Antigravity proxy chạy chưa?\n• API key đúng chưa?"
         )
+    finally:
+        if not completed:
+            await adb.release_claim(db_path, article_id, lease)
 
 
 async def sync_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -284,9 +338,7 @@ async def sync_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         if new_raindrops is None:
             new_raindrops = []
 
-        result = await loop.run_in_executor(
-            None, sync_raindrops_to_db, new_raindrops, db_path
-        )
+        result = await adb.run_write(sync_raindrops_to_db, new_raindrops, db_path)
 
         text = (
             f"✅ *Sync hoàn tất!*\n\n"
@@ -308,31 +360,32 @@ async def reset_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     try:
         db_path = str(config.DATABASE_PATH)
 
-        with __import__('sqlite3').connect(db_path) as conn:
-            cursor = conn.execute(
-                "SELECT status, COUNT(*) FROM articles GROUP BY status"
+        before = await adb.count_articles_by_status(db_path)
+        if sum(n for status, n in before.items() if status != "queued") == 0:
+            await update.message.reply_text(
+                "✅ Không có bài nào cần reset — tất cả đã là 'queued'."
             )
-            before = {row[0]: row[1] for row in cursor.fetchall()}
-
-            sent_count = before.get("sent", 0)
-            if sent_count == 0:
-                await update.message.reply_text(
-                    "✅ Không có bài nào cần reset — tất cả đã là 'queued'."
-                )
-                return
+            return
 
-            conn.execute(
-                "UPDATE articles SET status = 'queued' WHERE status != 'queued'"
-            )
+        changed = await adb.reset_article_statuses(db_path)
+        after = await adb.count_articles_by_status(db_path)
 
-        total = sum(before.values())
-        await update.message.reply_text(
-            f"🔄 Reset xong!\n\n"
-            f"Trước: {before}\n"
-            f"Sau: tất cả {total} bài → queued\n\n"
-            f"Dùng /analyze để phân tích lại từ đầu."
+        lines = [
+            "🔄 Reset xong!\n",
+            f"Trước: {before}",
+            f"→ {changed} bài về queued",
+        ]
+        ready = await adb.count_batch_analyzed(db_path)
+        if ready:
+            lines.append(f"🗂️ {ready} bài đã phân tích sẵn (batch) — giữ kết quả, gửi trước")
+        if after.get("processing"):
+            lines.append(f"⚙️ processing: {after['processing']} đang được phân tích — giữ nguyên")
+        lines.append("\nDùng /analyze để phân tích lại từ đầu.")
+        await update.message.reply_text("\n".join(lines))
+        logger.info(
+            "Reset %d articles to 'queued' (%d still processing)",
+            changed, after.get("processing", 0),
         )
-        logger.info(f"Reset {sent_count} articles to 'queued'")
 
     except Exception as e:
         logger.error(f"Reset failed: {e}", exc_info=True)
@@ -344,7 +397,7 @@ async def next_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     from services.raindrop import pick_next_article
 
     db_path = str(config.DATABASE_PATH)
-    article = pick_next_article(db_path)
+    article = await adb.run_read(pick_next_article, db_path, ARTICLE_SUMMARY_FIELDS)
 
     if not article:
         await update.message.reply_text("📭 Queue trống! Dùng /sync để lấy bài mới.")
@@ -353,11 +406,12 @@ async def next_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     article_id = article.get("id")
     title = article.get("title", "Untitled")
     url = article.get("source_url", "")
-    raw = article.get("raw_content", "")
+    content = await adb.get_article_fields(db_path, article_id, ("raw_content",)) or {}
+    raw = content.get("raw_content") or ""
     preview = raw[:200] + "..." if len(raw) > 200 else (raw or "(no content)")
 
     # Count remaining
-    counts = count_articles_by_status(db_path)
+    counts = await adb.count_articles_by_status(db_path)
     queued_count = counts.get("queued", 0)
 
     text = (
@@ -376,7 +430,7 @@ async def skip_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     from services.raindrop import pick_next_article
 
     db_path = str(config.DATABASE_PATH)
-    article = pick_next_article(db_path)
+    article = await adb.run_read(pick_next_article, db_path, ARTICLE_SUMMARY_FIELDS)
 
     if not article:
         await update.message.reply_text("📭 Không có bài nào để skip!")
@@ -384,19 +438,19 @@ async def skip_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 
     article_id = article.get("id")
     title = article.get("title", "Untitled")
-    update_article_status(db_path, article_id, "skipped")
+    await adb.update_article_status(db_path, article_id, "skipped")
 
     await update.message.reply_text(
         f"⏭️ Đã skip #{article_id}: {title[:60]}..."
     )
 
     # Show next article preview
-    next_article = pick_next_article(db_path)
+    next_article = await adb.run_read(pick_next_article, db_path, ARTICLE_SUMMARY_FIELDS)
 
     if next_article:
         nid = next_article.get("id")
         ntitle = next_article.get("title", "Untitled")
-        counts = count_articles_by_status(db_path)
+        counts = await adb.count_articles_by_status(db_path)
         await update.message.reply_text(
             f"📄 *Bài tiếp:* #{nid} — {ntitle[:80]}\n"
             f"📊 Còn {counts.get('queued', 0)} bài\n"
@@ -407,6 +461,52 @@ async def skip_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         await update.message.reply_text("📭 Queue trống!")
 
 
+async def search_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /search <query> — full-text search; bare /search shows the next page."""
+    db_path = str(config.DATABASE_PATH)
+    query = " ".join(context.args).strip() if context.args else ""
+
+    if query:
+        cursor = None
+    else:
+        query = context.user_data.get("search_query", "")
+        cursor = context.user_data.get("search_cursor")
+        if not query or not cursor:
+            await update.message.reply_text(
+                "🔎 Dùng: /search <từ khóa>\nVí dụ: /search rag chunking"
+            )
+            return
+
+    try:
+        page = await adb.search(db_path, query, limit=8, cursor=cursor)
+    except Exception as e:
+        logger.error(f"Search failed: {e}", exc_info=True)
+        await update.message.reply_text("❌ Tìm kiếm thất bại. Check logs.")
+        return
+
+    results = page["results"]
+    if not results:
+        context.user_data.pop("search_cursor", None)
+        await update.message.reply_text(f"🔎 Không tìm thấy kết quả cho \"{query}\".")
+        return
+
+    context.user_data["search_query"] = query
+    context.user_data["search_cursor"] = page["next_cursor"]
+
+    lines = [f"🔎 Kết quả cho \"{query}\":\n"]
+    for r in results:
+        title = (r.get("title") or "Untitled")[:70]
+        icon = "💭" if r["kind"] == "reflection" else "📄"
+        lines.append(f"{icon} #{r['article_id']} — {title}")
+        if r["field"] != "title" and r["snippet"]:
+            lines.append(f"   {r['snippet'].replace(chr(10), ' ')[:200]}")
+        lines.append(f"   → /analyze {r['article_id']}\n")
+    if page["next_cursor"]:
+        lines.append("➡️ /search để xem tiếp")
+
+    await update.message.reply_text("\n".join(lines))
+
+
 async def schedule_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /schedule — view or change scheduler settings."""
     from services.scheduler import (
@@ -428,9 +528,14 @@ async def schedule_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
             f"{status_icon} Trạng thái: {'Active' if info.get('enabled') and not info.get('paused') else 'Paused/Off'}\n"
             f"🕐 Giờ chạy: {info.get('hour', '?'):02d}:{info.get('minute', '?'):02d}\n"
             f"🌏 Timezone: {info.get('timezone', '?')}\n"
-            f"⏭️ Lần chạy tiếp: {info.get('next_run', '?')}\n\n"
-            f"Dùng: /schedule HH:MM | /schedule on | /schedule off"
+            f"⏭️ Lần chạy tiếp: {info.get('next_run', '?')}\n"
         )
+        if info.get("last_backup"):
+            text += (
+                f"💾 Backup gần nhất: {info['backup_size_bytes'] / 1024 / 1024:.1f} MB"
+                f" trong {info['backup_duration_s']:.1f}s\n"
+            )
+        text += "\nDùng: /schedule HH:MM | /schedule on | /schedule off"
         await update.message.reply_text(text, parse_mode="Markdown")
         return
 
@@ -470,6 +575,120 @@ async def schedule_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         )
 
 
+async def models_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /models — per-model health scoreboard; /models reset [model] closes circuits."""
+    import asyncio
+    from services import model_health
+    from services.llm_client import check_proxy_health
+
+    args = context.args
+    if args and args[0].lower() == "reset":
+        model = args[1] if len(args) > 1 else None
+        model_health.reset(model)
+        await update.message.reply_text(f"✅ Đã reset health: {model or 'tất cả models'}")
+        return
+
+    loop = asyncio.get_running_loop()
+    health = await loop.run_in_executor(None, lambda: check_proxy_health(scoreboard=True))
+
+    state_icon = {
+        model_health.CLOSED: "🟢",
+        model_health.HALF_OPEN: "🟡",
+        model_health.OPEN: "🔴",
+    }
+    lines = [f"🩺 Models — proxy {'🟢 OK' if health['proxy'] else '🔴 unreachable'}\n"]
+    if not health["models"]:
+        lines.append("Chưa có lượt gọi LLM nào từ khi khởi động.")
+    for model, row in health["models"].items():
+        line = f"{state_icon.get(row['state'], '•')} {model}: {row['calls']} calls"
+        if row["success_rate"] is not None:
+            line += f", {row['success_rate']:.0%} OK"
+        latency = row["latency"].get("total") or row["latency"].get("ttft")
+        if latency:
+            line += f", p50 {latency['p50']:.1f}s / p95 {latency['p95']:.1f}s"
+        if row["state"] != model_health.CLOSED:
+            line += f"\n    {row['state']}, thử lại sau {row['retry_in']:.0f}s"
+            if row["last_error"]:
+                line += f" — {row['last_error'][:80]}"
+        lines.append(line)
+
+    if health["rate_limits"]:
+        lines.append("\n⏳ Rate limit (chờ / tổng lượt):")
+        for model, row in health["rate_limits"].items():
+            waits = ", ".join(
+                f"{name} {row[name]['waited']}/{row[name]['granted']}"
+                f" (max {row[name]['max_wait_s']:.0f}s)"
+                for name in ("interactive", "background") if row[name]["granted"]
+            )
+            queued = f", {row['queued']} đang chờ" if row["queued"] else ""
+            lines.append(f"• {model}: {row['rpm']:.0f} rpm{queued} — {waits or 'chưa gọi'}")
+
+    lines.append("\n🔗 Thứ tự fallback hiện tại:")
+    for task_type, chain in health["chains"].items():
+        lines.append(f"• {task_type}: {' → '.join(chain) or '(tất cả đang open)'}")
+    lines.append("\nDùng: /models reset [model]")
+    await update.message.reply_text("\n".join(lines))
+
+
+def _tokens_k(n: int) -> str:
+    return f"{n / 1000:.1f}k" if n >= 1000 else str(n)
+
+
+def _seconds(ms) -> str:
+    return f"{ms / 1000:.1f}s" if ms is not None else "—"
+
+
+async def metrics_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /metrics [days] — LLM latency percentiles and tokens per day, from llm_calls."""
+    from db import llm_telemetry
+
+    days = 7
+    if context.args:
+        try:
+            days = max(1, min(90, int(context.args[0])))
+        except ValueError:
+            await update.message.reply_text("Dùng: /metrics [số ngày, mặc định 7]")
+            return
+
+    db_path = str(config.DATABASE_PATH)
+    await adb.run_write(llm_telemetry.flush, db_path)
+    latency = await adb.run_read(llm_telemetry.latency_rollup, db_path, days)
+    tokens = await adb.run_read(llm_telemetry.daily_tokens, db_path, days)
+    if not latency:
+        await update.message.reply_text(f"📈 Chưa có lượt gọi LLM nào trong {days} ngày qua.")
+        return
+
+    lines = [f"📈 LLM metrics — {days} ngày qua\n", "⏱️ Latency (p50 / p95, chậm nhất trước):"]
+    for row in latency:
+        line = (
+            f"• {row['model']} · {row['task_type'] or '—'}: {row['calls']} calls, "
+            f"{_seconds(row['p50_ms'])} / {_seconds(row['p95_ms'])}"
+        )
+        if row["ttft_p95_ms"] is not None:
+            line += f", TTFT p95 {_seconds(row['ttft_p95_ms'])}"
+        if row["cached_ratio"] is not None:
+            line += f", prefix cache {row['cached_ratio']:.0%}"
+        extras = [
+            f"{row[key]} {label}"
+            for key, label in (("failures", "lỗi"), ("retries", "retry"),
+                               ("fallback_calls", "fallback"), ("cache_hits", "cache"))
+            if row[key]
+        ]
+        if extras:
+            line += f" ({', '.join(extras)})"
+        lines.append(line)
+
+    lines.append("\n🔢 Tokens theo ngày (vào [cached] / ra · thời gian gọi):")
+    for row in tokens:
+        cached = f" [{_tokens_k(row['cached_tokens'])}]" if row["cached_tokens"] else ""
+        lines.append(
+            f"• {row['day']} {row['task_type'] or '—'}: {row['calls']} calls, "
+            f"{_tokens_k(row['prompt_tokens'])}{cached} / {_tokens_k(row['completion_tokens'])}"
+            f" · {row['latency_s']:.0f}s"
+        )
+    await send_long_message(context.bot, update.effective_chat.id, "\n".join(lines), parse_mode=None)
+
+
 async def unknown_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle unknown commands."""
     await update.message.reply_text(
@@ -543,6 +762,172 @@ async def send_long_message(bot, chat_id: str, text: str, parse_mode: str = "Mar
     return await send_message(bot, chat_id, text, parse_mode)
 
 
+class LiveMessage:
+    """
+    A reply that grows in place while LLM text streams in.
+
+    Edits are throttled to one per TELEGRAM_EDIT_INTERVAL (Telegram flood
+    limits); when the text passes MAX_MESSAGE_LENGTH the filled part is
+    frozen at a natural break and the rest continues in a new message.
+    Sent as plain text — partial Markdown from a model rarely parses, so
+    headers must be plain text too (no *bold*).
+
+    Only in-progress cursor edits may be dropped (the next one catches up).
+    Freezing a full message and the final edit wait out flood control and,
+    if the edit still fails, send the text as a new message instead.
+
+    Usage:
+        live = LiveMessage(bot, chat_id, header="📰 Title\n")
+        await live.start()
+        await live.append(delta)   # repeatedly
+        await live.finish()
+    """
+
+    PLACEHOLDER = "✍️ ..."
+
+    def __init__(self, bot, chat_id, header: str = "", interval: Optional[float] = None):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.interval = config.TELEGRAM_EDIT_INTERVAL if interval is None else interval
+        self.messages = []       # sent telegram Message objects, oldest first
+        self.text = header       # text of the current (last) message
+        self._shown = None       # what the current message displays now
+        self._last_edit = 0.0
+        self.total_chars = 0
+
+    async def start(self) -> None:
+        """Send the placeholder right away (header + cursor)."""
+        await self._show((self.text or self.PLACEHOLDER) + " ▌")
+
+    async def append(self, delta: str) -> None:
+        """Add streamed text; edits/rolls over as needed."""
+        self.text += delta
+        self.total_chars += len(delta)
+        while len(self.text) > MAX_MESSAGE_LENGTH:
+            cut = self._break_point(self.text)
+            head, self.text = self.text[:cut], self.text[cut:].lstrip()
+            await self._show(head, final=True)  # freeze the full message
+            self.messages.append(None)          # next _show sends a new one
+        if time.monotonic() - self._last_edit >= self.interval:
+            await self._show(self.text + " ▌")
+
+    async def finish(self, footer: str = "") -> None:
+        """Final edit without the cursor (plus an optional footer)."""
+        self.text += footer
+        if len(self.text) > MAX_MESSAGE_LENGTH:
+            await self.append("")
+        await self._show(self.text or self.PLACEHOLDER, final=True)
+
+    @staticmethod
+    def _break_point(text: str) -> int:
+        """Like split_message, but only breaks in the back half (no tiny messages)."""
+        lo = MAX_MESSAGE_LENGTH // 2
+        for sep in ("\n\n", "\n", " "):
+            at = text.rfind(sep, lo, MAX_MESSAGE_LENGTH)
+            if at != -1:
+                return at
+        return MAX_MESSAGE_LENGTH
+
+    RETRIES = 3  # flood-control waits before a final edit falls back to a new message
+
+    async def _show(self, text: str, final: bool = False) -> None:
+        """
+        Send or edit the current message. Cursor edits that fail are skipped;
+        final ones (frozen head, last edit) retry and never lose their text.
+        """
+        self._last_edit = time.monotonic()
+        if not final:
+            try:
+                await self._send_or_edit(text)
+            except Exception as e:
+                # RetryAfter / "message is not modified" — the next edit catches up
+                logger.debug(f"Live message edit skipped: {e}")
+            return
+
+        try:
+            await self._flood_safe(self._send_or_edit, text)
+            return
+        except BadRequest as e:
+            if "not modified" in str(e).lower():
+                self._shown = text
+                return
+            logger.warning(f"Live message edit failed, re-sending: {e}")
+        except Exception as e:
+            logger.warning(f"Live message edit failed, re-sending: {e}")
+        # The edit never landed: send the text as a new message so it isn't lost
+        try:
+            msg = await self._flood_safe(self.bot.send_message, chat_id=self.chat_id, text=text)
+        except Exception as e:
+            logger.error(f"Live message text lost ({len(text)} chars): {e}")
+        else:
+            self.messages.append(msg)
+            self._shown = text
+
+    async def _flood_safe(self, call, *args, **kwargs):
+        """await call(...), sleeping out up to RETRIES RetryAfter (flood control) errors."""
+        import asyncio
+        for attempt in range(self.RETRIES + 1):
+            try:
+                return await call(*args, **kwargs)
+            except RetryAfter as e:
+                if attempt == self.RETRIES:
+                    raise
+                delay = e.retry_after
+                await asyncio.sleep(delay.total_seconds() if isinstance(delay, timedelta) else delay)
+
+    async def _send_or_edit(self, text: str) -> None:
+        if not self.messages or self.messages[-1] is None:
+            msg = await self.bot.send_message(
+                chat_id=self.chat_id, text=text or self.PLACEHOLDER
+            )
+            if self.messages:
+                self.messages[-1] = msg
+            else:
+                self.messages.append(msg)
+            self._shown = text
+        elif text != self._shown:
+            await self.messages[-1].edit_text(text)
+            self._shown = text
+
+
+async def _run_analysis(bot, chat_id, header: str, content: str, **kwargs):
+    """
+    Run aanalyze_article, streaming both stages into a LiveMessage.
+
+    Returns:
+        (AnalysisResult, LiveMessage) — LiveMessage is None when
+        TELEGRAM_STREAMING is off and the caller should send the result.
+    """
+    if not config.TELEGRAM_STREAMING:
+        return await aanalyze_article(content, **kwargs), None
+
+    live = LiveMessage(bot, chat_id, header=header)
+    await live.start()
+    last_stage = None
+
+    async def on_delta(stage: str, delta: str) -> None:
+        nonlocal last_stage
+        if last_stage and stage != last_stage:
+            await live.append("\n\n")
+        last_stage = stage
+        await live.append(delta)
+
+    result, footer = None, ""
+    try:
+        result = await aanalyze_article(content, on_delta=on_delta, **kwargs)
+    except BaseException as e:
+        footer = "\n\n" + t("analyze_error", error=str(e) or type(e).__name__)
+        raise
+    finally:
+        # Always drop the cursor, even when the analysis blew up
+        if result is not None and result.error:
+            footer += "\n\n❌ " + result.error
+        if result is not None and result.warning:
+            footer += "\n\n⚠️ " + result.warning
+        await live.finish(footer)
+    return result, live
+
+
 # ═══════════════════════════════════════════════════════════════════
 #  URL MESSAGE HANDLER
 # ═══════════════════════════════════════════════════════════════════
@@ -600,18 +985,19 @@ async def url_message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
         )
 
         # Run LLM analysis
-        result = await loop.run_in_executor(
-            None,
-            partial(
-                analyze_article,
-                extraction.content,
-                article_link=url,
-                images=extraction.images if extraction.images else None,
-            ),
+        result, live = await _run_analysis(
+            context.bot, update.effective_chat.id,
+            f"📰 Phân tích bổ sung\n🔗 {url}\n\n",
+            extraction.content,
+            article_link=url,
+            images=extraction.images if extraction.images else None,
         )
+        if live is not None:
+            logger.info(f"URL analysis streamed: {url}, {live.total_chars} chars")
+            return
 
         # Format and send
-        lines = [f"📰 *Phân tích bổ sung*\n🔗 {url}\n"]
+        lines = [f"📰 Phân tích bổ sung\n🔗 {url}\n"]
 
         if result.stage_1_output:
             lines.append(result.stage_1_output)
@@ -653,9 +1039,7 @@ async def url_message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 async def overview_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /overview [n] — batch overview N queued articles."""
-    import asyncio
-    from functools import partial
-    from services.digest import create_batch_digest
+    from services.digest import acreate_batch_digest
 
     db_path = str(config.DATABASE_PATH)
 
@@ -674,11 +1058,7 @@ async def overview_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     await update.message.reply_text(f"⏳ Đang tạo overview cho {n} bài queued cũ nhất...")
 
     try:
-        loop = asyncio.get_running_loop()
-        result = await loop.run_in_executor(
-            None,
-            partial(create_batch_digest, db_path, n=n),
-        )
+        result = await acreate_batch_digest(db_path, n=n)
 
         if not result.success:
             await update.message.reply_text(f"❌ {result.error}")
@@ -739,19 +1119,14 @@ async def overview_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
 
 async def weekly_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /weekly — generate weekly synthesis report."""
-    import asyncio
-    from functools import partial
-    from services.synthesizer import create_weekly_synthesis
+    from services.synthesizer import acreate_weekly_synthesis
 
     db_path = str(config.DATABASE_PATH)
 
     await update.message.reply_text("⏳ Đang tạo weekly synthesis...")
 
     try:
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None, partial(create_weekly_synthesis, db_path)
-        )
+        result = await acreate_weekly_synthesis(db_path)
 
         if result.error:
             await update.message.reply_text(f"⚠️ {result.error}")
@@ -807,30 +1182,16 @@ async def weekly_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
 def calculate_streak(db_path: str) -> int:
     """Calculate consecutive days with at least one reflection, counting from today."""
-    reflections = get_recent_reflections(db_path, days=60)
-    if not reflections:
-        return 0
-
-    # Get unique dates with reflections
-    reflection_dates = set()
-    for r in reflections:
-        created = r.get("created_at", "")
-        if created:
-            try:
-                dt = datetime.fromisoformat(created)
-                reflection_dates.add(dt.date())
-            except (ValueError, TypeError):
-                pass
-
-    if not reflection_dates:
-        return 0
+    reflection_days = get_reflection_days(db_path)  # newest first
 
     # Count consecutive days backwards from today
-    today = date.today()
     streak = 0
-    check_date = today
-
-    while check_date in reflection_dates:
+    check_date = date.today()
+    for day in reflection_days:
+        if day > check_date.isoformat():
+            continue  # future-dated rows (clock/timezone skew) don't break the streak
+        if day != check_date.isoformat():
+            break
         streak += 1
         check_date -= timedelta(days=1)
 
@@ -849,7 +1210,7 @@ async def reflect_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     if context.args:
         try:
             article_id = int(context.args[0])
-            article = get_article_by_id(db_path, article_id)
+            article = await adb.get_article_by_id(db_path, article_id)
             if not article:
                 await update.message.reply_text(
                     f"❌ Không tìm thấy article #{article_id}"
@@ -860,7 +1221,9 @@ async def reflect_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             return ConversationHandler.END
     else:
         # Find last sent article
-        sent_articles = get_articles_by_status(db_path, "sent")
+        sent_articles = await adb.get_articles_by_status(
+            db_path, "sent", columns=("id", "title")
+        )
         if not sent_articles:
             await update.message.reply_text(
                 "📭 Không có bài nào đã gửi để reflect.\n"
@@ -933,7 +1296,7 @@ async def reflect_confidence(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
     # Save reflection
     try:
-        add_reflection(
+        await adb.add_reflection(
             db_path,
             article_id=article_id,
             reflection_text=insight,
@@ -941,10 +1304,10 @@ async def reflect_confidence(update: Update, context: ContextTypes.DEFAULT_TYPE)
             confidence_score=score,
         )
         # Update article status
-        update_article_status(db_path, article_id, "reflected")
+        await adb.update_article_status(db_path, article_id, "reflected")
 
         # Calculate streak
-        streak = calculate_streak(db_path)
+        streak = await adb.run_read(calculate_streak, db_path)
 
         await update.message.reply_text(
             f"✅ *Reflection saved!*\n\n"
@@ -999,9 +1362,9 @@ async def session_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         else:
             # Show today's total
             today_str = date.today().isoformat()
-            sessions = get_sessions_by_date(db_path, today_str)
-            total_min = sum(s["duration_minutes"] for s in sessions) if sessions else 0
-            count = len(sessions) if sessions else 0
+            today = await adb.get_activity_summary(db_path, today_str, today_str)
+            total_min = today["session_minutes"]
+            count = today["sessions"]
             await update.message.reply_text(
                 f"📊 Hôm nay: {count} session, {total_min} phút\n"
                 f"→ /session start để bắt đầu"
@@ -1038,7 +1401,7 @@ async def session_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
         # Save to DB
         try:
-            add_session(
+            await adb.add_session(
                 db_path,
                 date=date.today().isoformat(),
                 start_time=session_start.strftime("%H:%M"),
@@ -1048,8 +1411,9 @@ async def session_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             )
 
             # Get today's total
-            today_sessions = get_sessions_by_date(db_path, date.today().isoformat())
-            total_min = sum(s["duration_minutes"] for s in today_sessions) if today_sessions else 0
+            today_str = date.today().isoformat()
+            today = await adb.get_activity_summary(db_path, today_str, today_str)
+            total_min = today["session_minutes"]
 
             await update.message.reply_text(
                 f"✅ Session kết thúc!\n\n"
@@ -1090,6 +1454,12 @@ async def _post_init(app: Application) -> None:
     logger.info("Scheduler initialized via post_init")
 
 
+async def _post_shutdown(app: Application) -> None:
+    """Called after Application.shutdown() — close the pooled LLM connections."""
+    from services.llm_client import aclose_llm_client
+    await aclose_llm_client()
+
+
 def build_application(token: str) -> Application:
     """
     Build the Telegram Application with all handlers registered.
@@ -1100,7 +1470,12 @@ def build_application(token: str) -> Application:
     Returns:
         Configured Application ready for run_polling()
     """
-    app = Application.builder().token(token).post_init(_post_init).build()
+    app = (
+        Application.builder().token(token)
+        .post_init(_post_init)
+        .post_shutdown(_post_shutdown)
+        .build()
+    )
 
     # Reflection ConversationHandler (must be before plain command handlers)
     reflect_handler = ConversationHandler(
@@ -1124,9 +1499,12 @@ def build_application(token: str) -> Application:
     app.add_handler(CommandHandler("next", next_command))
     app.add_handler(CommandHandler("skip", skip_command))
     app.add_handler(CommandHandler("schedule", schedule_command))
+    app.add_handler(CommandHandler("models", models_command))
+    app.add_handler(CommandHandler("metrics", metrics_command))
     app.add_handler(CommandHandler("session", session_command))
     app.add_handler(CommandHandler("overview", overview_command))
     app.add_handler(CommandHandler("weekly", weekly_command))
+    app.add_handler(CommandHandler("search", search_command))
     app.add_handler(CommandHandler("reset", reset_command))
 
     # URL message handler (user sends a URL → extract & analyze)
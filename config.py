@@ -11,14 +11,33 @@ load_dotenv()
 # ── Paths ──────────────────────────────────────────────────────────
 BASE_DIR = Path(__file__).parent
 PROMPTS_DIR = BASE_DIR / "prompts"
+PROMPT_RELOAD_CHECK_SECONDS = float(os.getenv("PROMPT_RELOAD_CHECK_SECONDS", "5"))  # mtime check interval, 0 = never
 DATABASE_PATH = Path(os.getenv("DATABASE_PATH", str(BASE_DIR / "data" / "learning.db")))
 
+# ── Database Tuning ────────────────────────────────────────────────
+# Long-lived per-thread connections (db/connection.py); pragmas applied once per connection
+DB_POOLING = os.getenv("DB_POOLING", "true").lower() == "true"
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "65536"))       # 64 MB page cache
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))  # 256 MB memory-mapped I/O
+DB_READER_THREADS = int(os.getenv("DB_READER_THREADS", "4"))  # async facade read pool (WAL readers)
+ANALYSIS_LEASE_SECONDS = int(os.getenv("ANALYSIS_LEASE_SECONDS", "900"))  # claim expiry for crashed analyzers
+BACKUP_ENABLED = os.getenv("BACKUP_ENABLED", "true").lower() == "true"
+BACKUP_DIR = Path(os.getenv("BACKUP_DIR", str(BASE_DIR / "data" / "backups")))
+BACKUP_HOUR = int(os.getenv("BACKUP_HOUR", "3"))  # nightly online backup (TIMEZONE)
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "7"))  # newest backups to keep
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))  # pages copied per step
+BACKUP_STEP_SLEEP_MS = int(os.getenv("BACKUP_STEP_SLEEP_MS", "50"))  # pause between steps for writers
+CHECKPOINT_INTERVAL_MINUTES = int(os.getenv("CHECKPOINT_INTERVAL_MINUTES", "30"))  # PASSIVE WAL checkpoint
+
 # ── Language ────────────────────────────────────────────────────────
 LANGUAGE = os.getenv("LANGUAGE", "vi")  # "vi" | "en"
 
 # ── Telegram ───────────────────────────────────────────────────────
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "")
+TELEGRAM_STREAMING = os.getenv("TELEGRAM_STREAMING", "true").lower() == "true"  # live-edit analyses as they stream
+TELEGRAM_EDIT_INTERVAL = float(os.getenv("TELEGRAM_EDIT_INTERVAL", "1.5"))  # seconds between edits (flood limits)
 
 # ── Raindrop ───────────────────────────────────────────────────────
 RAINDROP_API_TOKEN = os.getenv("RAINDROP_API_TOKEN", "")
@@ -26,15 +45,88 @@ RAINDROP_API_TOKEN = os.getenv("RAINDROP_API_TOKEN", "")
 # ── Antigravity Tools Proxy (LLM Gateway) ──────────────────────────
 ANTIGRAVITY_API_KEY = os.getenv("ANTIGRAVITY_API_KEY", "sk-antigravity")
 ANTIGRAVITY_BASE_URL = os.getenv("ANTIGRAVITY_BASE_URL", "http://127.0.0.1:8045/v1")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))  # seconds per request
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "true").lower() == "true"  # async client; needs the h2 package
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))  # shared async connection pool
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "10"))
+LLM_MAX_CONCURRENCY_PER_MODEL = int(os.getenv("LLM_MAX_CONCURRENCY_PER_MODEL", "4"))  # in-flight async calls per model
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"  # response cache in SQLite
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "168"))  # 7 days
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "64"))  # LRU eviction above this (compressed)
+# Models (name prefixes) whose static system prompt gets an Anthropic-style cache_control
+# breakpoint; others rely on the provider's automatic prefix caching. Empty = no hints.
+PROMPT_CACHE_HINT_MODELS = [
+    m.strip() for m in os.getenv("PROMPT_CACHE_HINT_MODELS", "claude").split(",") if m.strip()
+]
+LLM_TELEMETRY_ENABLED = os.getenv("LLM_TELEMETRY_ENABLED", "true").lower() == "true"  # llm_calls table (/metrics)
+LLM_TELEMETRY_FLUSH_ROWS = int(os.getenv("LLM_TELEMETRY_FLUSH_ROWS", "20"))  # buffered rows per batch insert
+LLM_TELEMETRY_FLUSH_SECONDS = float(os.getenv("LLM_TELEMETRY_FLUSH_SECONDS", "60"))  # ...or when the oldest is this old
+LLM_TELEMETRY_RETENTION_DAYS = int(os.getenv("LLM_TELEMETRY_RETENTION_DAYS", "90"))
+
+# ── Batch Analysis (scripts/batch_analyze.py) ─────────────────────
+# "openai" = Files + Batches API of the gateway; "replay" = local stand-in that
+# replays the JSONL through the normal fallback chain (for gateways without /v1/batches)
+LLM_BATCH_BACKEND = os.getenv("LLM_BATCH_BACKEND", "replay").lower()
+LLM_BATCH_DIR = Path(os.getenv("LLM_BATCH_DIR", str(BASE_DIR / "data" / "batches")))  # request/result JSONL
+LLM_BATCH_POLL_SECONDS = float(os.getenv("LLM_BATCH_POLL_SECONDS", "60"))
+LLM_BATCH_MAX_HOURS = float(os.getenv("LLM_BATCH_MAX_HOURS", "24"))  # give up polling (the batch window)
+LLM_BATCH_REPLAY_CONCURRENCY = int(os.getenv("LLM_BATCH_REPLAY_CONCURRENCY", "4"))
 
 # ── Model Configuration ───────────────────────────────────────────
 # 2-stage pipeline: Stage 1 (analysis) + Stage 2 (planning)
+# Per task: the primary model plus its budgets —
+#   hedge_after       max seconds to wait on a model before also starting the next
+#                     one in FALLBACK_CHAIN (used as-is until p95 data exists)
+#   max_hedges        extra models that may run concurrently (0 = plain sequential fallback)
+#   max_input_tokens  content above this (estimated) is map-reduced first — see
+#                     services/long_content.py; None = no limit
+# A bare model string is still accepted (default budget).
 MODEL_CONFIG = {
-    "stage_1_analysis": os.getenv("MODEL_STAGE_1", "gemini-3-pro"),
-    "stage_2_planning": os.getenv("MODEL_STAGE_2", "claude-opus-4-6-thinking"),
-    "batch_digest":     os.getenv("MODEL_DIGEST", "gemini-3-pro"),
-    "weekly_synthesis": os.getenv("MODEL_WEEKLY", "gemini-3-pro"),
+    "stage_1_analysis": {"model": os.getenv("MODEL_STAGE_1", "gemini-3-pro"),
+                         "hedge_after": 45.0, "max_hedges": 1, "max_input_tokens": 24000},
+    "stage_2_planning": {"model": os.getenv("MODEL_STAGE_2", "claude-opus-4-6-thinking"),
+                         "hedge_after": 90.0, "max_hedges": 1},
+    "batch_digest":     {"model": os.getenv("MODEL_DIGEST", "gemini-3-pro"),
+                         "hedge_after": 60.0, "max_hedges": 1},
+    "weekly_synthesis": {"model": os.getenv("MODEL_WEEKLY", "gemini-3-pro"),
+                         "hedge_after": 60.0, "max_hedges": 0},  # scheduled, latency doesn't matter
+    # Map phase for long content: one call per part, all in parallel
+    "chunk_summary":    {"model": os.getenv("MODEL_CHUNK", "gemini-3-flash"),
+                         "hedge_after": 30.0, "max_hedges": 1, "max_input_tokens": 16000},
+}
+DEFAULT_HEDGE_BUDGET = {"hedge_after": 60.0, "max_hedges": 1, "max_input_tokens": None}
+
+# Stage 1 mode — off by default: .agent/rules.md fixes daily analysis at ONE LLM call.
+# When on, the 3 personas run as concurrent calls (latency ≈ slowest persona, 3× the requests)
+STAGE_1_PARALLEL = os.getenv("STAGE_1_PARALLEL", "false").lower() == "true"
+STAGE_1_PERSONA_TIMEOUT = float(os.getenv("STAGE_1_PERSONA_TIMEOUT", "90"))  # seconds per persona
+
+# Long content map-reduce: at most this many parts (= one parallel map round);
+# anything beyond parts × the chunk_summary budget is cut off
+LONG_CONTENT_MAX_PARTS = int(os.getenv("LONG_CONTENT_MAX_PARTS", "8"))
+
+# Hedged fallback — see services/model_health.hedge_delay
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "true").lower() == "true"
+HEDGE_P95_FACTOR = float(os.getenv("HEDGE_P95_FACTOR", "1.0"))  # hedge after p95 × factor
+HEDGE_MIN_SECONDS = float(os.getenv("HEDGE_MIN_SECONDS", "5"))  # never hedge sooner than this
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "5"))  # latencies needed before p95 is trusted
+
+# Per-model circuit breaker — see services/model_health.py
+BREAKER_ENABLED = os.getenv("BREAKER_ENABLED", "true").lower() == "true"
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "3"))  # consecutive failures → open
+BREAKER_COOLDOWN_SECONDS = float(os.getenv("BREAKER_COOLDOWN_SECONDS", "300"))  # skip an open model this long
+BREAKER_WINDOW_SECONDS = float(os.getenv("BREAKER_WINDOW_SECONDS", "900"))  # outcomes used to rank the chain
+
+# Per-model rate limits (services/rate_limiter.py) — requests and estimated
+# tokens per minute; "default" applies to models without their own entry
+LLM_RATE_LIMIT_ENABLED = os.getenv("LLM_RATE_LIMIT_ENABLED", "true").lower() == "true"
+LLM_RATE_LIMITS = {
+    "default": {"rpm": int(os.getenv("LLM_DEFAULT_RPM", "60")),
+                "tpm": int(os.getenv("LLM_DEFAULT_TPM", "1000000"))},
+    # "gemini-3-pro": {"rpm": 30, "tpm": 500000},
 }
+LLM_RATE_BURST_SECONDS = float(os.getenv("LLM_RATE_BURST_SECONDS", "10"))  # bucket size = this many seconds of rate
+LLM_COMPLETION_TOKENS_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKENS_ESTIMATE", "1500"))  # output tokens assumed per call
 
 # Fallback chain — tried in order when primary model fails
 # Proxy handles account-level retry/rotation; this is model-level fallback
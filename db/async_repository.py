@@ -0,0 +1,139 @@
+"""
+Async repository facade — keeps SQLite off the asyncio event loop.
+
+Every db.repository function is exposed here as a coroutine with the same
+signature. Writes go through one dedicated writer thread (its request queue
+serializes them, so writers never fight over the WAL lock); reads run on a
+small reader pool and proceed concurrently with the writer thanks to WAL.
+Each thread reuses its own pooled connection (see db/connection.py).
+
+Usage:
+    from db import async_repository as adb
+
+    article = await adb.get_article_by_id(db_path, 42)
+    await adb.update_article_status(db_path, 42, "sent")
+
+    # Any other blocking DB-bound callable:
+    result = await adb.run_write(sync_raindrops_to_db, new_raindrops, db_path)
+
+    adb.shutdown()  # on exit, before close_all()
+"""
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import config
+from db import repository as _repo
+
+logger = logging.getLogger(__name__)
+
+# ── Executors (created lazily, recreated after shutdown()) ─────────
+_write_executor: Optional[ThreadPoolExecutor] = None
+_read_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def _executors() -> tuple[ThreadPoolExecutor, ThreadPoolExecutor]:
+    global _write_executor, _read_executor
+    with _lock:
+        if _write_executor is None:
+            # max_workers=1 → a single thread draining a FIFO request queue
+            _write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        if _read_executor is None:
+            _read_executor = ThreadPoolExecutor(
+                max_workers=max(1, config.DB_READER_THREADS),
+                thread_name_prefix="db-reader",
+            )
+        return _write_executor, _read_executor
+
+
+async def run_write(fn: Callable, *args, **kwargs):
+    """Run a blocking callable on the writer thread and await its result."""
+    writer, _ = _executors()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(writer, functools.partial(fn, *args, **kwargs))
+
+
+async def run_read(fn: Callable, *args, **kwargs):
+    """Run a blocking read-only callable on the reader pool and await its result."""
+    _, readers = _executors()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(readers, functools.partial(fn, *args, **kwargs))
+
+
+def shutdown(wait: bool = True) -> None:
+    """Stop the DB threads. Pending writes finish first when wait=True."""
+    global _write_executor, _read_executor
+    with _lock:
+        writer, readers = _write_executor, _read_executor
+        _write_executor = _read_executor = None
+    for executor in (writer, readers):
+        if executor is not None:
+            executor.shutdown(wait=wait)
+    if writer is not None:
+        logger.info("Async repository stopped")
+
+
+def _reader(fn: Callable) -> Callable:
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await run_read(fn, *args, **kwargs)
+    return wrapper
+
+
+def _writer(fn: Callable) -> Callable:
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await run_write(fn, *args, **kwargs)
+    return wrapper
+
+
+ARTICLE_SUMMARY_FIELDS = _repo.ARTICLE_SUMMARY_FIELDS
+
+# ── Articles ───────────────────────────────────────────────────────
+add_article = _writer(_repo.add_article)
+add_articles_bulk = _writer(_repo.add_articles_bulk)
+update_article_status = _writer(_repo.update_article_status)
+update_article_analysis = _writer(_repo.update_article_analysis)
+update_article_raw_content = _writer(_repo.update_article_raw_content)
+reset_article_statuses = _writer(_repo.reset_article_statuses)
+claim_next_article = _writer(_repo.claim_next_article)
+claim_article = _writer(_repo.claim_article)
+complete_claim = _writer(_repo.complete_claim)
+complete_batch_claim = _writer(_repo.complete_batch_claim)
+release_claim = _writer(_repo.release_claim)
+reap_expired_leases = _writer(_repo.reap_expired_leases)
+
+get_existing_raindrop_ids = _reader(_repo.get_existing_raindrop_ids)
+get_article_by_id = _reader(_repo.get_article_by_id)
+get_article_by_raindrop_id = _reader(_repo.get_article_by_raindrop_id)
+get_articles_by_status = _reader(_repo.get_articles_by_status)
+get_article_fields = _reader(_repo.get_article_fields)
+get_next_queued_article = _reader(_repo.get_next_queued_article)
+get_top_queued_article = _reader(_repo.get_top_queued_article)
+get_newest_queued_articles = _reader(_repo.get_newest_queued_articles)
+get_processed_articles_between = _reader(_repo.get_processed_articles_between)
+count_articles_by_status = _reader(_repo.count_articles_by_status)
+count_batch_analyzed = _reader(_repo.count_batch_analyzed)
+
+# ── Reflections / sessions / activity ──────────────────────────────
+add_reflection = _writer(_repo.add_reflection)
+add_session = _writer(_repo.add_session)
+
+get_reflections_by_article = _reader(_repo.get_reflections_by_article)
+get_recent_reflections = _reader(_repo.get_recent_reflections)
+get_sessions_by_date = _reader(_repo.get_sessions_by_date)
+get_activity_summary = _reader(_repo.get_activity_summary)
+get_daily_activity = _reader(_repo.get_daily_activity)
+get_reflection_days = _reader(_repo.get_reflection_days)
+
+# ── Digests / reports / search ─────────────────────────────────────
+add_batch_digest = _writer(_repo.add_batch_digest)
+add_weekly_report = _writer(_repo.add_weekly_report)
+
+get_latest_digest = _reader(_repo.get_latest_digest)
+get_latest_report = _reader(_repo.get_latest_report)
+search = _reader(_repo.search)
@@ -0,0 +1,189 @@
+"""
+Online backup + WAL/free-page maintenance for the live database.
+
+Backups use SQLite's online backup API in small steps (`pages` per step with
+a sleep in between) from inside one read transaction. Under WAL that read
+transaction pins a snapshot: writers keep committing to the WAL while the
+copy runs, and the backup never restarts (without it, every commit from
+another connection restarts the copy — a busy bot would never finish one).
+
+Usage:
+    from db.backup import backup_database, checkpoint, incremental_vacuum
+
+    result = backup_database(db_path)        # → data/backups/learning-YYYYmmdd-HHMMSS.db
+    checkpoint(db_path)                      # PASSIVE WAL checkpoint
+    incremental_vacuum(db_path)              # release free pages (auto_vacuum=INCREMENTAL)
+"""
+import logging
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import config
+from db.connection import get_connection, open_connection
+
+logger = logging.getLogger(__name__)
+
+# auto_vacuum pragma values
+_AUTO_VACUUM_INCREMENTAL = 2
+
+
+@dataclass
+class BackupResult:
+    """Outcome of one backup run."""
+
+    path: str = ""
+    size_bytes: int = 0
+    duration_s: float = 0.0
+    pages: int = 0
+    steps: int = 0
+    pruned: int = 0
+
+
+def backup_database(
+    db_path: str,
+    dest_dir: Optional[str] = None,
+    *,
+    pages: Optional[int] = None,
+    sleep_ms: Optional[int] = None,
+    keep: Optional[int] = None,
+) -> BackupResult:
+    """
+    Copy the live DB to dest_dir/<name>-<timestamp>.db without blocking writers.
+
+    The copy is written to a .tmp file, integrity-checked, then renamed, so a
+    crash never leaves a truncated file that looks like a valid backup.
+    Afterwards only the newest `keep` backups are kept.
+
+    Raises:
+        sqlite3.DatabaseError if the copy fails its integrity check.
+    """
+    pages = pages or config.BACKUP_PAGES_PER_STEP
+    sleep_s = (config.BACKUP_STEP_SLEEP_MS if sleep_ms is None else sleep_ms) / 1000
+    keep = config.BACKUP_KEEP if keep is None else keep
+    dest_dir = Path(dest_dir or config.BACKUP_DIR)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+
+    stem = Path(db_path).stem
+    final = dest_dir / f"{stem}-{datetime.now():%Y%m%d-%H%M%S}.db"
+    tmp = final.with_suffix(".db.tmp")
+
+    result = BackupResult(path=str(final))
+    steps = 0
+
+    def _progress(status, remaining, total):
+        nonlocal steps
+        steps += 1
+        result.pages = total
+        if remaining and sleep_s:
+            time.sleep(sleep_s)  # let writers in between steps
+
+    start = time.perf_counter()
+    source = open_connection(db_path)  # dedicated: the copy outlives any one query
+    dest = sqlite3.connect(str(tmp))
+    try:
+        source.execute("BEGIN")
+        source.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()  # pin the snapshot
+        source.backup(dest, pages=pages, progress=_progress)
+        source.rollback()
+        check = dest.execute("PRAGMA quick_check").fetchone()[0]
+        if check != "ok":
+            raise sqlite3.DatabaseError(f"Backup failed integrity check: {check}")
+    except Exception:
+        dest.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    finally:
+        source.close()
+    dest.close()
+    os.replace(tmp, final)
+
+    result.duration_s = time.perf_counter() - start
+    result.size_bytes = final.stat().st_size
+    result.steps = steps
+    result.pruned = _prune(dest_dir, stem, keep)
+    logger.info(
+        "Backup → %s (%.1f MB, %d pages in %d steps, %.2fs, pruned %d)",
+        final, result.size_bytes / 1024 / 1024, result.pages, steps,
+        result.duration_s, result.pruned,
+    )
+    return result
+
+
+def _prune(dest_dir: Path, stem: str, keep: int) -> int:
+    """Delete all but the newest `keep` backups of this DB. Returns count removed."""
+    if keep <= 0:
+        return 0
+    backups = sorted(dest_dir.glob(f"{stem}-*.db"))  # timestamped → name order is age order
+    stale = backups[:-keep]
+    for path in stale:
+        path.unlink(missing_ok=True)
+    return len(stale)
+
+
+def checkpoint(db_path: str, mode: str = "PASSIVE") -> dict:
+    """
+    Run a WAL checkpoint (PASSIVE never waits on readers/writers).
+
+    Returns:
+        {"busy": 0|1, "wal_pages": n, "checkpointed": n}
+    """
+    mode = mode.upper()
+    if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+        raise ValueError(f"Unknown checkpoint mode: {mode!r}")
+    conn = get_connection(db_path)
+    row = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+    busy, wal_pages, done = row["busy"], row["log"], row["checkpointed"]
+    logger.debug("WAL checkpoint %s: %d/%d pages (busy=%d)", mode, done, wal_pages, busy)
+    return {"busy": busy, "wal_pages": wal_pages, "checkpointed": done}
+
+
+def incremental_vacuum(db_path: str, max_pages: Optional[int] = None) -> int:
+    """
+    Release up to max_pages free pages back to the filesystem.
+
+    Only works once the DB uses auto_vacuum=INCREMENTAL (new DBs do; convert
+    an existing one with enable_incremental_vacuum()). Returns pages freed.
+    """
+    conn = get_connection(db_path)
+    if conn.execute("PRAGMA auto_vacuum").fetchone()["auto_vacuum"] != _AUTO_VACUUM_INCREMENTAL:
+        logger.debug("incremental_vacuum skipped: auto_vacuum is not INCREMENTAL")
+        return 0
+
+    def _free() -> int:
+        return conn.execute("PRAGMA freelist_count").fetchone()["freelist_count"]
+
+    before = _free()
+    if before:
+        arg = f"({int(max_pages)})" if max_pages else ""
+        # Each step of the pragma frees one page and execute() only steps once;
+        # executescript runs it to completion (and commits first)
+        conn.executescript(f"PRAGMA incremental_vacuum{arg};")
+    return before - _free()
+
+
+def enable_incremental_vacuum(db_path: str) -> bool:
+    """
+    Switch an existing DB to auto_vacuum=INCREMENTAL (needs one full VACUUM).
+
+    The VACUUM rewrites the whole file and blocks writers while it runs —
+    use from a maintenance script, not from the bot. Returns True if converted.
+    """
+    conn = get_connection(db_path)
+    if conn.execute("PRAGMA auto_vacuum").fetchone()["auto_vacuum"] == _AUTO_VACUUM_INCREMENTAL:
+        return False
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    logger.info("Converted %s to auto_vacuum=INCREMENTAL", db_path)
+    return True
+
+
+def db_size_bytes(db_path: str) -> int:
+    """Size of the DB file plus its WAL (what a copy would actually cost)."""
+    return sum(
+        os.path.getsize(p) for p in (db_path, db_path + "-wal") if os.path.exists(p)
+    )
@@ -0,0 +1,133 @@
+"""
+SQLite connection manager — long-lived per-thread connections with tuned pragmas.
+
+Each thread (event loop, executor workers, scheduler) keeps one connection per
+database file, opened on first use and reused afterwards. Per-connection pragmas
+are applied once when the connection is opened; WAL mode is persistent and set
+by init_db().
+
+Usage:
+    from db.connection import get_connection, close_all
+
+    with get_connection(db_path) as conn:   # commits on success, rolls back on error
+        conn.execute("UPDATE articles SET status = ? WHERE id = ?", ("sent", 1))
+
+    close_all()  # on shutdown, or before deleting/replacing the DB file
+"""
+import logging
+import sqlite3
+import threading
+
+import config
+from db.content_store import register_functions, reset_cache
+
+logger = logging.getLogger(__name__)
+
+# ── Per-thread pool ────────────────────────────────────────────────
+_local = threading.local()
+_registry: list[sqlite3.Connection] = []  # every pooled connection, for close_all()
+_registry_lock = threading.Lock()
+_generation = 0  # bumped by close_all() so threads drop their stale handles
+
+
+# Last statement's column names, keyed by the identity of cursor.description
+# (sqlite3 builds that tuple once per statement, so every row of a result
+# set hits this one-slot cache instead of re-reading the column names).
+_columns_cache: tuple = (None, ())
+
+
+def dict_factory(cursor, row):
+    """Convert sqlite3 rows to dicts."""
+    global _columns_cache
+    description = cursor.description
+    cached_description, names = _columns_cache
+    if cached_description is not description:
+        names = tuple(col[0] for col in description)
+        _columns_cache = (description, names)
+    return dict(zip(names, row))
+
+
+def _apply_pragmas(conn: sqlite3.Connection) -> None:
+    """Apply per-connection tuning pragmas (not persisted in the DB file)."""
+    conn.execute(f"PRAGMA busy_timeout = {int(config.DB_BUSY_TIMEOUT_MS)}")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    # Negative cache_size = KiB instead of pages
+    conn.execute(f"PRAGMA cache_size = -{int(config.DB_CACHE_SIZE_KB)}")
+    conn.execute(f"PRAGMA mmap_size = {int(config.DB_MMAP_SIZE)}")
+
+
+def open_connection(db_path: str) -> sqlite3.Connection:
+    """
+    Open a new tuned connection with dict row factory.
+
+    The caller owns the connection and must close it. Prefer get_connection()
+    unless a dedicated connection is really needed (e.g. backups).
+    """
+    conn = sqlite3.connect(
+        str(db_path),
+        timeout=config.DB_BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,  # only closed cross-thread, by close_all()
+    )
+    conn.row_factory = dict_factory
+    _apply_pragmas(conn)
+    register_functions(conn)
+    return conn
+
+
+def get_connection(db_path: str) -> sqlite3.Connection:
+    """
+    Get the calling thread's pooled connection for db_path.
+
+    Use it as a context manager (`with get_connection(p) as conn:`) for
+    commit/rollback — the connection itself stays open for reuse.
+    With DB_POOLING disabled, returns a fresh connection on every call.
+    """
+    if not config.DB_POOLING:
+        return open_connection(db_path)
+
+    if getattr(_local, "generation", None) != _generation:
+        _local.conns = {}
+        _local.generation = _generation
+
+    key = str(db_path)
+    conn = _local.conns.get(key)
+    if conn is None:
+        conn = open_connection(key)
+        _local.conns[key] = conn
+        with _registry_lock:
+            _registry.append(conn)
+        logger.debug(
+            "Opened pooled SQLite connection: %s (thread=%s)",
+            key, threading.current_thread().name,
+        )
+    return conn
+
+
+def close_all() -> int:
+    """
+    Close every pooled connection across all threads.
+
+    Call on shutdown, or before deleting/replacing the DB file. Threads
+    transparently reopen on their next get_connection().
+
+    Returns:
+        Number of connections closed.
+    """
+    global _generation
+    with _registry_lock:
+        conns = list(_registry)
+        _registry.clear()
+        _generation += 1
+
+    for conn in conns:
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning("Error closing SQLite connection: %s", e)
+
+    # Cached content dictionaries belong to the file that may be replaced next
+    reset_cache()
+
+    if conns:
+        logger.info("Closed %d pooled SQLite connection(s)", len(conns))
+    return len(conns)
@@ -0,0 +1,279 @@
+"""
+Compressed content store — heavy article text kept out of the articles table.
+
+Large text fields (raw_content + LLM outputs) live in `article_content`, one
+zlib-compressed blob per (article_id, field). Keeping them out of `articles`
+keeps queue/status scans on small pages; text is only decompressed when a
+caller actually asks for that field.
+
+Codecs:
+    raw          UTF-8 bytes (tiny values where compression doesn't pay)
+    zlib         plain zlib
+    zlib:<id>    zlib with preset dictionary <id> from content_dictionaries
+
+All functions take an open connection so they can join the caller's
+transaction. They work with both tuple and dict row factories.
+"""
+import logging
+import sqlite3
+import zlib
+from collections import Counter
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Fields stored here instead of inline on articles
+CONTENT_FIELDS = (
+    "raw_content", "summary",
+    "researcher_output", "architect_output", "skeptic_output", "synthesizer_output",
+)
+
+COMPRESSION_LEVEL = 6
+MIN_COMPRESS_BYTES = 64     # below this, zlib overhead outweighs the gain
+MAX_DICT_BYTES = 32 * 1024  # zlib window size — larger dictionaries are ignored
+_IN_CHUNK_SIZE = 500
+
+# Dictionaries are immutable once stored → safe to cache by (db file, id)
+_dict_cache: dict[tuple[str, int], bytes] = {}
+_active_dict: dict[str, Optional[int]] = {}  # db file → newest dictionary id
+
+
+def _cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+    """Cursor returning plain tuples regardless of the connection's row factory."""
+    cur = conn.cursor()
+    cur.row_factory = None
+    return cur
+
+
+def _db_key(conn: sqlite3.Connection) -> str:
+    """Identify the main database file of a connection (for dictionary caching)."""
+    row = _cursor(conn).execute("PRAGMA database_list").fetchone()
+    return row[2] if row else ""
+
+
+def _get_dictionary(conn: sqlite3.Connection, dict_id: int) -> bytes:
+    """Load a preset dictionary by id (cached)."""
+    key = (_db_key(conn), dict_id)
+    data = _dict_cache.get(key)
+    if data is None:
+        row = _cursor(conn).execute(
+            "SELECT data FROM content_dictionaries WHERE id = ?", (dict_id,)
+        ).fetchone()
+        if row is None:
+            raise LookupError(f"Content dictionary {dict_id} not found")
+        data = _dict_cache[key] = bytes(row[0])
+    return data
+
+
+def _active_dictionary_id(conn: sqlite3.Connection) -> Optional[int]:
+    """Newest dictionary id for this DB, or None (cached per process)."""
+    key = _db_key(conn)
+    if key not in _active_dict:
+        row = _cursor(conn).execute(
+            "SELECT MAX(id) FROM content_dictionaries"
+        ).fetchone()
+        _active_dict[key] = row[0] if row else None
+    return _active_dict[key]
+
+
+def compress(conn: sqlite3.Connection, text: str) -> tuple[str, bytes]:
+    """Encode text for storage. Returns (codec, blob)."""
+    raw = text.encode("utf-8")
+    if len(raw) < MIN_COMPRESS_BYTES:
+        return "raw", raw
+
+    dict_id = _active_dictionary_id(conn)
+    if dict_id is not None:
+        comp = zlib.compressobj(COMPRESSION_LEVEL, zdict=_get_dictionary(conn, dict_id))
+        codec = f"zlib:{dict_id}"
+    else:
+        comp = zlib.compressobj(COMPRESSION_LEVEL)
+        codec = "zlib"
+    blob = comp.compress(raw) + comp.flush()
+
+    if len(blob) >= len(raw):
+        return "raw", raw
+    return codec, blob
+
+
+def decompress(conn: sqlite3.Connection, codec: str, blob: bytes) -> str:
+    """Decode a stored blob back to text."""
+    if codec == "raw":
+        return bytes(blob).decode("utf-8")
+    if codec == "zlib":
+        return zlib.decompress(blob).decode("utf-8")
+    if codec.startswith("zlib:"):
+        zdict = _get_dictionary(conn, int(codec[5:]))
+        decomp = zlib.decompressobj(zdict=zdict)
+        return (decomp.decompress(blob) + decomp.flush()).decode("utf-8")
+    raise ValueError(f"Unknown content codec: {codec!r}")
+
+
+def register_functions(conn: sqlite3.Connection) -> None:
+    """
+    Register content_text(codec, data) as an SQL function on this connection.
+
+    Lets triggers (e.g. the full-text index) read decompressed text.
+    """
+    conn.create_function(
+        "content_text", 2,
+        lambda codec, data: None if data is None else decompress(conn, codec, data),
+        deterministic=True,
+    )
+
+
+def put_content(conn: sqlite3.Connection, article_id: int, fields: dict) -> None:
+    """
+    Store (or replace) content fields for one article.
+
+    None values are skipped; empty strings are stored. Does not commit.
+    """
+    put_content_many(conn, [(article_id, fields)])
+
+
+def put_content_many(
+    conn: sqlite3.Connection, items: Iterable[tuple[int, dict]]
+) -> int:
+    """Store content for many articles with one executemany. Returns rows written."""
+    rows = []
+    for article_id, fields in items:
+        for field, text in fields.items():
+            if field not in CONTENT_FIELDS:
+                raise ValueError(f"Not a content field: {field!r}")
+            if text is None:
+                continue
+            codec, blob = compress(conn, text)
+            rows.append((article_id, field, codec, blob, len(text)))
+    if rows:
+        # Upsert (not REPLACE) so UPDATE triggers see the old row
+        _cursor(conn).executemany(
+            """INSERT INTO article_content
+               (article_id, field, codec, data, text_length)
+               VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT(article_id, field) DO UPDATE SET
+                   codec = excluded.codec,
+                   data = excluded.data,
+                   text_length = excluded.text_length""",
+            rows,
+        )
+    return len(rows)
+
+
+def load_content(
+    conn: sqlite3.Connection,
+    article_ids: list[int],
+    fields: Iterable[str] = CONTENT_FIELDS,
+) -> dict[int, dict[str, str]]:
+    """
+    Load and decompress content fields for many articles.
+
+    Returns:
+        {article_id: {field: text}} — missing fields are simply absent.
+    """
+    fields = [f for f in fields if f in CONTENT_FIELDS]
+    ids = list(dict.fromkeys(article_ids))
+    result: dict[int, dict[str, str]] = {}
+    if not fields or not ids:
+        return result
+
+    field_marks = ", ".join("?" * len(fields))
+    cur = _cursor(conn)
+    for start in range(0, len(ids), _IN_CHUNK_SIZE):
+        chunk = ids[start:start + _IN_CHUNK_SIZE]
+        id_marks = ", ".join("?" * len(chunk))
+        rows = cur.execute(
+            f"""SELECT article_id, field, codec, data FROM article_content
+                WHERE article_id IN ({id_marks}) AND field IN ({field_marks})""",
+            (*chunk, *fields),
+        ).fetchall()
+        for article_id, field, codec, data in rows:
+            result.setdefault(article_id, {})[field] = decompress(conn, codec, data)
+    return result
+
+
+def delete_content(
+    conn: sqlite3.Connection, article_id: int, fields: Iterable[str] = CONTENT_FIELDS
+) -> None:
+    """Remove stored content fields for one article. Does not commit."""
+    fields = list(fields)
+    marks = ", ".join("?" * len(fields))
+    _cursor(conn).execute(
+        f"DELETE FROM article_content WHERE article_id = ? AND field IN ({marks})",
+        (article_id, *fields),
+    )
+
+
+# ── Dictionary training ───────────────────────────────────────────
+
+def build_dictionary(samples: list[str], size: int = MAX_DICT_BYTES) -> bytes:
+    """
+    Build a zlib preset dictionary from sample texts.
+
+    Picks lines and word trigrams that recur across samples (persona
+    headings, markdown scaffolding, common phrases), scored by
+    document frequency × length. The most valuable strings go last,
+    where zlib back-references are cheapest.
+    """
+    doc_freq: Counter = Counter()
+    for text in samples:
+        seen = set()
+        for line in text.splitlines():
+            line = line.strip()
+            if 8 <= len(line) <= 200:
+                seen.add(line)
+        words = text.split()
+        for i in range(len(words) - 2):
+            seen.add(" ".join(words[i:i + 3]))
+        doc_freq.update(seen)
+
+    candidates = [(df * len(s), s) for s, df in doc_freq.items() if df >= 2]
+    candidates.sort(reverse=True)
+
+    picked, total = [], 0
+    for _, s in candidates:
+        encoded = (s + "\n").encode("utf-8")
+        if total + len(encoded) > size:
+            continue
+        picked.append(encoded)
+        total += len(encoded)
+    return b"".join(reversed(picked))
+
+
+def train_dictionary(
+    conn: sqlite3.Connection, sample_limit: int = 500, size: int = MAX_DICT_BYTES
+) -> Optional[int]:
+    """
+    Train a dictionary from stored content and make it active for new writes.
+
+    Existing blobs keep their codec (and remain readable); only newly written
+    content uses the new dictionary. Does not commit.
+
+    Returns:
+        New dictionary id, or None if there isn't enough content to train on.
+    """
+    rows = _cursor(conn).execute(
+        """SELECT codec, data FROM article_content
+           ORDER BY article_id DESC LIMIT ?""",
+        (sample_limit,),
+    ).fetchall()
+    samples = [decompress(conn, codec, data) for codec, data in rows]
+    zdict = build_dictionary(samples, size)
+    if len(zdict) < 256:
+        logger.info("Not enough shared content to train a dictionary (%d bytes)", len(zdict))
+        return None
+
+    cur = _cursor(conn)
+    cur.execute("INSERT INTO content_dictionaries (data) VALUES (?)", (zdict,))
+    dict_id = cur.lastrowid
+    key = _db_key(conn)
+    _dict_cache[(key, dict_id)] = zdict
+    _active_dict[key] = dict_id
+    logger.info("Trained content dictionary #%d (%d bytes, %d samples)",
+                dict_id, len(zdict), len(samples))
+    return dict_id
+
+
+def reset_cache() -> None:
+    """Forget cached dictionaries (e.g. after replacing the DB file)."""
+    _dict_cache.clear()
+    _active_dict.clear()
@@ -0,0 +1,228 @@
+"""
+LLM response cache — content-addressed, stored in the main SQLite DB.
+
+The key is sha256 over the model, the normalized messages and any request
+params, so re-analyzing the same text with the same prompt and model returns
+the stored answer instead of paying for another call. Images are keyed by a
+digest of their data, not by the (huge) base64 payload.
+
+Entries expire after LLM_CACHE_TTL_HOURS and the table is kept under
+LLM_CACHE_MAX_MB by evicting least-recently-used rows on insert (only when
+the bound is exceeded). Texts are compressed with the content store codecs.
+
+get() is a pure read, safe on the reader pool: hits are buffered in memory
+and written (hit counts + LRU order) by flush_hits(), which put() runs
+first — both belong on the writer thread.
+
+Usage:
+    from db import llm_cache
+
+    key = llm_cache.make_key(model, messages)
+    text = llm_cache.get(db_path, key)         # None on miss/expired
+    llm_cache.put(db_path, key, model, text)  # writer: flushes buffered hits too
+    llm_cache.flush_hits(db_path)              # writer: hits without a put since
+    llm_cache.stats(db_path)                   # hits, misses, entries, bytes...
+"""
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+import config
+from db.connection import get_connection
+from db.content_store import compress, decompress
+
+logger = logging.getLogger(__name__)
+
+_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+_NEXT_SEQ = "(SELECT coalesce(MAX(use_seq), 0) + 1 FROM llm_cache)"
+
+_stats_lock = threading.Lock()
+_counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+_touched: "OrderedDict[str, tuple[int, str]]" = OrderedDict()  # key → (hits, last_used), LRU last
+
+
+# ── Keys ───────────────────────────────────────────────────────────
+
+def _normalize_text(text: str) -> str:
+    """Line endings and surrounding whitespace don't change the answer."""
+    return text.replace("\r\n", "\n").strip()
+
+
+def _normalize_part(part: dict) -> dict:
+    """One multimodal content part; data-URL images become a digest."""
+    if part.get("type") == "text":
+        return {"type": "text", "text": _normalize_text(part.get("text", ""))}
+    if part.get("type") == "image_url":
+        url = part.get("image_url", {}).get("url", "")
+        if url.startswith("data:"):
+            url = "sha256:" + hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return {"type": "image_url", "image_url": url}
+    return part
+
+
+def _normalize_message(message: dict) -> dict:
+    normalized = dict(message)
+    content = message.get("content")
+    if isinstance(content, str):
+        normalized["content"] = _normalize_text(content)
+    elif isinstance(content, list):
+        normalized["content"] = [_normalize_part(p) for p in content]
+    return normalized
+
+
+def make_key(model: str, messages: list[dict], params: Optional[dict] = None) -> str:
+    """Content address of one chat request (hex sha256)."""
+    payload = {
+        "model": model,
+        "messages": [_normalize_message(m) for m in messages],
+        "params": params or {},
+    }
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+# ── Storage ────────────────────────────────────────────────────────
+
+def _count(name: str, n: int = 1) -> None:
+    with _stats_lock:
+        _counters[name] += n
+
+
+def get(db_path: str, key: str, ttl_hours: Optional[float] = None) -> Optional[str]:
+    """Cached response text for key, or None if missing/expired. Counts hit/miss."""
+    ttl = config.LLM_CACHE_TTL_HOURS if ttl_hours is None else ttl_hours
+    conn = get_connection(db_path)
+    row = conn.execute(
+        "SELECT codec, data FROM llm_cache "
+        "WHERE key = ? AND created_at > strftime('%Y-%m-%d %H:%M:%f', 'now', ?)",
+        (key, f"-{ttl} hours"),
+    ).fetchone()
+    if row is None:
+        _count("misses")
+        return None
+
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    with _stats_lock:
+        hits = _touched.pop(key, (0, now))[0]
+        _touched[key] = (hits + 1, now)
+        _counters["hits"] += 1
+    return decompress(conn, row["codec"], row["data"])
+
+
+def pending_hits() -> int:
+    """Keys hit since the last flush_hits()."""
+    with _stats_lock:
+        return len(_touched)
+
+
+def flush_hits(db_path: str) -> int:
+    """
+    Write buffered hits: hit counts, last_used, and a fresh LRU tick per key
+    in the order they were last used. Returns keys updated.
+    """
+    with _stats_lock:
+        touched = list(_touched.items())
+        _touched.clear()
+    if not touched:
+        return 0
+    conn = get_connection(db_path)
+    with conn:
+        conn.executemany(
+            f"UPDATE llm_cache SET hits = hits + ?, use_seq = {_NEXT_SEQ}, last_used = ? "
+            "WHERE key = ?",
+            [(hits, last_used, key) for key, (hits, last_used) in touched],
+        )
+    return len(touched)
+
+
+def put(
+    db_path: str,
+    key: str,
+    model: str,
+    text: str,
+    max_bytes: Optional[int] = None,
+    ttl_hours: Optional[float] = None,
+) -> int:
+    """
+    Store a response (after flushing buffered hits, so the LRU order is
+    current), then drop expired rows and, only if the table is over the
+    size bound, evict the least recently used rows.
+
+    Returns:
+        Number of rows evicted.
+    """
+    max_bytes = int(config.LLM_CACHE_MAX_MB * 1024 * 1024) if max_bytes is None else max_bytes
+    ttl = config.LLM_CACHE_TTL_HOURS if ttl_hours is None else ttl_hours
+    conn = get_connection(db_path)
+    codec, data = compress(conn, text)
+    flush_hits(db_path)
+    with conn:
+        conn.execute(
+            f"""INSERT INTO llm_cache
+                    (key, model, codec, data, size_bytes, use_seq, created_at, last_used)
+                VALUES (?, ?, ?, ?, ?, {_NEXT_SEQ}, {_NOW}, {_NOW})
+                ON CONFLICT(key) DO UPDATE SET
+                    model = excluded.model, codec = excluded.codec, data = excluded.data,
+                    size_bytes = excluded.size_bytes, hits = 0, use_seq = excluded.use_seq,
+                    created_at = excluded.created_at, last_used = excluded.last_used""",
+            (key, model, codec, data, len(data)),
+        )
+        evicted = conn.execute(
+            "DELETE FROM llm_cache WHERE created_at < strftime('%Y-%m-%d %H:%M:%f', 'now', ?)",
+            (f"-{ttl} hours",),
+        ).rowcount
+        total = conn.execute(
+            "SELECT coalesce(SUM(size_bytes), 0) AS bytes FROM llm_cache"
+        ).fetchone()["bytes"]
+        # Over budget: keep the most recently used rows whose running size fits
+        if total > max_bytes:
+            evicted += conn.execute(
+                """DELETE FROM llm_cache WHERE key IN (
+                       SELECT key FROM (
+                           SELECT key, SUM(size_bytes) OVER (
+                               ORDER BY use_seq DESC
+                           ) AS running
+                           FROM llm_cache
+                       ) WHERE running > ?
+                   )""",
+                (max_bytes,),
+            ).rowcount
+    _count("stores")
+    if evicted:
+        _count("evictions", evicted)
+        logger.debug("LLM cache evicted %d entries", evicted)
+    return evicted
+
+
+def clear(db_path: str) -> int:
+    """Delete every cached response. Returns rows removed."""
+    with _stats_lock:
+        _touched.clear()
+    conn = get_connection(db_path)
+    with conn:
+        return conn.execute("DELETE FROM llm_cache").rowcount
+
+
+def stats(db_path: Optional[str] = None) -> dict:
+    """Process counters (+ hit_rate), and table entries/bytes when db_path is given."""
+    with _stats_lock:
+        result = dict(_counters)
+    lookups = result["hits"] + result["misses"]
+    result["hit_rate"] = result["hits"] / lookups if lookups else 0.0
+    if db_path:
+        row = get_connection(db_path).execute(
+            "SELECT COUNT(*) AS entries, coalesce(SUM(size_bytes), 0) AS bytes FROM llm_cache"
+        ).fetchone()
+        result.update(row)
+    return result
+
+
+def reset_stats() -> None:
+    """Zero the process counters (tests/benchmarks)."""
+    with _stats_lock:
+        for name in _counters:
+            _counters[name] = 0
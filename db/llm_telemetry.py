@@ -0,0 +1,222 @@
+"""
+LLM call telemetry — one llm_calls row per call, plus the rollups /metrics shows.
+
+Each call (cache hits and failures included) records its model, task,
+prompt/completion tokens (and how many prompt tokens the provider's prefix
+cache served), latency, time to first token, retries, position
+in the fallback chain and whether the cache answered. Rows are buffered in
+memory and written in one executemany batch once LLM_TELEMETRY_FLUSH_ROWS
+rows or LLM_TELEMETRY_FLUSH_SECONDS have accumulated, so recording costs a
+list append on the call path, not a DB write.
+
+Usage:
+    from db import llm_telemetry
+
+    due = llm_telemetry.record(model="gemini-3-pro", task_type="stage_1_analysis",
+                               latency_ms=12400, prompt_tokens=9000, completion_tokens=1500)
+    if due:
+        llm_telemetry.flush(db_path)             # batch insert (writer thread in async code)
+
+    llm_telemetry.latency_rollup(db_path, days=7)  # p50/p95 per model + task
+    llm_telemetry.daily_tokens(db_path, days=7)    # tokens/calls per day + task
+    llm_telemetry.prune(db_path)                   # drop rows past retention
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+import config
+from db.connection import get_connection
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = (
+    "ts", "model", "task_type", "prompt_tokens", "completion_tokens", "cached_tokens",
+    "usage_estimated", "latency_ms", "ttft_ms", "retries", "fallback_position", "cache_hit",
+    "stream", "ok", "error",
+)
+_INSERT = (
+    f"INSERT INTO llm_calls ({', '.join(COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in COLUMNS)})"
+)
+
+_lock = threading.Lock()
+_buffer: list[tuple] = []
+_oldest = 0.0  # monotonic time of the first buffered row
+
+
+# ── Recording ──────────────────────────────────────────────────────
+
+def record(
+    model: str,
+    task_type: Optional[str] = None,
+    prompt_tokens: Optional[int] = None,
+    completion_tokens: Optional[int] = None,
+    cached_tokens: Optional[int] = None,
+    usage_estimated: bool = False,
+    latency_ms: Optional[int] = None,
+    ttft_ms: Optional[int] = None,
+    retries: int = 0,
+    fallback_position: Optional[int] = None,
+    cache_hit: bool = False,
+    stream: bool = False,
+    ok: bool = True,
+    error: Optional[str] = None,
+) -> bool:
+    """
+    Buffer one call. Returns True when the buffer is due for flush().
+    No-op (False) with LLM_TELEMETRY_ENABLED=false.
+    """
+    global _oldest
+    if not config.LLM_TELEMETRY_ENABLED:
+        return False
+    row = (
+        datetime.now().isoformat(timespec="seconds"), model, task_type,
+        prompt_tokens, completion_tokens, cached_tokens, int(usage_estimated),
+        latency_ms, ttft_ms, retries, fallback_position,
+        int(cache_hit), int(stream), int(ok), error,
+    )
+    now = time.monotonic()
+    with _lock:
+        if not _buffer:
+            _oldest = now
+        _buffer.append(row)
+        return (
+            len(_buffer) >= config.LLM_TELEMETRY_FLUSH_ROWS
+            or now - _oldest >= config.LLM_TELEMETRY_FLUSH_SECONDS
+        )
+
+
+def pending() -> int:
+    """Rows recorded but not yet written."""
+    with _lock:
+        return len(_buffer)
+
+
+def flush(db_path: str) -> int:
+    """Write buffered rows in one transaction. Returns rows written."""
+    with _lock:
+        rows = _buffer[:]
+        _buffer.clear()
+    if not rows:
+        return 0
+    conn = get_connection(db_path)
+    try:
+        with conn:
+            conn.executemany(_INSERT, rows)
+    except Exception:
+        # Keep them for the next flush rather than losing the batch
+        with _lock:
+            _buffer[:0] = rows
+        raise
+    logger.debug("LLM telemetry: %d rows written", len(rows))
+    return len(rows)
+
+
+def prune(db_path: str, days: Optional[int] = None) -> int:
+    """Delete rows older than LLM_TELEMETRY_RETENTION_DAYS. Returns rows removed."""
+    days = config.LLM_TELEMETRY_RETENTION_DAYS if days is None else days
+    cutoff = (datetime.now() - timedelta(days=days)).isoformat(timespec="seconds")
+    conn = get_connection(db_path)
+    with conn:
+        return conn.execute("DELETE FROM llm_calls WHERE ts < ?", (cutoff,)).rowcount
+
+
+# ── Rollups ────────────────────────────────────────────────────────
+
+def _since(days: int) -> str:
+    return (datetime.now() - timedelta(days=days)).isoformat(timespec="seconds")
+
+
+def latency_rollup(db_path: str, days: int = 7) -> list[dict]:
+    """
+    Per (model, task_type) over the last `days`: calls, failures, cache hits,
+    retries, fallback calls, prompt/cached tokens with cached_ratio (share of
+    prompt tokens the provider's prefix cache served, None if it never said)
+    and p50/p95 of latency and TTFT (network calls only — cache hits and
+    failures don't count toward the percentiles).
+    Slowest p95 first. Buffered rows aren't included — flush() first.
+    """
+    conn = get_connection(db_path)
+    rows = conn.execute(
+        """
+        WITH recent AS (
+            SELECT * FROM llm_calls WHERE ts >= ?
+        ),
+        lat AS (
+            SELECT model, task_type, latency_ms,
+                   ROW_NUMBER() OVER w AS rn, COUNT(*) OVER p AS n
+            FROM recent
+            WHERE ok = 1 AND cache_hit = 0 AND latency_ms IS NOT NULL
+            WINDOW p AS (PARTITION BY model, task_type),
+                   w AS (PARTITION BY model, task_type ORDER BY latency_ms)
+        ),
+        ttft AS (
+            SELECT model, task_type, ttft_ms,
+                   ROW_NUMBER() OVER w AS rn, COUNT(*) OVER p AS n
+            FROM recent
+            WHERE ok = 1 AND cache_hit = 0 AND ttft_ms IS NOT NULL
+            WINDOW p AS (PARTITION BY model, task_type),
+                   w AS (PARTITION BY model, task_type ORDER BY ttft_ms)
+        ),
+        -- Same rank rule as model_health._percentile: the sample at index int(q * n)
+        lat_pct AS (
+            SELECT model, task_type,
+                   MIN(CASE WHEN rn > 0.50 * n THEN latency_ms END) AS p50_ms,
+                   MIN(CASE WHEN rn > 0.95 * n THEN latency_ms END) AS p95_ms
+            FROM lat GROUP BY model, task_type
+        ),
+        ttft_pct AS (
+            SELECT model, task_type,
+                   MIN(CASE WHEN rn > 0.50 * n THEN ttft_ms END) AS ttft_p50_ms,
+                   MIN(CASE WHEN rn > 0.95 * n THEN ttft_ms END) AS ttft_p95_ms
+            FROM ttft GROUP BY model, task_type
+        )
+        SELECT r.model, r.task_type,
+               COUNT(*) AS calls,
+               SUM(1 - r.ok) AS failures,
+               SUM(r.cache_hit) AS cache_hits,
+               SUM(r.retries) AS retries,
+               SUM(r.fallback_position > 0) AS fallback_calls,
+               coalesce(SUM(CASE WHEN r.cache_hit = 0 THEN r.prompt_tokens END), 0) AS prompt_tokens,
+               SUM(r.cached_tokens) AS cached_tokens,
+               SUM(r.cached_tokens) * 1.0
+                   / SUM(CASE WHEN r.cached_tokens IS NOT NULL THEN r.prompt_tokens END) AS cached_ratio,
+               l.p50_ms, l.p95_ms, t.ttft_p50_ms, t.ttft_p95_ms
+        FROM recent r
+        LEFT JOIN lat_pct l ON l.model = r.model AND l.task_type IS r.task_type
+        LEFT JOIN ttft_pct t ON t.model = r.model AND t.task_type IS r.task_type
+        GROUP BY r.model, r.task_type
+        ORDER BY coalesce(l.p95_ms, 0) DESC, r.model
+        """,
+        (_since(days),),
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def daily_tokens(db_path: str, days: int = 7) -> list[dict]:
+    """
+    Per (day, task_type) over the last `days`: calls, cache hits, prompt,
+    prefix-cached and completion tokens of network calls, and total latency
+    seconds. Newest day first.
+    """
+    conn = get_connection(db_path)
+    rows = conn.execute(
+        """
+        SELECT date(ts) AS day, task_type,
+               COUNT(*) AS calls,
+               SUM(cache_hit) AS cache_hits,
+               coalesce(SUM(CASE WHEN cache_hit = 0 THEN prompt_tokens END), 0) AS prompt_tokens,
+               coalesce(SUM(CASE WHEN cache_hit = 0 THEN completion_tokens END), 0) AS completion_tokens,
+               coalesce(SUM(cached_tokens), 0) AS cached_tokens,
+               coalesce(SUM(latency_ms), 0) / 1000.0 AS latency_s
+        FROM llm_calls
+        WHERE ts >= ?
+        GROUP BY day, task_type
+        ORDER BY day DESC, prompt_tokens + completion_tokens DESC
+        """,
+        (_since(days),),
+    ).fetchall()
+    return [dict(row) for row in rows]
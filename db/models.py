@@ -1,16 +1,24 @@
 """
-SQLite schema initialization — creates all tables on first run.
+SQLite schema initialization — creates all tables on first run,
+then applies numbered migrations tracked in PRAGMA user_version.
 """
+import logging
 import sqlite3
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 
 def init_db(db_path: str) -> None:
     """
     Initialize the SQLite database.
 
-    Creates the database file and all tables if they don't exist.
-    Safe to call multiple times — uses CREATE TABLE IF NOT EXISTS.
+    Creates the database file and all tables if they don't exist,
+    switches the journal to WAL (persistent, so readers never block the writer),
+    enables incremental auto_vacuum on new files
+    and applies any pending migrations from _MIGRATIONS.
+    Safe to call multiple times — uses CREATE TABLE IF NOT EXISTS and
+    only runs migrations newer than PRAGMA user_version.
 
     Args:
         db_path: Path to the SQLite database file.
@@ -18,8 +26,60 @@ def init_db(db_path: str) -> None:
     # Auto-create parent directory
     Path(db_path).parent.mkdir(parents=True, exist_ok=True)
 
-    with sqlite3.connect(db_path) as conn:
-        conn.executescript(_SCHEMA_SQL)
+    from db.content_store import register_functions
+
+    conn = sqlite3.connect(db_path)
+    try:
+        register_functions(conn)  # migrations/triggers read compressed text
+        # Only takes effect on a fresh file (before the first table exists);
+        # lets the scheduler hand free pages back with incremental_vacuum.
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("PRAGMA journal_mode = WAL")
+        with conn:
+            conn.executescript(_SCHEMA_SQL)
+        _apply_migrations(conn)
+    finally:
+        conn.close()
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Return the migration version recorded in PRAGMA user_version."""
+    row = conn.execute("PRAGMA user_version").fetchone()
+    return row["user_version"] if isinstance(row, dict) else row[0]
+
+
+def _apply_migrations(conn: sqlite3.Connection) -> int:
+    """
+    Apply pending migrations in order, each in its own transaction.
+
+    A migration step is either an SQL script or a callable(conn) for
+    data migrations that need Python (e.g. compression).
+
+    Returns:
+        The schema version after migrating.
+    """
+    current = get_schema_version(conn)
+    for version, description, step in _MIGRATIONS:
+        if version <= current:
+            continue
+        logger.info("Applying DB migration %03d: %s", version, description)
+        try:
+            if callable(step):
+                conn.execute("BEGIN")
+                step(conn)
+                conn.execute(f"PRAGMA user_version = {version}")
+                conn.commit()
+            else:
+                conn.executescript(
+                    f"BEGIN;\n{step}\nPRAGMA user_version = {version};\nCOMMIT;"
+                )
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            logger.error("DB migration %03d failed — rolled back", version)
+            raise
+        current = version
+    return current
 
 
 _SCHEMA_SQL = """
@@ -85,3 +145,420 @@ CREATE TABLE IF NOT EXISTS weekly_reports (
     created_at      TEXT DEFAULT CURRENT_TIMESTAMP
 );
 """
+
+
+# ── Migration steps ───────────────────────────────────────────────
+
+def _migrate_content_store(conn: sqlite3.Connection) -> None:
+    """003: move heavy article text into the compressed article_content table."""
+    from db.content_store import CONTENT_FIELDS, put_content_many
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS article_content (
+            article_id  INTEGER NOT NULL REFERENCES articles(id),
+            field       TEXT NOT NULL,
+            codec       TEXT NOT NULL,
+            data        BLOB NOT NULL,
+            text_length INTEGER,
+            PRIMARY KEY (article_id, field)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS content_dictionaries (
+            id          INTEGER PRIMARY KEY,
+            data        BLOB NOT NULL,
+            created_at  TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_articles_delete_content
+        AFTER DELETE ON articles BEGIN
+            DELETE FROM article_content WHERE article_id = old.id;
+        END
+    """)
+
+    cols = ", ".join(CONTENT_FIELDS)
+    has_content = " OR ".join(f"{f} IS NOT NULL" for f in CONTENT_FIELDS)
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    cursor.execute(f"SELECT id, {cols} FROM articles WHERE {has_content}")
+    moved = 0
+    while True:
+        batch = cursor.fetchmany(200)
+        if not batch:
+            break
+        moved += put_content_many(
+            conn, [(row[0], dict(zip(CONTENT_FIELDS, row[1:]))) for row in batch]
+        )
+
+    cleared = ", ".join(f"{f} = NULL" for f in CONTENT_FIELDS)
+    conn.execute(f"UPDATE articles SET {cleared} WHERE {has_content}")
+    logger.info("Moved %d content field(s) into article_content", moved)
+
+
+# Full-text index rowids: articles use id * 8 + field code, reflections use -id,
+# so every trigger can address its row directly. Triggers delete before insert
+# rather than INSERT OR REPLACE: an outer UPSERT overrides the trigger's conflict policy.
+_SEARCH_FIELD_CODES = {
+    "title": 0, "raw_content": 1, "summary": 2, "researcher_output": 3,
+    "architect_output": 4, "skeptic_output": 5, "synthesizer_output": 6,
+}
+_FIELD_CODE_SQL = "CASE {f} " + " ".join(
+    f"WHEN '{name}' THEN {code}" for name, code in _SEARCH_FIELD_CODES.items()
+) + " END"
+
+_SEARCH_INDEX_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+    title, body,
+    kind UNINDEXED, ref_id UNINDEXED, field UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+-- articles.title
+CREATE TRIGGER IF NOT EXISTS trg_articles_fts_insert AFTER INSERT ON articles BEGIN
+    DELETE FROM search_fts WHERE rowid = new.id * 8;
+    INSERT INTO search_fts (rowid, title, body, kind, ref_id, field)
+    VALUES (new.id * 8, new.title, '', 'article', new.id, 'title');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_articles_fts_update AFTER UPDATE OF title ON articles BEGIN
+    DELETE FROM search_fts WHERE rowid = new.id * 8;
+    INSERT INTO search_fts (rowid, title, body, kind, ref_id, field)
+    VALUES (new.id * 8, new.title, '', 'article', new.id, 'title');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_articles_fts_delete AFTER DELETE ON articles BEGIN
+    DELETE FROM search_fts WHERE rowid BETWEEN old.id * 8 AND old.id * 8 + 7;
+END;
+
+-- article_content (compressed text, decoded by content_text())
+CREATE TRIGGER IF NOT EXISTS trg_content_fts_insert AFTER INSERT ON article_content BEGIN
+    DELETE FROM search_fts WHERE rowid = new.article_id * 8 + {_FIELD_CODE_SQL.format(f="new.field")};
+    INSERT INTO search_fts (rowid, title, body, kind, ref_id, field)
+    VALUES (new.article_id * 8 + {_FIELD_CODE_SQL.format(f="new.field")},
+            '', content_text(new.codec, new.data), 'article', new.article_id, new.field);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_content_fts_update AFTER UPDATE ON article_content BEGIN
+    DELETE FROM search_fts WHERE rowid = new.article_id * 8 + {_FIELD_CODE_SQL.format(f="new.field")};
+    INSERT INTO search_fts (rowid, title, body, kind, ref_id, field)
+    VALUES (new.article_id * 8 + {_FIELD_CODE_SQL.format(f="new.field")},
+            '', content_text(new.codec, new.data), 'article', new.article_id, new.field);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_content_fts_delete AFTER DELETE ON article_content BEGIN
+    DELETE FROM search_fts
+    WHERE rowid = old.article_id * 8 + {_FIELD_CODE_SQL.format(f="old.field")};
+END;
+
+-- reflections
+CREATE TRIGGER IF NOT EXISTS trg_reflections_fts_insert AFTER INSERT ON reflections BEGIN
+    DELETE FROM search_fts WHERE rowid = -new.id;
+    INSERT INTO search_fts (rowid, title, body, kind, ref_id, field)
+    VALUES (-new.id, '', coalesce(new.reflection_text, '') || char(10) || coalesce(new.action_item, ''),
+            'reflection', new.id, 'reflection');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_reflections_fts_update
+AFTER UPDATE OF reflection_text, action_item ON reflections BEGIN
+    DELETE FROM search_fts WHERE rowid = -new.id;
+    INSERT INTO search_fts (rowid, title, body, kind, ref_id, field)
+    VALUES (-new.id, '', coalesce(new.reflection_text, '') || char(10) || coalesce(new.action_item, ''),
+            'reflection', new.id, 'reflection');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_reflections_fts_delete AFTER DELETE ON reflections BEGIN
+    DELETE FROM search_fts WHERE rowid = -old.id;
+END;
+"""
+
+
+def _migrate_search_index(conn: sqlite3.Connection) -> None:
+    """004: FTS5 index over article titles, article content and reflections."""
+    for statement in _split_sql(_SEARCH_INDEX_SQL):
+        conn.execute(statement)
+
+    conn.execute("""
+        INSERT INTO search_fts (rowid, title, body, kind, ref_id, field)
+        SELECT id * 8, title, '', 'article', id, 'title' FROM articles
+    """)
+    conn.execute(f"""
+        INSERT INTO search_fts (rowid, title, body, kind, ref_id, field)
+        SELECT article_id * 8 + {_FIELD_CODE_SQL.format(f="field")},
+               '', content_text(codec, data), 'article', article_id, field
+        FROM article_content
+    """)
+    conn.execute("""
+        INSERT INTO search_fts (rowid, title, body, kind, ref_id, field)
+        SELECT -id, '', coalesce(reflection_text, '') || char(10) || coalesce(action_item, ''),
+               'reflection', id, 'reflection'
+        FROM reflections
+    """)
+
+
+def _split_sql(script: str) -> list[str]:
+    """Split a script into complete statements (trigger bodies stay intact)."""
+    statements, buffer = [], ""
+    for line in script.splitlines(keepends=True):
+        if not buffer and (not line.strip() or line.strip().startswith("--")):
+            continue
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ""
+    return statements
+
+
+# ── Migrations ────────────────────────────────────────────────────
+# (version, description, sql | callable) — applied in order by init_db().
+# Append only: never edit or renumber a migration that has shipped.
+_MIGRATIONS: list[tuple] = [
+    (1, "hot-path indexes for queue, reflections and sessions", """
+        -- get_next_queued_article / queue scans: WHERE status = ? ORDER BY priority DESC, queued_at
+        CREATE INDEX IF NOT EXISTS idx_articles_status_priority_queued
+            ON articles(status, priority DESC, queued_at);
+        -- get_articles_by_status: WHERE status = ? ORDER BY queued_at
+        CREATE INDEX IF NOT EXISTS idx_articles_status_queued
+            ON articles(status, queued_at);
+        -- get_recent_reflections / streak: WHERE created_at >= ?
+        CREATE INDEX IF NOT EXISTS idx_reflections_created_at
+            ON reflections(created_at);
+        -- get_reflections_by_article
+        CREATE INDEX IF NOT EXISTS idx_reflections_article
+            ON reflections(article_id, created_at);
+        -- get_sessions_by_date / weekly range
+        CREATE INDEX IF NOT EXISTS idx_sessions_date
+            ON sessions(date, start_time);
+        -- get_latest_digest / get_latest_report
+        CREATE INDEX IF NOT EXISTS idx_batch_digests_created_at
+            ON batch_digests(created_at);
+        CREATE INDEX IF NOT EXISTS idx_weekly_reports_created_at
+            ON weekly_reports(created_at);
+    """),
+    (2, "index for LIFO queue pick and newest-queued listing", """
+        -- get_top_queued_article: ORDER BY priority DESC, date DESC, queued_at
+        CREATE INDEX IF NOT EXISTS idx_articles_status_priority_date
+            ON articles(status, priority DESC, date DESC, queued_at);
+        -- get_newest_queued_articles: ORDER BY priority DESC, queued_at DESC
+        CREATE INDEX IF NOT EXISTS idx_articles_status_priority_queued_desc
+            ON articles(status, priority DESC, queued_at DESC);
+    """),
+    (3, "compressed content store for heavy article text", _migrate_content_store),
+    (4, "FTS5 search index over articles and reflections", _migrate_search_index),
+    (5, "daily_activity rollup maintained by triggers", """
+        -- One row per day: /status, streaks and weekly stats read O(days), not O(rows)
+        CREATE TABLE IF NOT EXISTS daily_activity (
+            day                     TEXT PRIMARY KEY,
+            reflections             INTEGER NOT NULL DEFAULT 0,
+            confidence_sum          INTEGER NOT NULL DEFAULT 0,
+            sessions                INTEGER NOT NULL DEFAULT 0,
+            session_minutes         INTEGER NOT NULL DEFAULT 0,
+            articles_sent           INTEGER NOT NULL DEFAULT 0,
+            articles_reflected      INTEGER NOT NULL DEFAULT 0,
+            articles_skipped        INTEGER NOT NULL DEFAULT 0,
+            articles_digest_reviewed INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID;
+
+        -- Reflections count on the day they were created (same as the old streak logic)
+        CREATE TRIGGER IF NOT EXISTS trg_reflections_activity_insert
+        AFTER INSERT ON reflections BEGIN
+            INSERT INTO daily_activity (day, reflections, confidence_sum)
+            VALUES (date(new.created_at), 1, coalesce(new.confidence_score, 0))
+            ON CONFLICT(day) DO UPDATE SET
+                reflections = reflections + 1,
+                confidence_sum = confidence_sum + excluded.confidence_sum;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_reflections_activity_delete
+        AFTER DELETE ON reflections BEGIN
+            UPDATE daily_activity SET
+                reflections = reflections - 1,
+                confidence_sum = confidence_sum - coalesce(old.confidence_score, 0)
+            WHERE day = date(old.created_at);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_reflections_activity_update
+        AFTER UPDATE OF confidence_score ON reflections BEGIN
+            UPDATE daily_activity SET
+                confidence_sum = confidence_sum
+                    - coalesce(old.confidence_score, 0) + coalesce(new.confidence_score, 0)
+            WHERE day = date(new.created_at);
+        END;
+
+        -- Sessions count on their own (local) date column
+        CREATE TRIGGER IF NOT EXISTS trg_sessions_activity_insert
+        AFTER INSERT ON sessions BEGIN
+            INSERT INTO daily_activity (day, sessions, session_minutes)
+            VALUES (new.date, 1, coalesce(new.duration_minutes, 0))
+            ON CONFLICT(day) DO UPDATE SET
+                sessions = sessions + 1,
+                session_minutes = session_minutes + excluded.session_minutes;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_sessions_activity_delete
+        AFTER DELETE ON sessions BEGIN
+            UPDATE daily_activity SET
+                sessions = sessions - 1,
+                session_minutes = session_minutes - coalesce(old.duration_minutes, 0)
+            WHERE day = old.date;
+        END;
+
+        -- Article status transitions, counted on the day they happen
+        CREATE TRIGGER IF NOT EXISTS trg_articles_activity_status
+        AFTER UPDATE OF status ON articles
+        WHEN new.status IS NOT old.status
+             AND new.status IN ('sent', 'reflected', 'skipped', 'digest_reviewed')
+        BEGIN
+            INSERT INTO daily_activity (
+                day, articles_sent, articles_reflected,
+                articles_skipped, articles_digest_reviewed
+            )
+            VALUES (
+                date('now'),
+                new.status = 'sent', new.status = 'reflected',
+                new.status = 'skipped', new.status = 'digest_reviewed'
+            )
+            ON CONFLICT(day) DO UPDATE SET
+                articles_sent = articles_sent + excluded.articles_sent,
+                articles_reflected = articles_reflected + excluded.articles_reflected,
+                articles_skipped = articles_skipped + excluded.articles_skipped,
+                articles_digest_reviewed =
+                    articles_digest_reviewed + excluded.articles_digest_reviewed;
+        END;
+
+        -- Backfill from existing reflections and sessions (past transitions aren't recorded)
+        INSERT OR IGNORE INTO daily_activity (day, reflections, confidence_sum, sessions, session_minutes)
+        SELECT day, SUM(r), SUM(c), SUM(s), SUM(m) FROM (
+            SELECT date(created_at) AS day, 1 AS r,
+                   coalesce(confidence_score, 0) AS c, 0 AS s, 0 AS m
+            FROM reflections
+            UNION ALL
+            SELECT date, 0, 0, 1, coalesce(duration_minutes, 0) FROM sessions
+        )
+        WHERE day IS NOT NULL
+        GROUP BY day;
+    """),
+    (6, "article leases for atomic queue claims", """
+        ALTER TABLE articles ADD COLUMN lease_owner TEXT;
+        ALTER TABLE articles ADD COLUMN lease_until TEXT;
+        ALTER TABLE articles ADD COLUMN lease_prev_status TEXT;
+        -- reap_expired_leases: WHERE status = 'processing' AND lease_until < now
+        CREATE INDEX IF NOT EXISTS idx_articles_processing_lease
+            ON articles(lease_until) WHERE status = 'processing';
+    """),
+    (7, "content-addressed LLM response cache", """
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            key TEXT PRIMARY KEY,           -- sha256(model + normalized messages + params)
+            model TEXT NOT NULL,
+            codec TEXT NOT NULL,            -- content_store codec of data
+            data BLOB NOT NULL,
+            size_bytes INTEGER NOT NULL,    -- len(data), summed for the size bound
+            hits INTEGER NOT NULL DEFAULT 0,
+            use_seq INTEGER NOT NULL,       -- logical LRU clock (timestamps tie within a ms)
+            created_at TEXT NOT NULL DEFAULT (datetime('now')),
+            last_used TEXT NOT NULL DEFAULT (datetime('now'))
+        );
+        -- MAX(use_seq) for the next tick + LRU eviction order
+        CREATE INDEX IF NOT EXISTS idx_llm_cache_use_seq ON llm_cache(use_seq);
+    """),
+    (8, "per-call LLM telemetry", """
+        CREATE TABLE IF NOT EXISTS llm_calls (
+            id INTEGER PRIMARY KEY,
+            ts TEXT NOT NULL,                    -- local ISO time the call finished
+            model TEXT NOT NULL,
+            task_type TEXT,                      -- NULL for direct call_llm() use
+            prompt_tokens INTEGER,
+            completion_tokens INTEGER,
+            usage_estimated INTEGER NOT NULL DEFAULT 0,  -- stream without usage → estimate
+            latency_ms INTEGER,                  -- full response (stream: until the last delta)
+            ttft_ms INTEGER,                     -- streams only
+            retries INTEGER NOT NULL DEFAULT 0,
+            fallback_position INTEGER,           -- 0 = primary, n = FALLBACK_CHAIN[n-1]
+            cache_hit INTEGER NOT NULL DEFAULT 0,
+            stream INTEGER NOT NULL DEFAULT 0,
+            ok INTEGER NOT NULL DEFAULT 1,
+            error TEXT                           -- exception type when ok = 0
+        );
+        -- Rollups filter by time window; pruning deletes by age
+        CREATE INDEX IF NOT EXISTS idx_llm_calls_ts ON llm_calls(ts);
+    """),
+    (9, "prefix-cached prompt tokens in LLM telemetry", """
+        -- Prompt tokens the provider served from its prompt cache (NULL = not reported)
+        ALTER TABLE llm_calls ADD COLUMN cached_tokens INTEGER;
+    """),
+    (10, "daily_activity keyed by local date everywhere", """
+        -- Migration 5 keyed reflections and article transitions by UTC date while
+        -- sessions (and /status, streaks) use the local date; use local for all.
+        DROP TRIGGER IF EXISTS trg_reflections_activity_insert;
+        DROP TRIGGER IF EXISTS trg_reflections_activity_delete;
+        DROP TRIGGER IF EXISTS trg_reflections_activity_update;
+        DROP TRIGGER IF EXISTS trg_articles_activity_status;
+
+        CREATE TRIGGER trg_reflections_activity_insert
+        AFTER INSERT ON reflections BEGIN
+            INSERT INTO daily_activity (day, reflections, confidence_sum)
+            VALUES (date(new.created_at, 'localtime'), 1, coalesce(new.confidence_score, 0))
+            ON CONFLICT(day) DO UPDATE SET
+                reflections = reflections + 1,
+                confidence_sum = confidence_sum + excluded.confidence_sum;
+        END;
+        CREATE TRIGGER trg_reflections_activity_delete
+        AFTER DELETE ON reflections BEGIN
+            UPDATE daily_activity SET
+                reflections = reflections - 1,
+                confidence_sum = confidence_sum - coalesce(old.confidence_score, 0)
+            WHERE day = date(old.created_at, 'localtime');
+        END;
+        CREATE TRIGGER trg_reflections_activity_update
+        AFTER UPDATE OF confidence_score ON reflections BEGIN
+            UPDATE daily_activity SET
+                confidence_sum = confidence_sum
+                    - coalesce(old.confidence_score, 0) + coalesce(new.confidence_score, 0)
+            WHERE day = date(new.created_at, 'localtime');
+        END;
+
+        CREATE TRIGGER trg_articles_activity_status
+        AFTER UPDATE OF status ON articles
+        WHEN new.status IS NOT old.status
+             AND new.status IN ('sent', 'reflected', 'skipped', 'digest_reviewed')
+        BEGIN
+            INSERT INTO daily_activity (
+                day, articles_sent, articles_reflected,
+                articles_skipped, articles_digest_reviewed
+            )
+            VALUES (
+                date('now', 'localtime'),
+                new.status = 'sent', new.status = 'reflected',
+                new.status = 'skipped', new.status = 'digest_reviewed'
+            )
+            ON CONFLICT(day) DO UPDATE SET
+                articles_sent = articles_sent + excluded.articles_sent,
+                articles_reflected = articles_reflected + excluded.articles_reflected,
+                articles_skipped = articles_skipped + excluded.articles_skipped,
+                articles_digest_reviewed =
+                    articles_digest_reviewed + excluded.articles_digest_reviewed;
+        END;
+
+        -- Re-key reflection counts from the source rows (past article transitions
+        -- have no timestamp to re-key by and keep their UTC day)
+        UPDATE daily_activity SET reflections = 0, confidence_sum = 0;
+        INSERT INTO daily_activity (day, reflections, confidence_sum)
+        SELECT date(created_at, 'localtime') AS day, COUNT(*), coalesce(SUM(confidence_score), 0)
+        FROM reflections
+        WHERE created_at IS NOT NULL
+        GROUP BY day
+        ON CONFLICT(day) DO UPDATE SET
+            reflections = excluded.reflections,
+            confidence_sum = excluded.confidence_sum;
+        DELETE FROM daily_activity
+        WHERE reflections = 0 AND sessions = 0 AND session_minutes = 0
+          AND articles_sent = 0 AND articles_reflected = 0
+          AND articles_skipped = 0 AND articles_digest_reviewed = 0;
+    """),
+    (11, "batch-analyzed marker instead of an 'analyzed' status", """
+        -- Set when a batch run saved the analysis of a still-queued article;
+        -- cleared once it is sent (.agent/rules.md fixes the status set)
+        ALTER TABLE articles ADD COLUMN batch_analyzed_at TEXT;
+        UPDATE articles SET status = 'queued', batch_analyzed_at = datetime('now')
+            WHERE status = 'analyzed';
+        UPDATE articles SET lease_prev_status = 'queued', batch_analyzed_at = datetime('now')
+            WHERE lease_prev_status = 'analyzed';
+        -- claim_next_article(include_analyzed=True): ready articles first
+        CREATE INDEX IF NOT EXISTS idx_articles_batch_ready
+            ON articles(priority DESC, date DESC, queued_at)
+            WHERE status = 'queued' AND batch_analyzed_at IS NOT NULL;
+    """),
+]
+
+SCHEMA_VERSION = _MIGRATIONS[-1][0]
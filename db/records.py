@@ -0,0 +1,89 @@
+"""
+Typed row records — lightweight `__slots__` dataclasses for large scans.
+
+The default dict rows are convenient for handlers; for exports, weekly
+gathering and other scans over many rows these records use less memory and
+skip per-row dict building. Build them through record_factory(), which maps
+a statement's column tuple onto the record fields once per statement.
+
+Usage:
+    from db.records import Article
+    from db.repository import iter_articles
+
+    for art in iter_articles(db_path, status="sent", record=Article):
+        print(art.id, art.title)
+"""
+from dataclasses import dataclass, fields
+from typing import Callable, Optional
+
+
+@dataclass(slots=True)
+class Article:
+    """One row of `articles` (unselected columns stay None)."""
+
+    id: Optional[int] = None
+    raindrop_id: Optional[str] = None
+    date: Optional[str] = None
+    title: Optional[str] = None
+    source_url: Optional[str] = None
+    raw_content: Optional[str] = None
+    summary: Optional[str] = None
+    key_insights: Optional[str] = None
+    action_item: Optional[str] = None
+    researcher_output: Optional[str] = None
+    architect_output: Optional[str] = None
+    skeptic_output: Optional[str] = None
+    synthesizer_output: Optional[str] = None
+    status: Optional[str] = None
+    queued_at: Optional[str] = None
+    collection_name: Optional[str] = None
+    priority: Optional[int] = None
+    created_at: Optional[str] = None
+    lease_owner: Optional[str] = None
+    lease_until: Optional[str] = None
+    lease_prev_status: Optional[str] = None
+    batch_analyzed_at: Optional[str] = None
+
+
+@dataclass(slots=True)
+class Reflection:
+    """One row of `reflections`."""
+
+    id: Optional[int] = None
+    article_id: Optional[int] = None
+    reflection_text: Optional[str] = None
+    action_item: Optional[str] = None
+    confidence_score: Optional[int] = None
+    created_at: Optional[str] = None
+
+
+@dataclass(slots=True)
+class Session:
+    """One row of `sessions`."""
+
+    id: Optional[int] = None
+    date: Optional[str] = None
+    start_time: Optional[str] = None
+    end_time: Optional[str] = None
+    duration_minutes: Optional[int] = None
+    activity_type: Optional[str] = None
+    created_at: Optional[str] = None
+
+
+def record_factory(record: type, columns: tuple[str, ...]) -> Callable[[tuple], object]:
+    """
+    Build a tuple-row → record converter for one statement's column tuple.
+
+    Columns the record doesn't define are ignored; fields the statement
+    didn't select keep their default (None).
+    """
+    field_names = tuple(f.name for f in fields(record))
+    if tuple(columns) == field_names[:len(columns)]:
+        # Columns line up with the leading fields (e.g. SELECT *) → positional
+        return lambda row: record(*row)
+
+    picked = [(name, i) for i, name in enumerate(columns) if name in field_names]
+
+    def make(row):
+        return record(**{name: row[i] for name, i in picked})
+    return make
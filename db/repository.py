@@ -1,25 +1,93 @@
 """
 Database repository — CRUD functions for all tables.
 
-All functions take db_path as first argument and use short-lived connections.
+All functions take db_path as first argument and reuse the calling thread's
+long-lived connection (see db/connection.py).
 All queries are parameterized to prevent SQL injection.
 """
 import json
+import re
 import sqlite3
+import uuid
 from datetime import datetime, timedelta
-from typing import Optional
-
-
-def _dict_factory(cursor, row):
-    """Convert sqlite3 rows to dicts."""
-    return {col[0]: row[idx] for idx, col in enumerate(cursor.description)}
+from typing import Iterator, Optional
+
+from db.connection import get_connection
+from db.content_store import CONTENT_FIELDS, load_content, put_content, put_content_many
+from db.records import record_factory
+
+# Max bound parameters per IN (...) query — well under SQLite's variable limit
+_IN_CHUNK_SIZE = 500
+# Rows per fetchmany() batch for the streaming iter_* readers
+_FETCH_BATCH = 500
+
+# ── Article projections ───────────────────────────────────────────
+# Heavy text columns (raw_content up to 10 KB + LLM outputs) are only loaded on demand
+ARTICLE_HEAVY_FIELDS = (
+    "raw_content", "summary", "key_insights", "action_item",
+    "researcher_output", "architect_output", "skeptic_output", "synthesizer_output",
+)
+# Lightweight view for queue/status listings
+ARTICLE_SUMMARY_FIELDS = (
+    "id", "raindrop_id", "title", "source_url", "status", "priority",
+    "date", "queued_at", "collection_name", "created_at",
+)
+_ARTICLE_FIELDS = frozenset(ARTICLE_SUMMARY_FIELDS + ARTICLE_HEAVY_FIELDS)
+
+
+def _project(columns) -> tuple[str, tuple]:
+    """
+    Split a projection into (SELECT list, content-store fields).
+
+    None → all columns. Content fields live in article_content, so they are
+    fetched separately and "id" is always selected to join them.
+    """
+    if columns is None:
+        return "*", CONTENT_FIELDS
+    unknown = set(columns) - _ARTICLE_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown article column(s): {sorted(unknown)}")
+    inline = [c for c in columns if c not in CONTENT_FIELDS]
+    content = tuple(c for c in columns if c in CONTENT_FIELDS)
+    if content and "id" not in inline:
+        inline.insert(0, "id")
+    return ", ".join(inline) or "id", content
+
+
+def _select_articles(
+    conn: sqlite3.Connection, columns, where: str, params=(), *, one: bool = False
+):
+    """Run a projected articles SELECT and attach (decompressed) content fields."""
+    select, content_fields = _project(columns)
+    cursor = conn.execute(f"SELECT {select} FROM articles {where}", params)
+    if one:
+        row = cursor.fetchone()
+        rows = [row] if row else []
+    else:
+        rows = cursor.fetchall()
+
+    _attach_content(conn, rows, content_fields)
+
+    if one:
+        return rows[0] if rows else None
+    return rows
+
+
+def _attach_content(conn: sqlite3.Connection, rows: list[dict], content_fields) -> None:
+    """Fill content-store fields into already-fetched article rows (in place)."""
+    if not content_fields or not rows:
+        return
+    stored = load_content(conn, [r["id"] for r in rows], content_fields)
+    for row in rows:
+        found = stored.get(row["id"], {})
+        for field in content_fields:
+            # Fall back to a legacy inline value (pre-migration rows, seed scripts)
+            row[field] = found.get(field, row.get(field))
 
 
 def _connect(db_path: str) -> sqlite3.Connection:
-    """Create a connection with dict row factory."""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = _dict_factory
-    return conn
+    """Get the pooled connection (dict row factory) for this thread."""
+    return get_connection(db_path)
 
 
 # ═══════════════════════════════════════════════════════════════════
@@ -44,50 +112,131 @@ def add_article(
     with _connect(db_path) as conn:
         cursor = conn.execute(
             """INSERT INTO articles
-               (raindrop_id, title, source_url, date, raw_content,
+               (raindrop_id, title, source_url, date,
                 collection_name, priority, queued_at)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-            (raindrop_id, title, source_url, date, raw_content,
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (raindrop_id, title, source_url, date,
              collection_name, priority, queued_at),
         )
-        return cursor.lastrowid
+        article_id = cursor.lastrowid
+        if raw_content is not None:
+            put_content(conn, article_id, {"raw_content": raw_content})
+        return article_id
+
+
+def add_articles_bulk(db_path: str, rows: list[dict]) -> int:
+    """
+    Insert many articles in one transaction (INSERT OR IGNORE on raindrop_id).
+
+    Each row takes the same fields as add_article(): raindrop_id, title,
+    source_url and optionally date, raw_content, collection_name, priority,
+    queued_at. Rows whose raindrop_id already exists are silently skipped.
+
+    Returns:
+        Number of rows actually inserted.
+    """
+    if not rows:
+        return 0
+    now = datetime.now().isoformat()
+    with _connect(db_path) as conn:
+        # Only new raindrop_ids get content written — existing rows stay untouched
+        existing = _existing_raindrop_ids(conn, [r["raindrop_id"] for r in rows])
+        new_rows = {}
+        for r in rows:
+            rid = str(r["raindrop_id"])
+            if rid not in existing and rid not in new_rows:
+                new_rows[rid] = r
+        if not new_rows:
+            return 0
+
+        conn.executemany(
+            """INSERT OR IGNORE INTO articles
+               (raindrop_id, title, source_url, date,
+                collection_name, priority, queued_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            [
+                (
+                    rid, r["title"], r["source_url"], r.get("date"),
+                    r.get("collection_name"), r.get("priority", 0),
+                    r.get("queued_at") or now,
+                )
+                for rid, r in new_rows.items()
+            ],
+        )
+
+        with_content = [rid for rid, r in new_rows.items() if r.get("raw_content") is not None]
+        ids = _article_ids_by_raindrop_id(conn, with_content)
+        put_content_many(conn, [
+            (ids[rid], {"raw_content": new_rows[rid]["raw_content"]})
+            for rid in with_content if rid in ids
+        ])
+        return len(new_rows)
+
+
+def get_existing_raindrop_ids(db_path: str, raindrop_ids: list[str]) -> set[str]:
+    """Return the subset of raindrop_ids already stored, in one query per chunk."""
+    with _connect(db_path) as conn:
+        return _existing_raindrop_ids(conn, raindrop_ids)
+
+
+def _article_ids_by_raindrop_id(conn: sqlite3.Connection, raindrop_ids) -> dict[str, int]:
+    """Map raindrop_id → article id for the given ids (chunked IN queries)."""
+    ids = list(dict.fromkeys(str(i) for i in raindrop_ids if i))
+    found: dict[str, int] = {}
+    for start in range(0, len(ids), _IN_CHUNK_SIZE):
+        chunk = ids[start:start + _IN_CHUNK_SIZE]
+        placeholders = ", ".join("?" * len(chunk))
+        rows = conn.execute(
+            f"SELECT id, raindrop_id FROM articles WHERE raindrop_id IN ({placeholders})",
+            chunk,
+        ).fetchall()
+        found.update({row["raindrop_id"]: row["id"] for row in rows})
+    return found
+
+
+def _existing_raindrop_ids(conn: sqlite3.Connection, raindrop_ids) -> set[str]:
+    """Subset of raindrop_ids already stored."""
+    return set(_article_ids_by_raindrop_id(conn, raindrop_ids))
 
 
 def get_article_by_id(db_path: str, article_id: int) -> Optional[dict]:
     """Get a single article by ID. Returns dict or None."""
     with _connect(db_path) as conn:
-        row = conn.execute(
-            "SELECT * FROM articles WHERE id = ?", (article_id,)
-        ).fetchone()
-        return row
+        return _select_articles(conn, None, "WHERE id = ?", (article_id,), one=True)
 
 
 def get_article_by_raindrop_id(db_path: str, raindrop_id: str) -> Optional[dict]:
     """Get a single article by raindrop_id. Returns dict or None."""
     with _connect(db_path) as conn:
-        row = conn.execute(
-            "SELECT * FROM articles WHERE raindrop_id = ?", (raindrop_id,)
-        ).fetchone()
-        return row
+        return _select_articles(
+            conn, None, "WHERE raindrop_id = ?", (raindrop_id,), one=True
+        )
 
 
-def get_articles_by_status(db_path: str, status: str) -> list[dict]:
-    """Get all articles with a given status."""
+def get_articles_by_status(
+    db_path: str, status: str, *, columns: Optional[tuple] = None
+) -> list[dict]:
+    """
+    Get all articles with a given status.
+
+    Pass columns (e.g. ARTICLE_SUMMARY_FIELDS) to skip the heavy text columns.
+    """
     with _connect(db_path) as conn:
-        return conn.execute(
-            "SELECT * FROM articles WHERE status = ? ORDER BY queued_at",
-            (status,),
-        ).fetchall()
+        return _select_articles(
+            conn, columns, "WHERE status = ? ORDER BY queued_at", (status,)
+        )
 
 
-def get_article_by_id(db_path: str, article_id: int) -> Optional[dict]:
-    """Get a single article by its ID."""
+def get_article_fields(
+    db_path: str, article_id: int, fields: tuple
+) -> Optional[dict]:
+    """
+    Lazily load selected columns of one article (e.g. ("raw_content",)).
+
+    Use after a summary query when the caller actually needs heavy text.
+    """
     with _connect(db_path) as conn:
-        row = conn.execute(
-            "SELECT * FROM articles WHERE id = ?",
-            (article_id,),
-        ).fetchone()
-        return dict(row) if row else None
+        return _select_articles(conn, fields, "WHERE id = ?", (article_id,), one=True)
 
 
 def update_article_status(
@@ -101,6 +250,21 @@ def update_article_status(
         )
 
 
+def reset_article_statuses(db_path: str) -> int:
+    """
+    Reset every non-queued article back to 'queued' (clearing any expired
+    lease). Articles under a live lease are left to their worker; saved
+    batch analyses (batch_analyzed_at) are kept. Returns rows changed.
+    """
+    with _connect(db_path) as conn:
+        return conn.execute(
+            """UPDATE articles SET status = 'queued', lease_owner = NULL,
+                   lease_until = NULL, lease_prev_status = NULL
+               WHERE status != 'queued'
+                 AND NOT (status = 'processing' AND lease_until >= datetime('now'))"""
+        ).rowcount
+
+
 def update_article_analysis(
     db_path: str,
     article_id: int,
@@ -133,37 +297,226 @@ def update_article_analysis(
     if not fields:
         return
 
-    set_clause = ", ".join(f"{k} = ?" for k in fields)
-    values = list(fields.values()) + [article_id]
+    # Heavy text goes to the compressed content store, the rest stays inline
+    content = {k: v for k, v in fields.items() if k in CONTENT_FIELDS}
+    inline = {k: v for k, v in fields.items() if k not in CONTENT_FIELDS}
 
     with _connect(db_path) as conn:
-        conn.execute(
-            f"UPDATE articles SET {set_clause} WHERE id = ?",
-            values,
-        )
+        if inline:
+            set_clause = ", ".join(f"{k} = ?" for k in inline)
+            conn.execute(
+                f"UPDATE articles SET {set_clause} WHERE id = ?",
+                list(inline.values()) + [article_id],
+            )
+        if content:
+            put_content(conn, article_id, content)
+
+
+def update_article_raw_content(db_path: str, article_id: int, raw_content: str) -> None:
+    """Replace the stored raw_content (e.g. after a better extraction)."""
+    with _connect(db_path) as conn:
+        put_content(conn, article_id, {"raw_content": raw_content})
 
 
-def get_next_queued_article(db_path: str) -> Optional[dict]:
+def get_next_queued_article(
+    db_path: str, *, columns: Optional[tuple] = None
+) -> Optional[dict]:
     """Get the oldest queued article (priority DESC, queued_at ASC)."""
     with _connect(db_path) as conn:
-        return conn.execute(
-            """SELECT * FROM articles
-               WHERE status = 'queued'
+        return _select_articles(
+            conn, columns,
+            """WHERE status = 'queued'
                ORDER BY priority DESC, queued_at ASC
                LIMIT 1""",
-        ).fetchone()
+            one=True,
+        )
 
 
-def get_newest_queued_articles(db_path: str, n: int) -> list[dict]:
-    """Get the newest n queued articles (priority DESC, newest first)."""
+def _next_queued(condition: str = "") -> str:
+    return f"""(SELECT id FROM articles WHERE status = 'queued'{condition}
+                ORDER BY priority DESC, date DESC, queued_at ASC LIMIT 1)"""
+
+
+# Articles a batch run already analyzed (batch_analyzed_at set) go out before
+# ones still needing the LLM; batch runs themselves take only the latter
+_NEXT_READY = (
+    f"id = coalesce({_next_queued(' AND batch_analyzed_at IS NOT NULL')}, {_next_queued()})"
+)
+_NEXT_UNANALYZED = f"id = {_next_queued(' AND batch_analyzed_at IS NULL')}"
+
+
+def get_top_queued_article(
+    db_path: str, *, columns: Optional[tuple] = None, include_analyzed: bool = False,
+) -> Optional[dict]:
+    """
+    Get the queued article to process next: priority DESC, then newest
+    Raindrop date first (LIFO), ties by queue order.
+
+    include_analyzed: batch-analyzed articles come first, in the same order
+    — what the daily job and /analyze will send next. Without it only
+    articles still needing analysis are considered.
+    """
+    with _connect(db_path) as conn:
+        where = _NEXT_READY if include_analyzed else _NEXT_UNANALYZED
+        return _select_articles(conn, columns, f"WHERE {where}", one=True)
+
+
+def count_batch_analyzed(db_path: str) -> int:
+    """Queued articles whose batch analysis is saved and waiting to be sent."""
+    with _connect(db_path) as conn:
+        return conn.execute(
+            """SELECT COUNT(*) AS n FROM articles
+               WHERE status = 'queued' AND batch_analyzed_at IS NOT NULL"""
+        ).fetchone()["n"]
+
+
+# ── Queue claims (leases) ─────────────────────────────────────────
+# An analyzer claims an article atomically (status → 'processing' + lease).
+# It finishes with complete_claim() or gives it back with release_claim();
+# reap_expired_leases() returns articles whose worker died mid-analysis.
+# A batch run finishes with complete_batch_claim() instead: the article goes
+# back to 'queued' with batch_analyzed_at set, and its saved analysis is
+# kept (through /skip and /reset too) until complete_claim() sends it.
+
+def _claim(
+    conn: sqlite3.Connection, where: str, params, lease_seconds: int, columns
+) -> Optional[dict]:
+    select, content_fields = _project(columns)
+    if select != "*":
+        select += ", lease_owner, lease_until, lease_prev_status, batch_analyzed_at"
+    owner = uuid.uuid4().hex
+    row = conn.execute(
+        f"""UPDATE articles SET
+                lease_prev_status = status,
+                status = 'processing',
+                lease_owner = ?,
+                lease_until = datetime('now', ?)
+            WHERE {where}
+            RETURNING {select}""",
+        (owner, f"+{int(lease_seconds)} seconds", *params),
+    ).fetchone()
+    if row:
+        _attach_content(conn, [row], content_fields)
+    return row
+
+
+def claim_next_article(
+    db_path: str, lease_seconds: int = 900, *, columns: Optional[tuple] = None,
+    include_analyzed: bool = False,
+) -> Optional[dict]:
+    """
+    Atomically claim the next queued article (same order as get_top_queued_article).
+
+    Returns the claimed row — including lease_owner, needed to complete or
+    release the claim, lease_prev_status, the status it had, and
+    batch_analyzed_at — or None if the queue is empty. Concurrent callers
+    never receive the same article.
+
+    include_analyzed: claim batch-analyzed articles first (their saved
+    analysis is sent as-is); batch runs leave it off and take only articles
+    still needing analysis.
+    """
+    with _connect(db_path) as conn:
+        return _claim(
+            conn, _NEXT_READY if include_analyzed else _NEXT_UNANALYZED, (), lease_seconds, columns,
+        )
+
+
+def claim_article(
+    db_path: str, article_id: int, lease_seconds: int = 900,
+    *, columns: Optional[tuple] = None,
+) -> Optional[dict]:
+    """
+    Atomically claim a specific article (any status, e.g. for re-analysis).
+
+    Returns None if it doesn't exist or another worker holds a live lease.
+    """
+    with _connect(db_path) as conn:
+        return _claim(
+            conn,
+            """id = ? AND (status != 'processing'
+                           OR lease_until IS NULL OR lease_until < datetime('now'))""",
+            (article_id,), lease_seconds, columns,
+        )
+
+
+def complete_claim(
+    db_path: str, article_id: int, lease_owner: str, status: str = "sent"
+) -> bool:
+    """
+    Finish a claim with a final status (clears batch_analyzed_at — the saved
+    analysis has been delivered). False if the lease was lost (reaped/reclaimed).
+    """
+    with _connect(db_path) as conn:
+        return conn.execute(
+            """UPDATE articles SET status = ?, batch_analyzed_at = NULL, lease_owner = NULL,
+                   lease_until = NULL, lease_prev_status = NULL
+               WHERE id = ? AND lease_owner = ?""",
+            (status, article_id, lease_owner),
+        ).rowcount == 1
+
+
+def complete_batch_claim(db_path: str, article_id: int, lease_owner: str) -> bool:
+    """
+    Finish a batch run's claim: back to 'queued' with batch_analyzed_at set,
+    so the saved analysis is sent next. False if the lease was lost.
+    """
+    with _connect(db_path) as conn:
+        return conn.execute(
+            """UPDATE articles SET status = 'queued', batch_analyzed_at = datetime('now'),
+                   lease_owner = NULL, lease_until = NULL, lease_prev_status = NULL
+               WHERE id = ? AND lease_owner = ?""",
+            (article_id, lease_owner),
+        ).rowcount == 1
+
+
+def release_claim(db_path: str, article_id: int, lease_owner: str) -> bool:
+    """Give a claimed article back (status restored). False if the lease was lost."""
+    with _connect(db_path) as conn:
+        return conn.execute(
+            """UPDATE articles SET status = coalesce(lease_prev_status, 'queued'),
+                   lease_owner = NULL, lease_until = NULL, lease_prev_status = NULL
+               WHERE id = ? AND lease_owner = ?""",
+            (article_id, lease_owner),
+        ).rowcount == 1
+
+
+def reap_expired_leases(db_path: str) -> int:
+    """Return articles with expired leases to their previous status. Returns count."""
     with _connect(db_path) as conn:
         return conn.execute(
-            """SELECT * FROM articles
-               WHERE status = 'queued'
+            """UPDATE articles SET status = coalesce(lease_prev_status, 'queued'),
+                   lease_owner = NULL, lease_until = NULL, lease_prev_status = NULL
+               WHERE status = 'processing' AND lease_until < datetime('now')"""
+        ).rowcount
+
+
+def get_newest_queued_articles(
+    db_path: str, n: int, *, columns: Optional[tuple] = None
+) -> list[dict]:
+    """Get the newest n queued articles (priority DESC, newest first)."""
+    with _connect(db_path) as conn:
+        return _select_articles(
+            conn, columns,
+            """WHERE status = 'queued'
                ORDER BY priority DESC, queued_at DESC
                LIMIT ?""",
             (n,),
-        ).fetchall()
+        )
+
+
+def get_processed_articles_between(
+    db_path: str, start: str, end: str, *, columns: Optional[tuple] = None
+) -> list[dict]:
+    """Get non-queued articles created in [start, end] (ISO strings), newest first."""
+    with _connect(db_path) as conn:
+        return _select_articles(
+            conn, columns,
+            """WHERE status != 'queued'
+                 AND created_at >= ? AND created_at <= ?
+               ORDER BY created_at DESC""",
+            (start, end),
+        )
 
 
 def count_articles_by_status(db_path: str) -> dict:
@@ -248,6 +601,146 @@ def get_sessions_by_date(db_path: str, date: str) -> list[dict]:
         ).fetchall()
 
 
+# ═══════════════════════════════════════════════════════════════════
+#  STREAMING SCANS (exports, history, weekly gathering)
+# ═══════════════════════════════════════════════════════════════════
+
+def _iter_rows(
+    conn: sqlite3.Connection, sql: str, params=(), *,
+    record=None, batch_size: int = _FETCH_BATCH,
+) -> Iterator[list]:
+    """
+    Yield batches of rows via fetchmany.
+
+    record: None → dicts, sqlite3.Row → Row objects, a records.* class →
+    slotted records. Column names are resolved once per statement.
+    """
+    cur = conn.cursor()
+    if record is not None:
+        cur.row_factory = sqlite3.Row if record is sqlite3.Row else None
+    cur.execute(sql, params)
+    make = None
+    if record is not None and record is not sqlite3.Row:
+        make = record_factory(record, tuple(d[0] for d in cur.description))
+    while True:
+        batch = cur.fetchmany(batch_size)
+        if not batch:
+            return
+        yield [make(r) for r in batch] if make else batch
+
+
+def iter_articles(
+    db_path: str, *, status: Optional[str] = None, columns: Optional[tuple] = None,
+    record=None, batch_size: int = _FETCH_BATCH,
+) -> Iterator:
+    """
+    Stream articles (optionally by status) in id order without loading them all.
+
+    Content-store fields are loaded per batch. sqlite3.Row rows are read-only,
+    so record=sqlite3.Row only accepts inline columns.
+    """
+    select, content_fields = _project(columns)
+    if record is sqlite3.Row and content_fields:
+        raise ValueError("sqlite3.Row records can't carry content-store fields")
+    where, params = ("WHERE status = ?", (status,)) if status else ("", ())
+    conn = _connect(db_path)
+    for batch in _iter_rows(
+        conn, f"SELECT {select} FROM articles {where} ORDER BY id", params,
+        record=record, batch_size=batch_size,
+    ):
+        if content_fields:
+            if record is None:
+                _attach_content(conn, batch, content_fields)
+            else:
+                stored = load_content(conn, [r.id for r in batch], content_fields)
+                for rec in batch:
+                    for field, text in stored.get(rec.id, {}).items():
+                        setattr(rec, field, text)
+        yield from batch
+
+
+def iter_reflections(
+    db_path: str, since: Optional[str] = None, *,
+    record=None, batch_size: int = _FETCH_BATCH,
+) -> Iterator:
+    """Stream reflections created at/after `since` (ISO), oldest first."""
+    sql = "SELECT * FROM reflections"
+    params: tuple = ()
+    if since:
+        sql += " WHERE created_at >= ?"
+        params = (since,)
+    for batch in _iter_rows(
+        _connect(db_path), sql + " ORDER BY created_at", params,
+        record=record, batch_size=batch_size,
+    ):
+        yield from batch
+
+
+def iter_sessions(
+    db_path: str, start: Optional[str] = None, end: Optional[str] = None, *,
+    record=None, batch_size: int = _FETCH_BATCH,
+) -> Iterator:
+    """Stream sessions with date in [start, end] (ISO dates, open when omitted)."""
+    for batch in _iter_rows(
+        _connect(db_path),
+        """SELECT * FROM sessions
+           WHERE (? IS NULL OR date >= ?) AND (? IS NULL OR date <= ?)
+           ORDER BY date, start_time""",
+        (start, start, end, end),
+        record=record, batch_size=batch_size,
+    ):
+        yield from batch
+
+
+# ═══════════════════════════════════════════════════════════════════
+#  DAILY ACTIVITY (rollup by local date, maintained by triggers — see db/models.py)
+# ═══════════════════════════════════════════════════════════════════
+
+_ACTIVITY_COUNTERS = (
+    "reflections", "confidence_sum", "sessions", "session_minutes",
+    "articles_sent", "articles_reflected", "articles_skipped", "articles_digest_reviewed",
+)
+
+
+def get_activity_summary(
+    db_path: str, start: Optional[str] = None, end: Optional[str] = None
+) -> dict:
+    """
+    Sum the daily_activity counters over [start, end] (local ISO dates, inclusive).
+
+    Omitted bounds are open. Adds avg_confidence (0.0 without reflections).
+    """
+    sums = ", ".join(f"coalesce(SUM({c}), 0) AS {c}" for c in _ACTIVITY_COUNTERS)
+    with _connect(db_path) as conn:
+        row = conn.execute(
+            f"""SELECT {sums} FROM daily_activity
+                WHERE (? IS NULL OR day >= ?) AND (? IS NULL OR day <= ?)""",
+            (start, start, end, end),
+        ).fetchone()
+    row["avg_confidence"] = (
+        row["confidence_sum"] / row["reflections"] if row["reflections"] else 0.0
+    )
+    return row
+
+
+def get_daily_activity(db_path: str, start: str, end: str) -> list[dict]:
+    """Get per-day activity rows for [start, end] (ISO dates), oldest first."""
+    with _connect(db_path) as conn:
+        return conn.execute(
+            "SELECT * FROM daily_activity WHERE day BETWEEN ? AND ? ORDER BY day",
+            (start, end),
+        ).fetchall()
+
+
+def get_reflection_days(db_path: str) -> list[str]:
+    """Days (ISO dates) with at least one reflection, newest first."""
+    with _connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT day FROM daily_activity WHERE reflections > 0 ORDER BY day DESC"
+        ).fetchall()
+    return [r["day"] for r in rows]
+
+
 # ═══════════════════════════════════════════════════════════════════
 #  BATCH DIGESTS
 # ═══════════════════════════════════════════════════════════════════
@@ -313,3 +806,126 @@ def get_latest_report(db_path: str) -> Optional[dict]:
         return conn.execute(
             "SELECT * FROM weekly_reports ORDER BY created_at DESC LIMIT 1"
         ).fetchone()
+
+
+# ═══════════════════════════════════════════════════════════════════
+#  SEARCH (FTS5 index maintained by triggers — see db/models.py)
+# ═══════════════════════════════════════════════════════════════════
+
+# Column weights for bm25(): title matches count more than body matches
+_SEARCH_WEIGHTS = (4.0, 1.0)
+
+
+def _fts_query(query: str) -> str:
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Each word is quoted (so FTS syntax in user input is inert) and the last
+    word gets a prefix wildcard for search-as-you-type.
+    """
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return ""
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search(
+    db_path: str, query: str, *, limit: int = 10, cursor: Optional[str] = None
+) -> dict:
+    """
+    Full-text search over article titles, article text/analysis and reflections.
+
+    Results are ranked by bm25 (best matching field per article/reflection)
+    and paginated by keyset: pass the returned next_cursor to get the next page.
+
+    Returns:
+        {"results": [{kind, ref_id, field, score, snippet, title,
+                      article_id, status}, ...],
+         "next_cursor": str | None}
+    """
+    match = _fts_query(query)
+    if not match:
+        return {"results": [], "next_cursor": None}
+
+    after_score, after_rowid = None, None
+    if cursor:
+        score_s, rowid_s = cursor.split(":")
+        after_score, after_rowid = float(score_s), int(rowid_s)
+
+    with _connect(db_path) as conn:
+        rows = conn.execute(
+            f"""WITH hits AS (
+                    SELECT rowid, kind, ref_id, field,
+                           bm25(search_fts, {_SEARCH_WEIGHTS[0]}, {_SEARCH_WEIGHTS[1]}) AS score
+                    FROM search_fts WHERE search_fts MATCH ?
+                ), best AS (
+                    SELECT *, ROW_NUMBER() OVER (
+                        PARTITION BY kind, ref_id ORDER BY score, rowid
+                    ) AS rn
+                    FROM hits
+                )
+                SELECT rowid, kind, ref_id, field, score FROM best
+                WHERE rn = 1
+                  AND (? IS NULL OR score > ? OR (score = ? AND rowid > ?))
+                ORDER BY score, rowid
+                LIMIT ?""",
+            (match, after_score, after_score, after_score, after_rowid, limit + 1),
+        ).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        # Snippets + display info only for the page being returned
+        for row in rows:
+            snip = conn.execute(
+                """SELECT snippet(search_fts, -1, '«', '»', '…', 12) AS s
+                   FROM search_fts WHERE search_fts MATCH ? AND rowid = ?""",
+                (match, row["rowid"]),
+            ).fetchone()
+            row["snippet"] = snip["s"] if snip else ""
+
+        article_ids = {r["ref_id"] for r in rows if r["kind"] == "article"}
+        reflection_ids = [r["ref_id"] for r in rows if r["kind"] == "reflection"]
+        reflections = {}
+        if reflection_ids:
+            marks = ", ".join("?" * len(reflection_ids))
+            for ref in conn.execute(
+                f"SELECT id, article_id FROM reflections WHERE id IN ({marks})",
+                reflection_ids,
+            ).fetchall():
+                reflections[ref["id"]] = ref["article_id"]
+                article_ids.add(ref["article_id"])
+
+        articles = {}
+        if article_ids:
+            marks = ", ".join("?" * len(article_ids))
+            for art in conn.execute(
+                f"SELECT id, title, status FROM articles WHERE id IN ({marks})",
+                list(article_ids),
+            ).fetchall():
+                articles[art["id"]] = art
+
+    results = []
+    for row in rows:
+        article_id = (
+            row["ref_id"] if row["kind"] == "article" else reflections.get(row["ref_id"])
+        )
+        article = articles.get(article_id, {})
+        results.append({
+            "kind": row["kind"],
+            "ref_id": row["ref_id"],
+            "field": row["field"],
+            "score": row["score"],
+            "snippet": row["snippet"],
+            "article_id": article_id,
+            "title": article.get("title"),
+            "status": article.get("status"),
+        })
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = f"{last['score']!r}:{last['rowid']}"
+    return {"results": results, "next_cursor": next_cursor}
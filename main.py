@@ -8,8 +8,11 @@ import sys
 from pathlib import Path
 
 import config
+from db import async_repository, llm_cache, llm_telemetry
+from db.connection import close_all
 from db.models import init_db
 from bot.telegram_handler import build_application
+from services import prompt_registry
 
 # ── Logging ────────────────────────────────────────────────────────
 log_file = Path(__file__).parent / "data" / "bot.log"
@@ -41,10 +44,22 @@ def main() -> None:
     logger.info(f"Initializing database at {db_path}")
     init_db(db_path)
 
+    # Compile every prompt template once (no prompt file reads per article)
+    prompt_registry.preload()
+
     # Build and run bot (scheduler starts via post_init inside build_application)
     logger.info("Starting Telegram bot...")
     app = build_application(config.TELEGRAM_BOT_TOKEN)
-    app.run_polling(drop_pending_updates=True)
+    try:
+        app.run_polling(drop_pending_updates=True)
+    finally:
+        async_repository.shutdown()
+        try:
+            llm_telemetry.flush(db_path)
+            llm_cache.flush_hits(db_path)
+        except Exception as e:
+            logger.warning(f"LLM telemetry flush failed: {e}")
+        close_all()
 
 
 if __name__ == "__main__":
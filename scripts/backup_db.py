@@ -0,0 +1,56 @@
+"""
+Manual DB maintenance: online backup, WAL checkpoint, free-page release.
+
+The bot runs the same steps nightly (services/scheduler.py); this is for
+one-off backups and for converting a DB created before auto_vacuum was
+enabled (--enable-incremental, stop the bot first — it runs a full VACUUM).
+
+Usage:
+    python scripts/backup_db.py
+    python scripts/backup_db.py --dest /mnt/nas/mentor-mind --keep 30
+    python scripts/backup_db.py --enable-incremental
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import config
+from db.backup import (
+    backup_database, checkpoint, db_size_bytes, enable_incremental_vacuum,
+    incremental_vacuum,
+)
+from db.connection import close_all
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=str(config.DATABASE_PATH))
+    parser.add_argument("--dest", default=None, help=f"default: {config.BACKUP_DIR}")
+    parser.add_argument("--keep", type=int, default=None, help=f"default: {config.BACKUP_KEEP}")
+    parser.add_argument("--enable-incremental", action="store_true",
+                        help="convert the DB to auto_vacuum=INCREMENTAL (full VACUUM)")
+    args = parser.parse_args()
+
+    print(f"DB: {args.db} ({db_size_bytes(args.db) / 1024 / 1024:.1f} MB incl. WAL)")
+
+    if args.enable_incremental:
+        converted = enable_incremental_vacuum(args.db)
+        print("→ Converted to incremental auto_vacuum" if converted else "→ Already incremental")
+
+    result = backup_database(args.db, args.dest, keep=args.keep)
+    print(f"→ Backup: {result.path}")
+    print(f"  {result.size_bytes / 1024 / 1024:.1f} MB, {result.pages} pages "
+          f"in {result.steps} steps, {result.duration_s:.2f}s (pruned {result.pruned})")
+
+    cp = checkpoint(args.db, "TRUNCATE")
+    print(f"→ Checkpoint: {cp['checkpointed']}/{cp['wal_pages']} WAL pages (busy={cp['busy']})")
+    print(f"→ Released {incremental_vacuum(args.db)} free pages")
+
+    close_all()
+    print("\nDone!")
+
+
+if __name__ == "__main__":
+    main()
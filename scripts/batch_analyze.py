@@ -0,0 +1,61 @@
+"""
+Offline batch analysis: run the 2-stage pipeline over many queued articles.
+
+Stage 1 and Stage 2 each go out as one batch (LLM_BATCH_BACKEND: the
+gateway's /v1/batches, or the local replay stand-in); results are saved to
+the articles, which stay queued but are sent first — from the saved
+analysis, without another LLM call. Safe to run next to the bot
+— articles are claimed with leases like /analyze.
+
+Usage:
+    python scripts/batch_analyze.py --limit 50
+    python scripts/batch_analyze.py --limit 200 --backend openai
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import config
+from db import async_repository, llm_cache, llm_telemetry
+from db.connection import close_all
+from db.models import init_db
+from services.batch_analysis import arun_batch, get_backend
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=str(config.DATABASE_PATH))
+    parser.add_argument("--limit", type=int, default=20, help="articles to claim (default: 20)")
+    parser.add_argument("--backend", default=None, help=f"openai | replay (default: {config.LLM_BATCH_BACKEND})")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="%(asctime)s [%(name)s] %(levelname)s: %(message)s", level=logging.INFO)
+    init_db(args.db)
+    backend = get_backend(args.backend)
+    print(f"DB: {args.db} — batch of up to {args.limit} articles via {backend.name}")
+
+    try:
+        result = asyncio.run(arun_batch(args.db, args.limit, backend))
+    finally:
+        async_repository.shutdown()
+        llm_telemetry.flush(args.db)
+        llm_cache.flush_hits(args.db)
+        close_all()
+
+    print(f"→ Files: {result.run_dir}")
+    print(f"→ {len(result.article_ids)} claimed, Stage 1 OK {result.stage_1_ok}, "
+          f"Stage 2 OK {result.stage_2_ok}")
+    for article_id, reason in result.failed.items():
+        print(f"  #{article_id} back in queue: {reason}")
+    if result.error:
+        print(f"⚠️ {result.error}")
+        sys.exit(1)
+    print("\nDone!")
+
+
+if __name__ == "__main__":
+    main()
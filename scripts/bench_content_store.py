@@ -0,0 +1,123 @@
+"""
+Benchmark the compressed content store: DB size and scan speed before/after migration 003.
+
+Builds a legacy (schema v2) DB with heavy text inline on `articles`, measures
+file size and status/queue scan timings, runs init_db() to move the text into
+`article_content`, VACUUMs, and measures again.
+
+Usage:
+    python scripts/bench_content_store.py
+    python scripts/bench_content_store.py --articles 20000 --rounds 20
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from db.connection import close_all
+from db.models import _SCHEMA_SQL, init_db
+
+WORDS = (
+    "retrieval augmented generation embedding chunking reranker pipeline latency "
+    "token context window agent evaluation benchmark production cache index vector "
+    "hybrid search prompt model fine-tuning inference throughput architecture"
+).split()
+
+SCANS = {
+    "status counts": "SELECT status, COUNT(*) FROM articles GROUP BY status",
+    "queue listing": (
+        "SELECT id, title, priority, source_url FROM articles "
+        "WHERE status = 'queued' ORDER BY priority DESC, queued_at"
+    ),
+    "full table scan": "SELECT id, title, status FROM articles WHERE title LIKE '%zzz%'",
+}
+
+
+def _paragraphs(rng: random.Random, n: int) -> str:
+    return "\n\n".join(
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 90)))
+        for _ in range(n)
+    )
+
+
+def build_legacy_db(path: str, n_articles: int) -> None:
+    """Create a schema-v2 DB with raw_content + LLM outputs stored inline."""
+    rng = random.Random(42)
+    conn = sqlite3.connect(path)
+    conn.executescript(_SCHEMA_SQL)
+    conn.execute("PRAGMA user_version = 2")
+    rows = []
+    for i in range(n_articles):
+        analyzed = i % 3 == 0
+        rows.append((
+            f"bench_{i}", f"Article {i}", f"https://example.com/{i}",
+            "sent" if analyzed else "queued", i % 40 == 0, f"2026-01-01T00:{i % 60:02d}",
+            _paragraphs(rng, 12),
+            _paragraphs(rng, 3) if analyzed else None,
+            "## 🔬 Researcher\n" + _paragraphs(rng, 6) if analyzed else None,
+            "## 🧭 Synthesizer\n" + _paragraphs(rng, 4) if analyzed else None,
+        ))
+    conn.executemany(
+        """INSERT INTO articles (raindrop_id, title, source_url, status, priority,
+                                 queued_at, raw_content, summary,
+                                 researcher_output, synthesizer_output)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        rows,
+    )
+    conn.commit()
+    conn.close()
+
+
+def measure(path: str, rounds: int) -> dict:
+    """VACUUM, then report file size and median timing for each scan."""
+    conn = sqlite3.connect(path)
+    conn.execute("VACUUM")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    stats = {"size_mb": os.path.getsize(path) / 1024 / 1024}
+    for name, sql in SCANS.items():
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            conn.execute(sql).fetchall()
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        stats[name] = timings[len(timings) // 2] * 1000
+    conn.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--articles", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_content.db")
+    print(f"Building legacy DB with {args.articles} articles...")
+    build_legacy_db(path, args.articles)
+    before = measure(path, args.rounds)
+
+    start = time.perf_counter()
+    init_db(path)
+    migrate_s = time.perf_counter() - start
+    close_all()
+    after = measure(path, args.rounds)
+
+    print(f"\n  Migration 003: {migrate_s:.2f}s\n")
+    print(f"  {'':<22}{'before':>12}{'after':>12}")
+    print(f"  {'DB size (MB)':<22}{before['size_mb']:>12.2f}{after['size_mb']:>12.2f}")
+    for name in SCANS:
+        print(f"  {name + ' (ms)':<22}{before[name]:>12.2f}{after[name]:>12.2f}")
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark repository read throughput: fresh connection per query vs pooled connections.
+
+Seeds a temp DB, then runs a /status-like mix of repository reads for a fixed
+duration in each mode and prints queries per second.
+
+Usage:
+    python scripts/bench_db_connections.py
+    python scripts/bench_db_connections.py --articles 5000 --seconds 5 --threads 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import config
+from db.connection import close_all
+from db.models import init_db
+from db.repository import (
+    add_article,
+    add_reflection,
+    add_session,
+    count_articles_by_status,
+    get_article_by_id,
+    get_next_queued_article,
+    get_recent_reflections,
+    get_sessions_by_date,
+)
+
+
+def seed(db_path: str, n_articles: int) -> None:
+    """Insert n_articles articles plus a few reflections and sessions."""
+    for i in range(n_articles):
+        add_article(
+            db_path, f"bench_{i}", f"Bench article {i}", f"https://example.com/{i}",
+            raw_content="lorem ipsum " * 200, priority=1 if i % 50 == 0 else 0,
+        )
+    for i in range(1, min(n_articles, 200) + 1):
+        add_reflection(db_path, i, "insight", "action", (i % 10) + 1)
+    add_session(db_path, date.today().isoformat(), "21:00", "22:00", 60, "reflection")
+
+
+def _query_mix(db_path: str, n_articles: int, i: int) -> int:
+    """One /status-like round. Returns number of queries issued."""
+    count_articles_by_status(db_path)
+    get_article_by_id(db_path, (i % n_articles) + 1)
+    get_next_queued_article(db_path)
+    get_recent_reflections(db_path, days=7)
+    get_sessions_by_date(db_path, date.today().isoformat())
+    return 5
+
+
+def run(db_path: str, n_articles: int, seconds: float, threads: int) -> float:
+    """Run the query mix on N threads for `seconds`. Returns queries/sec."""
+    counts = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def worker(idx: int) -> None:
+        i = 0
+        while time.perf_counter() < deadline:
+            counts[idx] += _query_mix(db_path, n_articles, i)
+            i += 1
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(k,)) for k in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    close_all()
+    return sum(counts) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--articles", type=int, default=2000)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    init_db(db_path)
+    seed(db_path, args.articles)
+    close_all()
+
+    results = {}
+    for label, pooling in (("fresh connection", False), ("pooled", True)):
+        config.DB_POOLING = pooling
+        results[label] = run(db_path, args.articles, args.seconds, args.threads)
+        print(f"  {label:<18} {results[label]:>10,.0f} queries/sec")
+
+    speedup = results["pooled"] / results["fresh connection"]
+    print(f"  speedup            {speedup:>10.2f}x")
+    os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
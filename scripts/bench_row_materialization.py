@@ -0,0 +1,114 @@
+"""
+Benchmark row materialization: dict vs sqlite3.Row vs __slots__ records.
+
+Seeds N reflection rows, then reads them all back through each row path and
+reports median time and peak memory of the materialized result list.
+
+Usage:
+    python scripts/bench_row_materialization.py
+    python scripts/bench_row_materialization.py --rows 1000000 --rounds 3
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from db.connection import close_all, dict_factory, get_connection
+from db.models import init_db
+from db.records import Reflection, record_factory
+from db.repository import iter_reflections
+
+SQL = "SELECT * FROM reflections"
+
+
+def legacy_dict_factory(cursor, row):
+    """Row factory before the column-name cache (one description walk per row)."""
+    return {col[0]: row[idx] for idx, col in enumerate(cursor.description)}
+
+
+def seed(db_path: str, n_rows: int) -> None:
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        """INSERT INTO reflections (article_id, reflection_text, action_item,
+                                    confidence_score, created_at)
+           VALUES (?, ?, ?, ?, ?)""",
+        (
+            (i % 500 + 1, f"Insight number {i} about retrieval pipelines",
+             f"Action {i}", i % 10 + 1, f"2026-01-{i % 28 + 1:02d} 10:00:00")
+            for i in range(n_rows)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _fetch(conn, factory):
+    cur = conn.cursor()
+    cur.row_factory = factory
+    return cur.execute(SQL).fetchall()
+
+
+def _records(conn):
+    cur = conn.cursor()
+    cur.row_factory = None
+    cur.execute(SQL)
+    make = record_factory(Reflection, tuple(d[0] for d in cur.description))
+    return [make(r) for r in cur.fetchall()]
+
+
+def measure(fn, rounds: int) -> tuple[float, float]:
+    """Median seconds and peak MiB for materializing the full result."""
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        rows = fn()
+        timings.append(time.perf_counter() - start)
+        del rows
+    tracemalloc.start()
+    rows = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    timings.sort()
+    return timings[len(timings) // 2], peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench_rows.db")
+    init_db(db_path)
+    seed(db_path, args.rows)
+    conn = get_connection(db_path)
+
+    paths = {
+        "tuple (baseline)": lambda: _fetch(conn, None),
+        "dict (legacy)": lambda: _fetch(conn, legacy_dict_factory),
+        "dict (cached cols)": lambda: _fetch(conn, dict_factory),
+        "sqlite3.Row": lambda: _fetch(conn, sqlite3.Row),
+        "slots record": lambda: _records(conn),
+        "iter (ORDER BY)": lambda: list(iter_reflections(db_path, record=Reflection)),
+    }
+
+    print(f"\n  {args.rows:,} rows, median of {args.rounds}\n")
+    print(f"  {'row path':<20}{'ms':>10}{'peak MiB':>12}")
+    for name, fn in paths.items():
+        seconds, peak = measure(fn, args.rounds)
+        print(f"  {name:<20}{seconds * 1000:>10.1f}{peak:>12.1f}")
+
+    close_all()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,12 @@ c = conn.execute("""
         skeptic_output = NULL, 
         synthesizer_output = NULL
 """)
+# Analysis outputs live in the compressed content store (raw_content is kept)
+conn.execute("""
+    DELETE FROM article_content
+    WHERE field IN ('summary', 'researcher_output', 'architect_output',
+                    'skeptic_output', 'synthesizer_output')
+""")
 conn.commit()
 total = conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
 print(f"Reset {c.rowcount}/{total} articles to queued")
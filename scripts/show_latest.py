@@ -1,22 +1,24 @@
 """Show the latest article from the queue."""
-import sqlite3
+import sys
+sys.path.insert(0, ".")
+
+from db.connection import get_connection
+from db.repository import get_article_fields
 
 DB_PATH = "data/learning.db"
-conn = sqlite3.connect(DB_PATH)
-conn.row_factory = sqlite3.Row
+conn = get_connection(DB_PATH)
 
 row = conn.execute(
-    "SELECT id, title, source_url, status, date, raw_content FROM articles ORDER BY date DESC LIMIT 1"
+    "SELECT id, title, source_url, status, date FROM articles ORDER BY date DESC LIMIT 1"
 ).fetchone()
 
 if row:
+    content = get_article_fields(DB_PATH, row["id"], ("raw_content",)) or {}
     print(f"ID:     {row['id']}")
     print(f"Title:  {row['title']}")
     print(f"URL:    {row['source_url']}")
     print(f"Status: {row['status']}")
     print(f"Date:   {row['date']}")
-    print(f"Excerpt: {(row['raw_content'] or '')[:300]}...")
+    print(f"Excerpt: {(content.get('raw_content') or '')[:300]}...")
 else:
     print("No articles found.")
-
-conn.close()
@@ -10,12 +10,36 @@ Usage:
     result = analyze_article("Full article text here...")
     print(result.stage_1_output)  # 3-persona analysis
     print(result.stage_2_output)  # Synthesizer + Action Plan
+
+    result = await aanalyze_article(text)  # same pipeline on the event loop
+
+Articles over the Stage 1 token budget (MODEL_CONFIG max_input_tokens) are
+map-reduced into a condensed version first — see services/long_content.py.
+
+STAGE_1_PARALLEL=true runs the 3 personas as concurrent calls (each with
+STAGE_1_PERSONA_TIMEOUT) and assembles their sections; a missing persona
+becomes a warning instead of failing Stage 1.
+
+Concurrent analyses of the same content (the daily job, /analyze and a pasted
+URL) share one run: the first caller leads, later ones get its result and,
+if they stream, every delta the leader has produced so far and after.
+
+Message layout is prefix-cache friendly: the system prompts hold only static
+persona and instruction text, and everything volatile (date, article, images)
+comes after them in the user turn.
 """
+import asyncio
+import dataclasses
+import functools
+import hashlib
 import logging
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 
-from services.llm_client import call_llm_with_fallback, load_prompt
+import config
+from services import prompt_registry, single_flight
+from services.llm_client import acall_llm_with_fallback, load_prompt, run_sync
+from services.long_content import acondense
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +55,7 @@ class AnalysisResult:
     stage_2_success: bool = False
     warning: Optional[str] = None
     error: Optional[str] = None
+    condensed_parts: int = 0  # >0: article was map-reduced from this many parts
 
     @property
     def success(self) -> bool:
@@ -44,35 +69,158 @@ class AnalysisResult:
 
 
 def _build_stage_1_prompt() -> str:
-    """Build Stage 1 system prompt with embedded persona prompts."""
-    from datetime import date
-    template = load_prompt("daily_analysis.md")
-    researcher = load_prompt("personas/researcher.md")
-    architect = load_prompt("personas/architect.md")
-    skeptic = load_prompt("personas/skeptic.md")
-
-    return template.format(
-        today_date=date.today().isoformat(),
-        researcher_prompt=researcher,
-        architect_prompt=architect,
-        skeptic_prompt=skeptic,
+    """Build Stage 1 system prompt with embedded persona prompts (no volatile parts)."""
+    return prompt_registry.render(
+        "daily_analysis.md",
+        researcher_prompt=load_prompt("personas/researcher.md"),
+        architect_prompt=load_prompt("personas/architect.md"),
+        skeptic_prompt=load_prompt("personas/skeptic.md"),
     )
 
 
 def _build_stage_2_prompt() -> str:
     """Build Stage 2 system prompt with embedded synthesizer prompt."""
-    template = load_prompt("action_planning.md")
-    synthesizer = load_prompt("personas/synthesizer.md")
+    return prompt_registry.render(
+        "action_planning.md",
+        synthesizer_prompt=load_prompt("personas/synthesizer.md"),
+    )
+
+
+# Stage 1 personas in output order (Scout → Builder → Debater)
+PERSONAS = {"researcher": "Scout", "architect": "Builder", "skeptic": "Debater"}
 
-    return template.format(
-        synthesizer_prompt=synthesizer,
+
+def _build_persona_prompt(persona: str) -> str:
+    """System prompt for one persona run on its own (parallel Stage 1)."""
+    return prompt_registry.render(
+        "persona_analysis.md",
+        persona_prompt=load_prompt(f"personas/{persona}.md"),
     )
 
 
+def _dated(article_text: str) -> str:
+    """
+    Article behind today's date. The date goes in the user turn, not the
+    system prompt, so the system prompt is byte-identical every day and the
+    provider's prompt cache can reuse it.
+    """
+    from datetime import date
+    header = prompt_registry.render("today.md", today_date=date.today().isoformat())
+    return f"{header.rstrip()}\n\n{article_text}"
+
+
+def _user_content(article_text: str, images: Optional[list[dict]]):
+    """Article as the user turn — multimodal parts if images are available."""
+    if images:
+        # OpenAI-compatible multimodal format
+        user_content = [{"type": "text", "text": article_text}]
+        for img in images:
+            user_content.append({
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:{img['mime_type']};base64,{img['base64']}",
+                },
+            })
+        logger.info(f"Multimodal input: text + {len(images)} images")
+        return user_content
+    return article_text
+
+
+def stage_1_messages(article_text: str, images: Optional[list[dict]]) -> list[dict]:
+    """Stage 1 chat messages — multimodal user turn if images are available (also batch_analysis)."""
+    return [
+        {"role": "system", "content": _build_stage_1_prompt()},
+        {"role": "user", "content": _user_content(_dated(article_text), images)},
+    ]
+
+
+def _persona_messages(
+    persona: str, article_text: str, images: Optional[list[dict]],
+) -> list[dict]:
+    return [
+        {"role": "system", "content": _build_persona_prompt(persona)},
+        {"role": "user", "content": _user_content(_dated(article_text), images)},
+    ]
+
+
+def stage_2_messages(stage_1_output: str) -> list[dict]:
+    """Stage 2 chat messages — synthesizer over the Stage 1 output (also batch_analysis)."""
+    return [
+        {"role": "system", "content": _build_stage_2_prompt()},
+        {"role": "user", "content": stage_1_output},
+    ]
+
+
+_STAGE_2_WARNING = (
+    "⚠️ Phần tổng hợp và action plan không khả dụng. "
+    "Chỉ hiển thị phân tích từ 3 personas."
+)
+
+
+def _add_warning(result: AnalysisResult, warning: str) -> None:
+    result.warning = f"{result.warning}\n{warning}" if result.warning else warning
+
+
+def saved_result(
+    stage_1_output: Optional[str],
+    stage_2_output: Optional[str],
+    article_link: Optional[str] = None,
+) -> AnalysisResult:
+    """Rebuild a result from outputs saved earlier (batch runs) — no LLM call."""
+    result = AnalysisResult(
+        stage_1_output=stage_1_output or None,
+        stage_2_output=stage_2_output or None,
+        article_link=article_link,
+        stage_1_success=bool(stage_1_output),
+        stage_2_success=bool(stage_2_output),
+    )
+    if result.stage_1_success and not result.stage_2_success:
+        _add_warning(result, _STAGE_2_WARNING)
+    return result
+
+
+def _assemble_personas(result: AnalysisResult, outputs: dict[str, Optional[str]]) -> str:
+    """
+    Join persona sections in PERSONAS order; missing ones become a warning.
+
+    Raises:
+        RuntimeError: No persona produced output.
+    """
+    sections = [outputs[p].strip() for p in PERSONAS if outputs.get(p)]
+    if not sections:
+        raise RuntimeError("all personas failed or timed out")
+    missing = [name for p, name in PERSONAS.items() if not outputs.get(p)]
+    if missing:
+        _add_warning(result, f"Thiếu góc nhìn: {', '.join(missing)} (lỗi hoặc quá thời gian).")
+    return "\n\n".join(sections)
+
+
+async def _astage_1_parallel(
+    result: AnalysisResult, article_text: str, images: Optional[list[dict]], use_cache: bool,
+) -> str:
+    """Run the personas concurrently, each cancelled after STAGE_1_PERSONA_TIMEOUT."""
+    async def run(persona: str) -> Optional[str]:
+        try:
+            return await asyncio.wait_for(
+                acall_llm_with_fallback(
+                    "stage_1_analysis", _persona_messages(persona, article_text, images),
+                    use_cache=use_cache,
+                ),
+                config.STAGE_1_PERSONA_TIMEOUT,
+            )
+        except Exception as e:
+            logger.warning("Stage 1 persona %s failed: %s", persona, str(e) or type(e).__name__)
+            return None
+
+    outputs = await asyncio.gather(*(run(persona) for persona in PERSONAS))
+    return _assemble_personas(result, dict(zip(PERSONAS, outputs)))
+
+
 def analyze_article(
     article_text: str,
     article_link: Optional[str] = None,
     images: Optional[list[dict]] = None,
+    use_cache: bool = True,
 ) -> AnalysisResult:
     """
     Run the 2-stage analysis pipeline on an article.
@@ -80,6 +228,8 @@ def analyze_article(
     Stage 1 (analysis): Gemini 3 Pro — 3 personas (supports multimodal)
     Stage 2 (planning): Claude Opus 4.6 — synthesizer + action plan
 
+    Long articles are first condensed to the Stage 1 budget (map-reduce).
+
     Graceful degradation:
     - Stage 1 fails → return error with article link
     - Stage 2 fails → return Stage 1 output with warning
@@ -88,69 +238,183 @@ def analyze_article(
         article_text: Full text of the article to analyze.
         article_link: Optional URL of the original article.
         images: Optional list of image dicts with {base64, mime_type} for multimodal.
+        use_cache: False → skip the LLM response cache (fresh answers, cache refreshed).
+
+    Sync wrapper (scripts, tests): runs aanalyze_article on a private event loop.
 
     Returns:
         AnalysisResult with outputs from both stages (or partial).
     """
+    return run_sync(aanalyze_article(article_text, article_link, images, use_cache))
+
+
+async def _astage(
+    task_type: str,
+    messages: list[dict],
+    use_cache: bool,
+    on_delta: Optional[Callable[[str], Awaitable[None]]],
+) -> str:
+    """One async stage — streamed to on_delta if given, full text returned."""
+    if on_delta is None:
+        return await acall_llm_with_fallback(task_type, messages, use_cache=use_cache)
+
+    parts = []
+    stream = await acall_llm_with_fallback(
+        task_type, messages, use_cache=use_cache, stream=True
+    )
+    async for delta in stream:
+        parts.append(delta)
+        await on_delta(delta)
+    return "".join(parts)
+
+
+def _analysis_key(article_text: str, images: Optional[list[dict]]) -> str:
+    """Single-flight key: hash of the article text and its images."""
+    digest = hashlib.sha256(article_text.encode("utf-8"))
+    for image in images or ():
+        digest.update(b"\0" + str(image.get("base64", "")).encode("ascii", "replace"))
+    return digest.hexdigest()
+
+
+class _Fanout:
+    """Deltas of one in-flight analysis, replayed to every caller that joins it."""
+
+    def __init__(self):
+        self._history: list[tuple[str, str]] = []
+        self._subs: list[list] = []  # [on_delta, deltas delivered]
+
+    def join(self, on_delta: Callable[[str, str], Awaitable[None]]) -> list:
+        sub = [on_delta, 0]
+        self._subs.append(sub)
+        return sub
+
+    async def emit(self, stage: str, delta: str) -> None:
+        self._history.append((stage, delta))
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Catch every subscriber up, including ones that join while awaiting."""
+        i = 0
+        while i < len(self._subs):
+            sub = self._subs[i]
+            while sub[0] is not None and sub[1] < len(self._history):
+                stage, delta = self._history[sub[1]]
+                sub[1] += 1
+                try:
+                    await sub[0](stage, delta)
+                except Exception as e:
+                    # One caller's broken message must not fail the shared run
+                    logger.warning("Analysis stream listener failed, dropped: %s", e)
+                    sub[0] = None
+            i += 1
+
+
+_fanouts: dict[tuple, _Fanout] = {}  # (loop, key) → fan-out of the leading run
+
+
+async def aanalyze_article(
+    article_text: str,
+    article_link: Optional[str] = None,
+    images: Optional[list[dict]] = None,
+    use_cache: bool = True,
+    on_delta: Optional[Callable[[str, str], Awaitable[None]]] = None,
+) -> AnalysisResult:
+    """
+    The analyze_article pipeline on the event loop (its stages and degradation).
+
+    Prompts come pre-compiled from services/prompt_registry (re-read only
+    when a file changes); the LLM calls go through the pooled async client. With on_delta, both stages stream and
+    `await on_delta(stage, text)` receives each delta ("stage_1"/"stage_2");
+    parallel Stage 1 delivers its assembled sections as one delta.
+
+    A call for content already being analyzed joins that run instead of
+    starting its own. Its on_delta is replayed the leader's deltas so far and
+    then follows along; if the leader isn't streaming, it receives each
+    stage's full output once the run ends. use_cache=False always runs alone.
+    """
+    if not use_cache:
+        return await _aanalyze_article(article_text, article_link, images, use_cache, on_delta)
+
+    key = _analysis_key(article_text, images)
+    slot = (asyncio.get_running_loop(), key)
+    sub = None
+    led = False
+
+    async def lead() -> AnalysisResult:
+        nonlocal led
+        led = True
+        fanout = _fanouts[slot] = _Fanout()
+        if on_delta is not None:
+            fanout.join(on_delta)
+        try:
+            return await _aanalyze_article(
+                article_text, article_link, images, use_cache,
+                fanout.emit if on_delta is not None else None,
+            )
+        finally:
+            await fanout.flush()
+            if _fanouts.get(slot) is fanout:
+                del _fanouts[slot]
+
+    # No await between joining the fan-out and looking up the in-flight call
+    running = _fanouts.get(slot)
+    if running is not None and on_delta is not None:
+        sub = running.join(on_delta)
+    result = await single_flight.analysis.ado(key, lead)
+    if led:
+        return result
+
+    if on_delta is not None and (sub is None or sub[1] == 0):
+        for stage, output in (("stage_1", result.stage_1_output), ("stage_2", result.stage_2_output)):
+            if output:
+                await on_delta(stage, output)
+    return dataclasses.replace(result, article_link=article_link)
+
+
+async def _aanalyze_article(
+    article_text: str,
+    article_link: Optional[str],
+    images: Optional[list[dict]],
+    use_cache: bool,
+    on_delta: Optional[Callable[[str, str], Awaitable[None]]],
+) -> AnalysisResult:
+    """One run of the pipeline — see aanalyze_article."""
     result = AnalysisResult(article_link=article_link)
 
-    # ── Stage 1: Multi-persona analysis ────────────────────────────
+    condensed = await acondense(article_text, "stage_1_analysis", use_cache=use_cache)
+    article_text = condensed.text
+    result.condensed_parts = condensed.parts
+
     try:
         logger.info("Stage 1: Starting multi-persona analysis...")
-        system_prompt = _build_stage_1_prompt()
-
-        # Build user message — multimodal if images available
-        if images:
-            # OpenAI-compatible multimodal format
-            user_content = [{"type": "text", "text": article_text}]
-            for img in images:
-                user_content.append({
-                    "type": "image_url",
-                    "image_url": {
-                        "url": f"data:{img['mime_type']};base64,{img['base64']}",
-                    },
-                })
-            logger.info(f"Multimodal input: text + {len(images)} images")
+        if config.STAGE_1_PARALLEL:
+            result.stage_1_output = await _astage_1_parallel(
+                result, article_text, images, use_cache,
+            )
+            if on_delta is not None:
+                await on_delta("stage_1", result.stage_1_output)
         else:
-            user_content = article_text
-
-        stage_1_output = call_llm_with_fallback(
-            task_type="stage_1_analysis",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_content},
-            ],
-        )
-        result.stage_1_output = stage_1_output
+            result.stage_1_output = await _astage(
+                "stage_1_analysis", stage_1_messages(article_text, images),
+                use_cache, on_delta and functools.partial(on_delta, "stage_1"),
+            )
         result.stage_1_success = True
         logger.info("Stage 1: Complete ✓")
-
     except Exception as e:
         logger.error("Stage 1 FAILED: %s", e)
         result.error = f"Stage 1 failed: {e}"
-        # Do NOT call Stage 2 if Stage 1 failed
         return result
 
-    # ── Stage 2: Synthesis + Action Planning ───────────────────────
     try:
         logger.info("Stage 2: Starting synthesis & action planning...")
-        system_prompt = _build_stage_2_prompt()
-        stage_2_output = call_llm_with_fallback(
-            task_type="stage_2_planning",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": stage_1_output},
-            ],
+        result.stage_2_output = await _astage(
+            "stage_2_planning", stage_2_messages(result.stage_1_output),
+            use_cache, on_delta and functools.partial(on_delta, "stage_2"),
         )
-        result.stage_2_output = stage_2_output
         result.stage_2_success = True
         logger.info("Stage 2: Complete ✓")
-
     except Exception as e:
         logger.warning("Stage 2 FAILED (Stage 1 OK, degrading gracefully): %s", e)
-        result.warning = (
-            "⚠️ Phần tổng hợp và action plan không khả dụng. "
-            "Chỉ hiển thị phân tích từ 3 personas."
-        )
+        _add_warning(result, _STAGE_2_WARNING)
 
     return result
@@ -0,0 +1,392 @@
+"""
+Batch Analysis — offline 2-stage analysis of many queued articles through a
+batch-style endpoint, for backfills (e.g. the whole queue after a long pause).
+
+Flow:
+    1. Claim up to N queued articles (long leases), extract and condense content
+    2. Write one Stage 1 request per article as JSONL (OpenAI batch format),
+       submit it, poll until the batch finishes, save Stage 1 outputs
+    3. Same for Stage 2 over every Stage 1 success
+    4. Save through update_article_analysis; articles go back to "queued"
+       marked batch_analyzed_at, Stage 1 failures go back unmarked
+
+Lifecycle: queued → processing (batch lease) → queued + batch_analyzed_at →
+processing (daily job / /analyze lease) → sent. No extra status: the
+daily job and /analyze claim marked articles before unmarked ones and send
+the saved analysis (aload_analyzed) without calling the LLM again;
+/analyze <id> fresh re-runs it instead. Sending clears the mark. /skip and
+/reset keep it, so a skipped article that is re-queued is still sent from
+its saved analysis.
+
+Prompts are the ones analyze_article sends (one combined Stage 1 call per
+article). Request and result files stay in LLM_BATCH_DIR/<run>/.
+
+Backends (LLM_BATCH_BACKEND):
+    openai  Files + Batches API of the OpenAI-compatible gateway (/v1/batches)
+    replay  local stand-in for gateways without it: replays the JSONL through
+            the normal fallback chain (background priority, cache, telemetry)
+            and writes the same output format
+
+Usage:
+    from services.batch_analysis import arun_batch
+
+    result = await arun_batch(db_path, limit=50)
+    print(result.stage_1_ok, result.stage_2_ok, result.failed)
+
+    python scripts/batch_analyze.py --limit 50       # overnight backfill
+"""
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import config
+from db import async_repository as adb
+from db.repository import ARTICLE_SUMMARY_FIELDS
+from services import rate_limiter
+from services.analyzer import AnalysisResult, saved_result, stage_1_messages, stage_2_messages
+from services.extractor import extract_content
+from services.llm_client import acall_llm_with_fallback, async_client, task_model
+from services.long_content import acondense
+
+logger = logging.getLogger(__name__)
+
+TERMINAL = ("completed", "failed", "expired", "cancelled")
+CHAT_ENDPOINT = "/v1/chat/completions"
+
+
+@dataclass
+class BatchRunResult:
+    """Outcome of one batch run."""
+
+    run_dir: Optional[Path] = None
+    article_ids: list[int] = field(default_factory=list)
+    stage_1_ok: int = 0
+    stage_2_ok: int = 0
+    failed: dict[int, str] = field(default_factory=dict)  # article_id → reason (back in queue)
+    error: Optional[str] = None
+
+
+# ── JSONL ──────────────────────────────────────────────────────────
+
+def _custom_id(task_type: str, article_id: int) -> str:
+    return f"{task_type}:{article_id}"
+
+
+def write_requests(path: Path, task_type: str, messages_by_id: dict[int, list[dict]]) -> int:
+    """One batch request line per article. Returns lines written."""
+    model = task_model(task_type)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        for article_id, messages in messages_by_id.items():
+            f.write(json.dumps({
+                "custom_id": _custom_id(task_type, article_id),
+                "method": "POST",
+                "url": CHAT_ENDPOINT,
+                "body": {"model": model, "messages": messages},
+            }, ensure_ascii=False) + "\n")
+    return len(messages_by_id)
+
+
+def read_results(path: Path) -> dict[str, tuple[Optional[str], Optional[str]]]:
+    """{custom_id: (text, error)} from a batch output/error file."""
+    results = {}
+    if not path.exists():
+        return results
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            response = row.get("response") or {}
+            if row.get("error"):
+                error = row["error"]
+                results[row["custom_id"]] = (None, error.get("message") or str(error))
+            elif response.get("status_code", 200) != 200:
+                results[row["custom_id"]] = (None, f"HTTP {response.get('status_code')}")
+            else:
+                choices = (response.get("body") or {}).get("choices") or [{}]
+                text = (choices[0].get("message") or {}).get("content") or ""
+                results[row["custom_id"]] = (text, None) if text else (None, "empty response")
+    return results
+
+
+def _result_line(custom_id: str, text: Optional[str], error: Optional[BaseException]) -> dict:
+    """Output line in the OpenAI batch format (what read_results parses)."""
+    if error is not None:
+        return {"custom_id": custom_id, "response": None,
+                "error": {"code": type(error).__name__, "message": str(error)}}
+    return {
+        "custom_id": custom_id,
+        "response": {"status_code": 200, "body": {
+            "object": "chat.completion",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}}],
+        }},
+        "error": None,
+    }
+
+
+# ── Backends ───────────────────────────────────────────────────────
+
+class ReplayBackend:
+    """Local stand-in: replays a request file through acall_llm_with_fallback."""
+
+    name = "replay"
+
+    def __init__(self, concurrency: Optional[int] = None):
+        self.concurrency = concurrency or config.LLM_BATCH_REPLAY_CONCURRENCY
+        self._runs: dict[str, tuple[asyncio.Task, Path]] = {}
+
+    async def submit(self, path: Path) -> str:
+        batch_id = f"replay-{path.stem}-{len(self._runs)}"
+        output = path.with_suffix(".replay.jsonl")
+        self._runs[batch_id] = (asyncio.create_task(self._replay(path, output)), output)
+        return batch_id
+
+    async def _replay(self, path: Path, output: Path) -> None:
+        with path.open(encoding="utf-8") as f:
+            requests = [json.loads(line) for line in f if line.strip()]
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def one(request: dict) -> dict:
+            task_type = request["custom_id"].split(":", 1)[0]
+            body = dict(request["body"])
+            body.pop("model", None)
+            messages = body.pop("messages")
+            async with slots:
+                try:
+                    text = await acall_llm_with_fallback(task_type, messages, **body)
+                    return _result_line(request["custom_id"], text, None)
+                except Exception as e:
+                    logger.warning("Batch replay %s failed: %s", request["custom_id"], e)
+                    return _result_line(request["custom_id"], None, e)
+
+        with rate_limiter.background():
+            lines = await asyncio.gather(*(one(r) for r in requests))
+        output.write_text(
+            "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines),
+            encoding="utf-8",
+        )
+
+    async def status(self, batch_id: str) -> str:
+        task, _ = self._runs[batch_id]
+        if not task.done():
+            return "in_progress"
+        return "failed" if task.exception() else "completed"
+
+    async def wait(self, batch_id: str, seconds: float) -> None:
+        task, _ = self._runs[batch_id]
+        await asyncio.wait({task}, timeout=seconds)
+
+    async def download(self, batch_id: str, path: Path) -> None:
+        task, output = self._runs.pop(batch_id)
+        if task.exception():
+            raise task.exception()
+        output.replace(path)
+
+
+class OpenAIBatchBackend:
+    """Files + Batches API (upload JSONL, create batch, poll, download results)."""
+
+    name = "openai"
+
+    async def submit(self, path: Path) -> str:
+        client = async_client()
+        upload = await client.files.create(file=(path.name, path.read_bytes()), purpose="batch")
+        batch = await client.batches.create(
+            input_file_id=upload.id, endpoint=CHAT_ENDPOINT, completion_window="24h",
+        )
+        return batch.id
+
+    async def status(self, batch_id: str) -> str:
+        batch = await async_client().batches.retrieve(batch_id)
+        counts = batch.request_counts
+        if counts is not None:
+            logger.info(
+                "Batch %s: %s (%d/%d done, %d failed)",
+                batch_id, batch.status, counts.completed, counts.total, counts.failed,
+            )
+        return batch.status
+
+    async def wait(self, batch_id: str, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+    async def download(self, batch_id: str, path: Path) -> None:
+        # Successes and per-request errors come as two files; one result file here
+        client = async_client()
+        batch = await client.batches.retrieve(batch_id)
+        chunks = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                content = await client.files.content(file_id)
+                chunks.append(content.text.rstrip("\n") + "\n")
+        path.write_text("".join(chunks), encoding="utf-8")
+
+
+def get_backend(name: Optional[str] = None):
+    """Backend for LLM_BATCH_BACKEND (or name)."""
+    name = (name or config.LLM_BATCH_BACKEND).lower()
+    if name == "openai":
+        return OpenAIBatchBackend()
+    if name == "replay":
+        return ReplayBackend()
+    raise ValueError(f"Unknown batch backend: {name!r}. Valid: ['openai', 'replay']")
+
+
+# ── Stages ─────────────────────────────────────────────────────────
+
+async def run_stage(
+    backend, run_dir: Path, task_type: str, messages_by_id: dict[int, list[dict]],
+) -> dict[int, tuple[Optional[str], Optional[str]]]:
+    """
+    Submit one request per article for task_type, poll until the batch ends,
+    and return {article_id: (text, error)} — every article gets an entry.
+
+    Raises:
+        TimeoutError: The batch didn't finish within LLM_BATCH_MAX_HOURS.
+    """
+    requests = run_dir / f"{task_type}.jsonl"
+    write_requests(requests, task_type, messages_by_id)
+    batch_id = await backend.submit(requests)
+    logger.info("Batch %s submitted: %s × %d (%s)", batch_id, task_type, len(messages_by_id), backend.name)
+
+    deadline = time.monotonic() + config.LLM_BATCH_MAX_HOURS * 3600
+    while (status := await backend.status(batch_id)) not in TERMINAL:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Batch {batch_id} still {status} after {config.LLM_BATCH_MAX_HOURS}h")
+        await backend.wait(batch_id, config.LLM_BATCH_POLL_SECONDS)
+    logger.info("Batch %s finished: %s", batch_id, status)
+
+    output = run_dir / f"{task_type}.results.jsonl"
+    await backend.download(batch_id, output)
+    results = read_results(output)
+    return {
+        article_id: results.get(_custom_id(task_type, article_id), (None, f"batch {status}, no result"))
+        for article_id in messages_by_id
+    }
+
+
+async def aload_analyzed(db_path: str, article: dict) -> AnalysisResult:
+    """The analysis a batch run saved for an article, ready to send."""
+    row = await adb.get_article_fields(
+        db_path, article["id"], ("researcher_output", "synthesizer_output"),
+    ) or {}
+    return saved_result(
+        row.get("researcher_output"), row.get("synthesizer_output"), article.get("source_url"),
+    )
+
+
+async def _prepare(db_path: str, article: dict) -> Optional[tuple[str, Optional[list[dict]]]]:
+    """(Stage 1 text, images) for a claimed article, or None if nothing could be extracted."""
+    loop = asyncio.get_running_loop()
+    extraction = await loop.run_in_executor(
+        None, extract_content, article.get("source_url", ""), article.get("raw_content", ""),
+    )
+    if not extraction.content:
+        return None
+    if extraction.source != "excerpt":
+        await adb.update_article_raw_content(db_path, article["id"], extraction.content[:10000])
+    condensed = await acondense(extraction.content, "stage_1_analysis")
+    return condensed.text, extraction.images or None
+
+
+async def arun_batch(
+    db_path: str, limit: int, backend=None, run_dir: Optional[Path] = None,
+) -> BatchRunResult:
+    """
+    Analyze up to `limit` queued articles through batch requests.
+
+    Never raises for LLM or backend failures: a failed Stage 1 returns the
+    article to the queue (listed in result.failed); a failed Stage 2 keeps
+    the Stage 1 output, as analyze_article does.
+    """
+    backend = backend or get_backend()
+    run_dir = run_dir or config.LLM_BATCH_DIR / datetime.now().strftime("%Y%m%d-%H%M%S")
+    result = BatchRunResult(run_dir=run_dir)
+    # Two batch windows + extraction; the reaper must not hand these out meanwhile
+    lease_seconds = int(2 * config.LLM_BATCH_MAX_HOURS * 3600) + config.ANALYSIS_LEASE_SECONDS
+
+    claims: dict[int, dict] = {}
+    done: set[int] = set()
+    with rate_limiter.background():
+        try:
+            for _ in range(limit):
+                article = await adb.claim_next_article(
+                    db_path, lease_seconds, columns=ARTICLE_SUMMARY_FIELDS + ("raw_content",),
+                )
+                if article is None:
+                    break
+                claims[article["id"]] = article
+            result.article_ids = list(claims)
+            if not claims:
+                result.error = "Queue trống."
+                return result
+            logger.info("Batch run %s: %d articles claimed", run_dir.name, len(claims))
+
+            prepared = await asyncio.gather(
+                *(_prepare(db_path, a) for a in claims.values()), return_exceptions=True,
+            )
+            stage_1_requests = {}
+            for article_id, item in zip(claims, prepared):
+                if isinstance(item, BaseException) or item is None:
+                    result.failed[article_id] = f"extract failed: {item}" if item else "no content"
+                else:
+                    stage_1_requests[article_id] = stage_1_messages(*item)
+
+            stage_1 = {}
+            if stage_1_requests:
+                stage_1 = await run_stage(backend, run_dir, "stage_1_analysis", stage_1_requests)
+            for article_id, (text, error) in stage_1.items():
+                if text is None:
+                    result.failed[article_id] = f"stage 1: {error}"
+                    continue
+                # Saved now so a Stage 2 failure or timeout can't lose it
+                await adb.update_article_analysis(
+                    db_path, article_id, summary=text, researcher_output=text,
+                )
+                result.stage_1_ok += 1
+
+            stage_2_requests = {
+                article_id: stage_2_messages(text)
+                for article_id, (text, _) in stage_1.items() if text is not None
+            }
+            stage_2 = {}
+            if stage_2_requests:
+                try:
+                    stage_2 = await run_stage(backend, run_dir, "stage_2_planning", stage_2_requests)
+                except Exception as e:
+                    logger.warning("Stage 2 batch failed (Stage 1 outputs kept): %s", e)
+            for article_id, (text, error) in stage_2.items():
+                if text is None:
+                    logger.warning("Stage 2 for #%d failed: %s", article_id, error)
+                    continue
+                await adb.update_article_analysis(
+                    db_path, article_id, summary=text, synthesizer_output=text,
+                )
+                result.stage_2_ok += 1
+
+            for article_id in stage_2_requests:
+                if await adb.complete_batch_claim(
+                    db_path, article_id, claims[article_id]["lease_owner"],
+                ):
+                    done.add(article_id)
+                else:
+                    logger.warning("Lease lost for article #%d — analysis saved anyway", article_id)
+
+        except Exception as e:
+            logger.error("Batch run failed: %s", e, exc_info=True)
+            result.error = str(e) or type(e).__name__
+        finally:
+            for article_id, article in claims.items():
+                if article_id not in done:
+                    await adb.release_claim(db_path, article_id, article["lease_owner"])
+
+    logger.info(
+        "Batch run %s: %d claimed, stage 1 %d ok, stage 2 %d ok, %d back in queue",
+        run_dir.name, len(claims), result.stage_1_ok, result.stage_2_ok, len(result.failed),
+    )
+    return result
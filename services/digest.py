@@ -7,6 +7,8 @@ Usage:
     result = create_batch_digest(db_path, n=5)
     print(result.output)       # Digest text
     print(result.article_ids)  # IDs processed
+
+    result = await acreate_batch_digest(db_path, n=5)  # concurrent extraction, async LLM
 """
 import logging
 from dataclasses import dataclass, field
@@ -17,8 +19,9 @@ from db.repository import (
     get_newest_queued_articles,
     update_article_status,
 )
+from services import prompt_registry
 from services.extractor import extract_content
-from services.llm_client import call_llm_with_fallback, load_prompt
+from services.llm_client import acall_llm_with_fallback, call_llm_with_fallback
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +38,7 @@ class DigestResult:
     articles_processed: int = 0
     articles_skipped: int = 0
     skipped_titles: list[str] = field(default_factory=list)
+    article_texts: list[dict] = field(default_factory=list)
     success: bool = False
     error: Optional[str] = None
 
@@ -61,54 +65,17 @@ def create_batch_digest(db_path: str, n: int = 5) -> DigestResult:
     n = max(2, min(n, 10))  # Clamp to 2-10
 
     # 1. Get queued articles
-    articles = get_newest_queued_articles(db_path, n)
+    articles = get_newest_queued_articles(
+        db_path, n, columns=("id", "title", "source_url", "raw_content")
+    )
     if not articles:
         result.error = "Không có bài nào trong queue."
         return result
 
     # 2. Extract content for each article
-    article_texts = []
     for article in articles:
-        article_id = article["id"]
-        title = article.get("title", "Untitled")
-        url = article.get("source_url", "")
-        raw_content = article.get("raw_content", "")
-
-        # Use existing raw_content if available, otherwise extract
-        if raw_content and len(raw_content) > 100:
-            content = raw_content
-        elif url:
-            try:
-                logger.info(f"Extracting article #{article_id}: {title[:50]}")
-                extraction = extract_content(url)
-                content = extraction.content if extraction.content else ""
-            except Exception as e:
-                logger.warning(f"Extraction failed for #{article_id}: {e}")
-                result.articles_skipped += 1
-                result.skipped_titles.append(f"#{article_id}: {title}")
-                continue
-        else:
-            result.articles_skipped += 1
-            result.skipped_titles.append(f"#{article_id}: {title} (no URL)")
-            continue
-
-        if not content:
-            result.articles_skipped += 1
-            result.skipped_titles.append(f"#{article_id}: {title} (empty)")
-            continue
-
-        # Truncate long articles
-        if len(content) > MAX_ARTICLE_CHARS:
-            content = content[:MAX_ARTICLE_CHARS] + "\n\n[... truncated ...]"
-
-        article_texts.append({
-            "id": article_id,
-            "title": title,
-            "url": url,
-            "content": content,
-        })
-        result.article_ids.append(article_id)
-        result.article_titles[article_id] = title
+        _collect(result, article, _article_text(article))
+    article_texts = result.article_texts
 
     if not article_texts:
         result.error = "Không extract được bài nào."
@@ -116,23 +83,13 @@ def create_batch_digest(db_path: str, n: int = 5) -> DigestResult:
 
     result.articles_processed = len(article_texts)
 
-    # 3. Build combined prompt
-    combined_text = _build_combined_text(article_texts)
-
-    # 4. Call LLM
+    # 3-4. Build combined prompt + call LLM
     try:
         logger.info(f"Generating digest for {len(article_texts)} articles...")
-        system_prompt = load_prompt("digest.md").format(
-            n_articles=len(article_texts)
-        )
-        digest_output = call_llm_with_fallback(
+        result.output = call_llm_with_fallback(
             task_type="batch_digest",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": combined_text},
-            ],
+            messages=_digest_messages(article_texts),
         )
-        result.output = digest_output
         result.success = True
         logger.info("Digest generation complete ✓")
     except Exception as e:
@@ -141,11 +98,127 @@ def create_batch_digest(db_path: str, n: int = 5) -> DigestResult:
         return result
 
     # 5. Save to DB + update statuses
+    _save_digest(db_path, result)
+    return result
+
+
+async def acreate_batch_digest(db_path: str, n: int = 5) -> DigestResult:
+    """
+    Async create_batch_digest — extractions run concurrently, LLM call is
+    awaited on the pooled client, DB writes go through the writer thread.
+    """
+    import asyncio
+    from db import async_repository as adb
+
+    result = DigestResult()
+    n = max(2, min(n, 10))
+
+    articles = await adb.get_newest_queued_articles(
+        db_path, n, columns=("id", "title", "source_url", "raw_content")
+    )
+    if not articles:
+        result.error = "Không có bài nào trong queue."
+        return result
+
+    loop = asyncio.get_running_loop()
+    texts = await asyncio.gather(*(
+        loop.run_in_executor(None, _article_text, article) for article in articles
+    ))
+    for article, text in zip(articles, texts):
+        _collect(result, article, text)
+
+    if not result.article_texts:
+        result.error = "Không extract được bài nào."
+        return result
+    result.articles_processed = len(result.article_texts)
+
+    try:
+        logger.info(f"Generating digest for {len(result.article_texts)} articles...")
+        result.output = await acall_llm_with_fallback(
+            task_type="batch_digest",
+            messages=_digest_messages(result.article_texts),
+        )
+        result.success = True
+        logger.info("Digest generation complete ✓")
+    except Exception as e:
+        logger.error(f"Digest LLM call failed: {e}")
+        result.error = f"LLM digest failed: {e}"
+        return result
+
+    await adb.run_write(_save_digest, db_path, result)
+    return result
+
+
+def _article_text(article: dict) -> tuple[Optional[str], Optional[str]]:
+    """
+    Content for one article: stored raw_content, else extracted from its URL.
+
+    Returns:
+        (content, None) or (None, skip reason shown to the user).
+    """
+    article_id = article["id"]
+    title = article.get("title", "Untitled")
+    url = article.get("source_url", "")
+    raw_content = article.get("raw_content", "")
+
+    # Use existing raw_content if available, otherwise extract
+    if raw_content and len(raw_content) > 100:
+        content = raw_content
+    elif url:
+        try:
+            logger.info(f"Extracting article #{article_id}: {title[:50]}")
+            extraction = extract_content(url)
+            content = extraction.content if extraction.content else ""
+        except Exception as e:
+            logger.warning(f"Extraction failed for #{article_id}: {e}")
+            return None, f"#{article_id}: {title}"
+    else:
+        return None, f"#{article_id}: {title} (no URL)"
+
+    if not content:
+        return None, f"#{article_id}: {title} (empty)"
+
+    # Truncate long articles
+    if len(content) > MAX_ARTICLE_CHARS:
+        content = content[:MAX_ARTICLE_CHARS] + "\n\n[... truncated ...]"
+    return content, None
+
+
+def _collect(result: DigestResult, article: dict, text: tuple) -> None:
+    """Record one article's _article_text() outcome on the result."""
+    content, skipped = text
+    if skipped:
+        result.articles_skipped += 1
+        result.skipped_titles.append(skipped)
+        return
+    article_id = article["id"]
+    title = article.get("title", "Untitled")
+    result.article_texts.append({
+        "id": article_id,
+        "title": title,
+        "url": article.get("source_url", ""),
+        "content": content,
+    })
+    result.article_ids.append(article_id)
+    result.article_titles[article_id] = title
+
+
+def _digest_messages(article_texts: list[dict]) -> list[dict]:
+    """System prompt + combined articles for the digest call."""
+    system_prompt = prompt_registry.render("digest.md", n_articles=len(article_texts))
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": _build_combined_text(article_texts)},
+    ]
+
+
+def _save_digest(db_path: str, result: DigestResult) -> None:
+    """Save the digest and mark its articles digest_reviewed (errors → result.error)."""
     try:
         add_batch_digest(
             db_path,
             article_ids=result.article_ids,
-            digest_output=digest_output,
+            digest_output=result.output,
         )
         for aid in result.article_ids:
             update_article_status(db_path, aid, "digest_reviewed")
@@ -155,8 +228,6 @@ def create_batch_digest(db_path: str, n: int = 5) -> DigestResult:
         # Don't fail the result — LLM output is still valid
         result.error = f"Digest generated but DB save failed: {e}"
 
-    return result
-
 
 def _build_combined_text(article_texts: list[dict]) -> str:
     """Build combined text from extracted articles."""
@@ -11,16 +11,19 @@ Supports:
 """
 
 import base64
+import dataclasses
 import logging
 import re
 from dataclasses import dataclass, field
 from typing import Optional
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlparse, parse_qs, parse_qsl, urlencode, urlunparse
 
 import httpx
 import trafilatura
 from bs4 import BeautifulSoup
 
+from services import single_flight
+
 logger = logging.getLogger(__name__)
 
 # ── Constants ────────────────────────────────────────────────────────
@@ -29,6 +32,8 @@ MAX_IMAGES = 5
 MIN_IMAGE_SIZE = 100  # pixels (width or height)
 FETCH_TIMEOUT = 15.0  # seconds
 JINA_BASE = "https://r.jina.ai"
+# Query params that only track the click — dropped from the canonical URL
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "igshid", "mc_cid", "mc_eid", "ref_src")
 
 
 # ═══════════════════════════════════════════════════════════════════
@@ -550,10 +555,32 @@ def fetch_github_readme(github_url: str) -> Optional[str]:
 #  ORCHESTRATOR
 # ═══════════════════════════════════════════════════════════════════
 
+def canonical_url(url: str) -> str:
+    """
+    Same page → same string: lowercase scheme/host without "www.", no
+    fragment, tracking params dropped, remaining params sorted, no trailing
+    slash. Used as a key only; the original URL is what gets fetched.
+    """
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAMS)
+    )
+    path = parsed.path.rstrip("/")
+    return urlunparse((parsed.scheme.lower() or "https", host, path, parsed.params, urlencode(query), ""))
+
+
 def extract_content(url: str, excerpt: Optional[str] = None) -> ExtractionResult:
     """
     Smart content extraction — detect type and extract accordingly.
 
+    Concurrent calls for the same canonical URL (the daily job, /analyze and
+    a pasted link racing each other) share one extraction; each caller gets
+    its own copy, falling back to its own excerpt if nothing was extracted.
+
     Args:
         url: The URL to extract content from.
         excerpt: Raindrop excerpt as ultimate fallback.
@@ -561,6 +588,22 @@ def extract_content(url: str, excerpt: Optional[str] = None) -> ExtractionResult
     Returns:
         ExtractionResult with content, images, type, warnings.
     """
+    shared = single_flight.extraction.do(canonical_url(url), _extract_content, url, excerpt)
+    result = dataclasses.replace(
+        shared,
+        images=list(shared.images),
+        warnings=list(shared.warnings),
+        github_links=list(shared.github_links),
+    )
+    if not result.content and excerpt:
+        result.content = excerpt
+        result.source = "excerpt"
+        result.word_count = _count_words(result.content)
+        result.warnings.append("⚠️ Không extract được content, dùng excerpt")
+    return result
+
+
+def _extract_content(url: str, excerpt: Optional[str] = None) -> ExtractionResult:
     result = ExtractionResult()
     content_type, video_id = detect_content_type(url)
     result.content_type = content_type
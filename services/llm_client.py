@@ -4,85 +4,482 @@ LLM Client Service — Single OpenAI client for all models via Antigravity Tools
 Usage:
     from services.llm_client import call_llm, call_llm_with_fallback, check_proxy_health
 
-    # Direct call
-    response = call_llm("gemini-3-pro", [{"role": "user", "content": "Hello"}])
+    # Async (event loop) — pooled connections, per-model concurrency limit
+    response = await acall_llm("gemini-3-pro", [{"role": "user", "content": "Hello"}])
+    response = await acall_llm_with_fallback("stage_1_analysis", messages)
 
-    # With fallback
+    # Sync (scripts, tests) — the same calls run on a private event loop
     response = call_llm_with_fallback("stage_1_analysis", messages)
+
+    # Streaming — text deltas as they arrive
+    async for delta in await acall_llm_with_fallback("stage_1_analysis", messages, stream=True):
+        ...
+
+Fallback is hedged: if the current model hasn't answered (or, streaming,
+sent its first token) within its p95 latency — capped by the task's
+hedge_after budget in MODEL_CONFIG — the next model starts concurrently and
+whichever answers first wins.
 """
+import asyncio
+import importlib.util
 import os
 import time
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Optional, Union
 
 import openai
 import httpx
 
 import config
+from db import async_repository as adb
+from db import llm_cache, llm_telemetry
+from services import model_health, prompt_registry, rate_limiter, single_flight
+from services.tokens import estimate_tokens, message_tokens
 
 logger = logging.getLogger(__name__)
 
 
-# ── OpenAI Client (singleton) ──────────────────────────────────────
-_client: Optional[openai.OpenAI] = None
-
-
-def _get_client() -> openai.OpenAI:
-    """Lazy-init OpenAI client pointing to Antigravity Tools proxy."""
-    global _client
-    if _client is None:
-        _client = openai.OpenAI(
+# ── Async OpenAI Client (one per event loop) ───────────────────────
+# httpx pools and asyncio semaphores belong to the loop that created them,
+# so they are rebuilt if a different loop (e.g. a script's asyncio.run) calls in.
+_async_client: Optional[openai.AsyncOpenAI] = None
+_async_loop: Optional[asyncio.AbstractEventLoop] = None
+_model_semaphores: dict[str, asyncio.Semaphore] = {}
+
+
+def _get_async_client() -> openai.AsyncOpenAI:
+    """Lazy-init AsyncOpenAI on a shared pooled (HTTP/2 if available) transport."""
+    global _async_client, _async_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_loop is not loop:
+        http2 = config.LLM_HTTP2 and importlib.util.find_spec("h2") is not None
+        http_client = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=config.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=config.LLM_MAX_KEEPALIVE,
+            ),
+            timeout=config.LLM_TIMEOUT,
+        )
+        _async_client = openai.AsyncOpenAI(
             api_key=config.ANTIGRAVITY_API_KEY,
             base_url=config.ANTIGRAVITY_BASE_URL,
-            timeout=120.0,  # 2 min timeout to prevent hanging
+            timeout=config.LLM_TIMEOUT,
+            http_client=http_client,
         )
+        _async_loop = loop
+        _model_semaphores.clear()
         logger.info(
-            "LLM client initialized → %s", config.ANTIGRAVITY_BASE_URL
+            "Async LLM client initialized → %s (http2=%s, pool=%d)",
+            config.ANTIGRAVITY_BASE_URL, http2, config.LLM_MAX_CONNECTIONS,
+        )
+    return _async_client
+
+
+def async_client() -> openai.AsyncOpenAI:
+    """The shared async client, for gateway endpoints besides chat (files, batches)."""
+    return _get_async_client()
+
+
+def _model_semaphore(model: str) -> asyncio.Semaphore:
+    """Per-model in-flight limit, so one slow model can't take the whole pool."""
+    sem = _model_semaphores.get(model)
+    if sem is None:
+        sem = _model_semaphores[model] = asyncio.Semaphore(
+            config.LLM_MAX_CONCURRENCY_PER_MODEL
+        )
+    return sem
+
+
+async def aclose_llm_client() -> None:
+    """Close the async client's connection pool (call on shutdown)."""
+    global _async_client, _async_loop
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+        _async_loop = None
+        _model_semaphores.clear()
+
+
+# ── Response Cache ─────────────────────────────────────────────────
+def _cache_key(model: str, messages: list[dict], kwargs: dict) -> Optional[str]:
+    """Cache key for this request, or None when the cache is disabled."""
+    if not config.LLM_CACHE_ENABLED:
+        return None
+    return llm_cache.make_key(model, messages, kwargs)
+
+
+def _flight_key(model: str, messages: list[dict], kwargs: dict, use_cache: bool, stream: bool) -> Optional[str]:
+    """Single-flight key (prompt hash), or None when the call must run on its own."""
+    if stream or not use_cache:
+        # A stream can't be shared (streamed analyses dedup in the analyzer);
+        # use_cache=False asks for a fresh answer
+        return None
+    return llm_cache.make_key(model, messages, kwargs)
+
+
+def _cache_get(key: Optional[str], use_cache: bool) -> Optional[str]:
+    """Cached text, or None. Cache errors never fail the LLM call."""
+    if key is None or not use_cache:
+        return None
+    try:
+        return llm_cache.get(str(config.DATABASE_PATH), key)
+    except Exception as e:
+        logger.warning("LLM cache read failed: %s", e)
+        return None
+
+
+def _cache_put(key: Optional[str], model: str, text: str) -> None:
+    if key is None or not text:
+        return
+    try:
+        llm_cache.put(str(config.DATABASE_PATH), key, model, text)
+    except Exception as e:
+        logger.warning("LLM cache write failed: %s", e)
+
+
+def _record_failure(model: str, error: BaseException) -> None:
+    """
+    Count a failed call against the model's circuit — not the caller's bad
+    request, and not a 429 (that's capacity, handled by the rate limiter).
+    """
+    if not isinstance(error, (openai.BadRequestError, openai.RateLimitError)):
+        model_health.record_failure(model, error)
+
+
+def _request_tokens(messages: list[dict], kwargs: dict) -> int:
+    """Estimated tokens one request costs against the model's TPM bucket."""
+    completion = kwargs.get("max_tokens") or config.LLM_COMPLETION_TOKENS_ESTIMATE
+    return message_tokens(messages) + completion
+
+
+def _retry_after(error: openai.RateLimitError, default: float) -> float:
+    """Seconds the proxy asked us to back off (Retry-After header), else default."""
+    try:
+        return float(error.response.headers.get("retry-after", default))
+    except (AttributeError, TypeError, ValueError):
+        return default
+
+
+def _usage(usage) -> dict:
+    """
+    Token counts reported by the proxy, if any: prompt, completion and the
+    prompt tokens served from the provider's prefix cache (OpenAI-style
+    prompt_tokens_details.cached_tokens, or Anthropic's cache_read_input_tokens).
+    """
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None)
+    if cached is None:
+        cached = getattr(usage, "cache_read_input_tokens", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        "cached_tokens": cached,
+    }
+
+
+def _cache_hints(model: str, messages: list[dict]) -> list[dict]:
+    """
+    Messages as sent: for PROMPT_CACHE_HINT_MODELS, the leading (static)
+    system prompt becomes a text part with an ephemeral cache_control
+    breakpoint. Other models get the messages unchanged.
+    """
+    if not messages or not any(model.startswith(p) for p in config.PROMPT_CACHE_HINT_MODELS):
+        return messages
+    first = messages[0]
+    if first.get("role") != "system" or not isinstance(first.get("content"), str):
+        return messages
+    hinted = {**first, "content": [
+        {"type": "text", "text": first["content"], "cache_control": {"type": "ephemeral"}},
+    ]}
+    return [hinted, *messages[1:]]
+
+
+def _telemetry(call: dict, **fields) -> bool:
+    """Buffer one llm_calls row (see db/llm_telemetry.py); True when a flush is due."""
+    return llm_telemetry.record(**call, **fields)
+
+
+def _flush_telemetry() -> None:
+    try:
+        llm_telemetry.flush(str(config.DATABASE_PATH))
+    except Exception as e:
+        logger.warning("LLM telemetry write failed: %s", e)
+
+
+def _ms(started: float) -> int:
+    return int((time.monotonic() - started) * 1000)
+
+
+def _failed(call: dict, error: BaseException, attempt: int, started: Optional[float]) -> bool:
+    """Telemetry for a failed call (flushed with the next batch)."""
+    return _telemetry(
+        call, ok=False, error=type(error).__name__, retries=attempt,
+        latency_ms=_ms(started) if started is not None else None,
+    )
+
+
+def _stream_done(
+    call: dict, usage, content: str, prompt_estimate: int,
+    started: float, ttft: Optional[int], retries: int,
+) -> bool:
+    """Telemetry for a finished stream — estimated usage if the proxy sent none."""
+    tokens = _usage(usage)
+    estimated = tokens["completion_tokens"] is None
+    if estimated:
+        tokens.update(prompt_tokens=prompt_estimate, completion_tokens=estimate_tokens(content))
+    return _telemetry(
+        call, **tokens, usage_estimated=estimated,
+        latency_ms=_ms(started), ttft_ms=ttft, retries=retries,
+    )
+
+
+def _delta(chunk) -> str:
+    """Text delta of one streamed chunk ('' for role/usage-only chunks)."""
+    if not chunk.choices:
+        return ""
+    return chunk.choices[0].delta.content or ""
+
+
+async def _aiter_stream(
+    response, key: Optional[str], model: str, slot: asyncio.Semaphore, started: float,
+    call: dict, retries: int, prompt_estimate: int,
+) -> AsyncIterator[str]:
+    """
+    Yield deltas of an open stream; cache the full text once it completes.
+    Holds the model's concurrency slot until the stream ends.
+    """
+    parts = []
+    ttft = usage = None
+    try:
+        async with response:
+            async for chunk in response:
+                usage = getattr(chunk, "usage", None) or usage
+                delta = _delta(chunk)
+                if delta:
+                    if not parts:
+                        ttft = _ms(started)
+                        model_health.record_success(model, ttft / 1000, "ttft")
+                    parts.append(delta)
+                    yield delta
+    except Exception as e:
+        if not parts:
+            _record_failure(model, e)
+        _failed(call, e, retries, started)
+        raise
+    finally:
+        slot.release()
+    content = "".join(parts)
+    logger.info("LLM stream OK: model=%s, chars=%d", model, len(content))
+    if key is not None and content:
+        await adb.run_write(_cache_put, key, model, content)
+    if _stream_done(call, usage, content, prompt_estimate, started, ttft, retries):
+        await adb.run_write(_flush_telemetry)
+
+
+async def _aiter_cached(text: str) -> AsyncIterator[str]:
+    yield text
+
+
+# ── Fallback-aware Call ────────────────────────────────────────────
+def _task_spec(task_type: str) -> tuple[str, float, int]:
+    """
+    (primary model, hedge_after seconds, max_hedges) for a MODEL_CONFIG entry.
+
+    Entries are dicts with "model" plus optional budget keys; a bare model
+    string gets DEFAULT_HEDGE_BUDGET. HEDGE_ENABLED=false means no hedges.
+    """
+    spec = config.MODEL_CONFIG.get(task_type)
+    if not spec:
+        raise ValueError(f"Unknown task_type: {task_type!r}. "
+                         f"Valid: {list(config.MODEL_CONFIG.keys())}")
+    if isinstance(spec, str):
+        spec = {"model": spec}
+    budget = {**config.DEFAULT_HEDGE_BUDGET, **spec}
+    max_hedges = int(budget["max_hedges"]) if config.HEDGE_ENABLED else 0
+    return spec["model"], float(budget["hedge_after"]), max_hedges
+
+
+def task_model(task_type: str) -> str:
+    """Primary model configured for task_type."""
+    return _task_spec(task_type)[0]
+
+
+def task_input_budget(task_type: str) -> Optional[int]:
+    """max_input_tokens configured for task_type (None = unlimited)."""
+    _task_spec(task_type)  # validates task_type
+    spec = config.MODEL_CONFIG[task_type]
+    budget = spec.get("max_input_tokens") if isinstance(spec, dict) else None
+    return int(budget) if budget else None
+
+
+def _chain(task_type: str, primary_model: str) -> list[str]:
+    """
+    Primary + FALLBACK_CHAIN, minus models whose circuit is open, healthiest first.
+
+    Raises:
+        RuntimeError: Every model is cooling down — fail now instead of
+                      paying each one's timeout.
+    """
+    configured = [primary_model] + config.FALLBACK_CHAIN
+    models = model_health.order(configured)
+    if not models:
+        waits = ", ".join(f"{m} {model_health.retry_in(m):.0f}s" for m in dict.fromkeys(configured))
+        raise RuntimeError(
+            f"All models for task {task_type!r} are unavailable (circuit open, retry in: {waits})"
         )
-    return _client
+    if models[0] != primary_model:
+        logger.info("Chain for task=%s reordered by health: %s", task_type, models)
+    return models
+
+
+def _position(task_type: str, model: str) -> Optional[int]:
+    """Place of model in the configured chain: 0 = primary, n = FALLBACK_CHAIN[n-1]."""
+    configured = [task_model(task_type)] + config.FALLBACK_CHAIN
+    return configured.index(model) if model in configured else None
+
+
+def _labels(task_type: str, model: str) -> dict:
+    """Telemetry labels call_llm/acall_llm take when called through the chain."""
+    return {"task_type": task_type, "fallback_position": _position(task_type, model)}
+
+
+def _next_model(queue: list[str], task_type: str, hedge: bool = False) -> str:
+    model = queue.pop(0)
+    model_health.start_attempt(model)
+    logger.info("Trying model=%s for task=%s%s", model, task_type, " (hedge)" if hedge else "")
+    return model
 
 
 # ── Core LLM Call ──────────────────────────────────────────────────
-def call_llm(
+async def acall_llm(
     model: str,
     messages: list[dict],
     max_retries: int = 2,
     retry_delay: float = 5.0,
+    use_cache: bool = True,
+    stream: bool = False,
+    task_type: Optional[str] = None,
+    fallback_position: Optional[int] = None,
     **kwargs,
-) -> str:
+) -> Union[str, AsyncIterator[str]]:
     """
     Call an LLM model via the Antigravity proxy.
 
     Handles ConnectionError with retry logic (retry 2x, backoff 5s).
     Proxy handles account-level retry/rotation internally.
 
+    Each attempt first waits for the model's rate-limit buckets (RPM + an
+    estimate of the tokens); a 429 pauses the bucket and retries the same
+    model instead of counting as a model failure.
+
+    Identical requests (model + normalized messages + kwargs) are answered
+    from the SQLite response cache; use_cache=False skips the lookup but
+    still refreshes the stored answer. While one is in flight, identical
+    concurrent calls on the same event loop wait for its answer instead of
+    sending their own (single-flight; not for streams or use_cache=False).
+
+    stream=True returns an async iterator of text deltas instead — await it:
+        async for delta in await acall_llm(model, messages, stream=True): ...
+    Retries only cover opening the stream; a cache hit yields the whole text
+    at once.
+
+    At most LLM_MAX_CONCURRENCY_PER_MODEL calls per model are in flight;
+    the slot is released while backing off so waiting callers can proceed.
+
+    Every call, cache hits and failures included, is recorded in the
+    llm_calls telemetry table; task_type and fallback_position (0 = the
+    task's primary model) label the row when called through the chain.
+
     Returns:
-        The assistant's response text.
+        The assistant's response text (or its deltas when streaming).
 
     Raises:
-        openai.APIError: If the API returns an error after retries.
+        openai.APIError: If the API returns an error.
         ConnectionError: If proxy is unreachable after retries.
     """
-    client = _get_client()
+    return await single_flight.llm.ado(
+        _flight_key(model, messages, kwargs, use_cache, stream), _acall_llm,
+        model, messages, max_retries, retry_delay, use_cache, stream,
+        task_type, fallback_position, **kwargs,
+    )
+
+
+async def _acall_llm(
+    model: str,
+    messages: list[dict],
+    max_retries: int = 2,
+    retry_delay: float = 5.0,
+    use_cache: bool = True,
+    stream: bool = False,
+    task_type: Optional[str] = None,
+    fallback_position: Optional[int] = None,
+    **kwargs,
+) -> Union[str, AsyncIterator[str]]:
+    call = {"model": model, "task_type": task_type,
+            "fallback_position": fallback_position, "stream": stream}
+    key = _cache_key(model, messages, kwargs)
+    if key is not None and use_cache:
+        cached = await adb.run_read(_cache_get, key, use_cache)
+        if cached is not None:
+            logger.info("LLM cache hit: model=%s", model)
+            if _telemetry(call, cache_hit=True):
+                await adb.run_write(_flush_telemetry)
+            return _aiter_cached(cached) if stream else cached
+
+    client = _get_async_client()
     last_error: Optional[Exception] = None
+    estimated = _request_tokens(messages, kwargs)
+    started = None
 
     for attempt in range(1 + max_retries):
         try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                **kwargs,
-            )
+            await rate_limiter.aacquire(model, estimated)
+            slot = _model_semaphore(model)
+            await slot.acquire()
+            started = time.monotonic()
+            try:
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=_cache_hints(model, messages),
+                    stream=stream,
+                    **kwargs,
+                )
+            except BaseException:
+                slot.release()
+                raise
+            if stream:
+                return _aiter_stream(  # releases the slot
+                    response, key, model, slot, started, call, attempt, message_tokens(messages),
+                )
+            slot.release()
+            model_health.record_success(model, time.monotonic() - started)
+            rate_limiter.settle(model, estimated, getattr(response.usage, "total_tokens", None))
             content = response.choices[0].message.content or ""
             logger.info(
                 "LLM call OK: model=%s, tokens=%s",
                 model,
                 getattr(response.usage, "total_tokens", "?"),
             )
+            if key is not None and content:
+                await adb.run_write(_cache_put, key, model, content)
+            if _telemetry(
+                call, **_usage(response.usage), latency_ms=_ms(started), retries=attempt,
+            ):
+                await adb.run_write(_flush_telemetry)
             return content
 
-        except (ConnectionError, httpx.ConnectError) as e:
+        except (ConnectionError, httpx.ConnectError, openai.APIConnectionError) as e:
+            if isinstance(e, openai.APITimeoutError):
+                # Timeout — don't retry same model, fail fast to fallback
+                logger.warning(
+                    "LLM timeout after %.0fs: model=%s. Skipping retries → fallback.",
+                    config.LLM_TIMEOUT, model,
+                )
+                _record_failure(model, e)
+                _failed(call, e, attempt, started)
+                raise
             last_error = e
             if attempt < max_retries:
                 wait = retry_delay * (attempt + 1)
@@ -90,75 +487,145 @@ def call_llm(
                     "Proxy connection error (attempt %d/%d), retrying in %.1fs: %s",
                     attempt + 1, max_retries + 1, wait, e,
                 )
-                time.sleep(wait)
+                await asyncio.sleep(wait)
             else:
                 logger.error(
                     "Proxy unreachable after %d attempts: %s",
                     max_retries + 1, e,
                 )
 
-        except httpx.ReadTimeout as e:
-            # Timeout — don't retry same model, fail fast to fallback
-            logger.warning(
-                "LLM timeout after 120s: model=%s. Skipping retries → fallback.",
-                model,
-            )
-            raise
+        except openai.RateLimitError as e:
+            rate_limiter.pause(model, _retry_after(e, retry_delay))
+            if attempt >= max_retries:
+                logger.error("LLM rate limited after %d attempts: model=%s", max_retries + 1, model)
+                _failed(call, e, attempt, started)
+                raise
 
         except openai.APIError as e:
-            # API-level errors (rate limit, server error, etc.)
-            # Proxy already handles account rotation for 429s,
-            # so if we still get an error, the model is truly failing.
             logger.error("LLM API error: model=%s, error=%s", model, e)
+            _record_failure(model, e)
+            _failed(call, e, attempt, started)
             raise
 
+    _record_failure(model, last_error)
+    if _failed(call, last_error, max_retries, None):
+        await adb.run_write(_flush_telemetry)
     raise ConnectionError(
         f"Proxy unreachable after {max_retries + 1} attempts"
     ) from last_error
 
 
-# ── Fallback-aware Call ────────────────────────────────────────────
-def call_llm_with_fallback(
+async def acall_llm_with_fallback(
     task_type: str,
     messages: list[dict],
     **kwargs,
-) -> str:
+) -> Union[str, AsyncIterator[str]]:
     """
     Call LLM with model-level fallback chain.
 
+    0. Skip models whose circuit breaker is open; put the healthiest first
     1. Try the primary model mapped to task_type in MODEL_CONFIG
-    2. On failure, try each model in FALLBACK_CHAIN
-    3. If all fail, raise the last error
+    2. If it is slower than its hedge delay (see model_health.hedge_delay),
+       also start the next model in FALLBACK_CHAIN — up to max_hedges extra —
+       and return whichever answers first
+    3. On failure, try each remaining model in FALLBACK_CHAIN
+    4. If all fail, raise the last error
+
+    Losing hedges are cancelled (their connection and concurrency slot are
+    released). With stream=True the race is for the first token; the winner's
+    remaining deltas follow and there is no fallback after that.
 
     Args:
         task_type: Key in MODEL_CONFIG (e.g. "stage_1_analysis")
         messages: Chat messages list
-        **kwargs: Extra args passed to chat.completions.create()
-
-    Returns:
-        The assistant's response text.
+        **kwargs: Extra args passed to acall_llm (e.g. use_cache=False,
+                  stream=True) and on to chat.completions.create()
 
     Raises:
-        Exception: If primary + all fallback models fail.
+        ValueError: Unknown task_type.
+        RuntimeError: If primary + all fallback models fail.
     """
-    primary_model = config.MODEL_CONFIG.get(task_type)
-    if not primary_model:
-        raise ValueError(f"Unknown task_type: {task_type!r}. "
-                         f"Valid: {list(config.MODEL_CONFIG.keys())}")
+    primary_model, hedge_after, max_hedges = _task_spec(task_type)
+    models_to_try = _chain(task_type, primary_model)
+    if kwargs.get("stream"):
+        return _astream_with_fallback(
+            task_type, models_to_try, messages, hedge_after, max_hedges, **kwargs,
+        )
+    return await _arace(
+        task_type, models_to_try,
+        lambda model: acall_llm(model, messages, **_labels(task_type, model), **kwargs),
+        hedge_after, max_hedges,
+    )
 
-    models_to_try = [primary_model] + config.FALLBACK_CHAIN
-    last_error: Optional[Exception] = None
 
-    for model in models_to_try:
-        try:
-            logger.info("Trying model=%s for task=%s", model, task_type)
-            return call_llm(model, messages, **kwargs)
-        except Exception as e:
-            last_error = e
-            logger.warning(
-                "Model %s failed for task %s: %s. Trying next fallback...",
-                model, task_type, e,
+async def _arace(
+    task_type: str,
+    models_to_try: list[str],
+    start: Callable[[str], Awaitable],
+    hedge_after: float,
+    max_hedges: int,
+    kind: str = "total",
+    discard: Optional[Callable[[object], Awaitable]] = None,
+):
+    """
+    Run start(model) down the chain with hedging; return the first success.
+
+    The next model starts when every running one has failed, or — at most
+    max_hedges times — when the newest one exceeds its hedge delay. Losers are
+    cancelled; a loser that finished anyway is passed to discard().
+    """
+    queue = list(models_to_try)
+    pending: dict[asyncio.Task, str] = {}
+    last_error: Optional[BaseException] = None
+    hedges = 0
+
+    def launch(hedge: bool = False) -> str:
+        model = _next_model(queue, task_type, hedge)
+        pending[asyncio.ensure_future(start(model))] = model
+        return model
+
+    newest = launch()
+    try:
+        while pending:
+            timeout = None
+            if queue and hedges < max_hedges:
+                timeout = model_health.hedge_delay(newest, hedge_after, kind)
+            done, _ = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED,
             )
+            if not done:
+                hedges += 1
+                logger.warning(
+                    "Model %s slower than %.1fs for task %s — hedging with next model",
+                    newest, timeout, task_type,
+                )
+                newest = launch(hedge=True)
+                continue
+            winner = None
+            for task in done:
+                model = pending.pop(task)
+                if task.exception() is not None:
+                    last_error = task.exception()
+                    logger.warning(
+                        "Model %s failed for task %s: %s. Trying next fallback...",
+                        model, task_type, last_error,
+                    )
+                elif winner is None:
+                    winner = model, task.result()
+                elif discard is not None:
+                    await discard(task.result())
+            if winner is not None:
+                if hedges:
+                    logger.info("Hedged task %s won by model=%s", task_type, winner[0])
+                return winner[1]
+            if not pending and queue:
+                newest = launch()
+    finally:
+        for task in pending:
+            task.cancel()
+        for outcome in await asyncio.gather(*pending, return_exceptions=True):
+            if discard is not None and not isinstance(outcome, BaseException):
+                await discard(outcome)
 
     raise RuntimeError(
         f"All models failed for task {task_type!r}. "
@@ -166,16 +633,158 @@ def call_llm_with_fallback(
     ) from last_error
 
 
+async def _astream_with_fallback(
+    task_type: str,
+    models_to_try: list[str],
+    messages: list[dict],
+    hedge_after: float,
+    max_hedges: int,
+    **kwargs,
+) -> AsyncIterator[str]:
+    """
+    Streaming fallback, hedged on time to first token.
+
+    Each contender opens its stream and waits for its first delta; the first
+    one there is replayed to the caller and the others are closed. Once
+    deltas have reached the caller a failure is re-raised — switching models
+    mid-answer would splice two different responses together.
+    """
+    async def first_delta(model: str) -> tuple[str, AsyncIterator[str]]:
+        stream = await acall_llm(model, messages, **_labels(task_type, model), **kwargs)
+        try:
+            return await stream.__anext__(), stream
+        except StopAsyncIteration:
+            return "", stream
+
+    async def close(opened: tuple[str, AsyncIterator[str]]) -> None:
+        await opened[1].aclose()
+
+    first, stream = await _arace(
+        task_type, models_to_try, first_delta, hedge_after, max_hedges,
+        kind="ttft", discard=close,
+    )
+    if first:
+        yield first
+    async for delta in stream:
+        yield delta
+
+
+# ── Sync API ───────────────────────────────────────────────────────
+# Scripts and tests only — the bot, scheduler and batch runs use the a*
+# functions. Each sync call runs its async twin to completion on a private
+# event loop, so retry, hedging, cache, single-flight and telemetry behave
+# exactly the same (losing hedges are cancelled here too).
+
+def _close_loop(loop: asyncio.AbstractEventLoop) -> None:
+    if _async_loop is loop:
+        loop.run_until_complete(aclose_llm_client())
+    loop.run_until_complete(loop.shutdown_asyncgens())
+    loop.close()
+
+
+def run_sync(coro: Awaitable):
+    """
+    Run a coroutine to completion on a fresh event loop — the sync entry for
+    async pipelines (analyze_article, condense). Not callable from a running loop.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        _close_loop(loop)
+
+
+def _sync_stream(coro: Awaitable[AsyncIterator[str]]) -> Iterator[str]:
+    """
+    Open an async stream now (so opening errors raise here, as with a
+    non-streamed call) and return a sync iterator over its deltas.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        stream = loop.run_until_complete(coro)
+    except BaseException:
+        _close_loop(loop)
+        raise
+
+    def deltas() -> Iterator[str]:
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(stream.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            loop.run_until_complete(stream.aclose())
+            _close_loop(loop)
+
+    return deltas()
+
+
+def call_llm(
+    model: str,
+    messages: list[dict],
+    max_retries: int = 2,
+    retry_delay: float = 5.0,
+    use_cache: bool = True,
+    stream: bool = False,
+    task_type: Optional[str] = None,
+    fallback_position: Optional[int] = None,
+    **kwargs,
+) -> Union[str, Iterator[str]]:
+    """
+    Sync acall_llm — same arguments and behavior; with stream=True a sync
+    iterator of deltas.
+    """
+    call = acall_llm(
+        model, messages, max_retries=max_retries, retry_delay=retry_delay,
+        use_cache=use_cache, stream=stream, task_type=task_type,
+        fallback_position=fallback_position, **kwargs,
+    )
+    return _sync_stream(call) if stream else run_sync(call)
+
+
+def call_llm_with_fallback(
+    task_type: str,
+    messages: list[dict],
+    **kwargs,
+) -> Union[str, Iterator[str]]:
+    """Sync acall_llm_with_fallback — same chain, hedging and errors."""
+    call = acall_llm_with_fallback(task_type, messages, **kwargs)
+    return _sync_stream(call) if kwargs.get("stream") else run_sync(call)
+
+
 # ── Proxy Health Check ─────────────────────────────────────────────
-def check_proxy_health() -> bool:
+def check_proxy_health(scoreboard: bool = False) -> Union[bool, dict]:
     """
     Check if Antigravity Tools proxy is reachable.
 
     Calls GET /health (or /healthz) endpoint.
 
+    Args:
+        scoreboard: Also return the per-model scoreboard (circuit state,
+                    success rate, latency) — see model_health.scoreboard().
+
     Returns:
-        True if proxy is healthy, False otherwise.
+        True if proxy is healthy, False otherwise; with scoreboard=True a dict
+        {"proxy": bool, "models": {...}, "chains": {task_type: [models]},
+        "rate_limits": rate_limiter.stats(), "single_flight": single_flight.stats()}.
     """
+    healthy = _proxy_reachable()
+    if not scoreboard:
+        return healthy
+    return {
+        "proxy": healthy,
+        "models": model_health.scoreboard(),
+        "chains": {
+            task_type: model_health.order([task_model(task_type)] + config.FALLBACK_CHAIN)
+            for task_type in config.MODEL_CONFIG
+        },
+        "rate_limits": rate_limiter.stats(),
+        "single_flight": single_flight.stats(),
+    }
+
+
+def _proxy_reachable() -> bool:
     # Derive health URL from base_url (strip /v1 suffix)
     base = config.ANTIGRAVITY_BASE_URL.rstrip("/")
     if base.endswith("/v1"):
@@ -200,6 +809,8 @@ def load_prompt(filename: str) -> str:
     Load a prompt template from the prompts/{LANGUAGE}/ directory.
 
     Tries prompts/{LANGUAGE}/{filename} first, falls back to prompts/vi/{filename}.
+    Served from the prompt registry (read once, re-read when the file changes);
+    use prompt_registry.render() to fill in placeholders.
 
     Args:
         filename: Relative path within prompts/{lang}/ (e.g. "daily_analysis.md"
@@ -211,21 +822,4 @@ def load_prompt(filename: str) -> str:
     Raises:
         FileNotFoundError: If the prompt file doesn't exist in any locale.
     """
-    # Try current language first
-    path = config.PROMPTS_DIR / config.LANGUAGE / filename
-    if path.exists():
-        return path.read_text(encoding="utf-8")
-
-    # Fallback to Vietnamese
-    fallback_path = config.PROMPTS_DIR / "vi" / filename
-    if fallback_path.exists():
-        logger.warning(
-            "Prompt %s not found for locale '%s', falling back to 'vi'",
-            filename, config.LANGUAGE,
-        )
-        return fallback_path.read_text(encoding="utf-8")
-
-    raise FileNotFoundError(
-        f"Prompt file not found: {path}. "
-        f"Also tried fallback: {fallback_path}"
-    )
+    return prompt_registry.get(filename)
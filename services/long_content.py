@@ -0,0 +1,224 @@
+"""
+Long Content — token estimate, boundary-aware splitting and map-reduce
+condensing for articles/transcripts over a task's input budget.
+
+Content within the budget (MODEL_CONFIG[task]["max_input_tokens"]) passes
+through unchanged. Longer content is split at heading → paragraph → line →
+sentence → word boundaries into at most LONG_CONTENT_MAX_PARTS parts, each
+part is summarized concurrently (map, "chunk_summary" task), and the part
+summaries are merged into one text (reduce) that fits the budget. However
+long the input, that is at most LONG_CONTENT_MAX_PARTS concurrent calls
+(bounded by LLM_MAX_CONCURRENCY_PER_MODEL) followed by a single merge call.
+
+Usage:
+    from services.long_content import condense, estimate_tokens
+
+    estimate_tokens(text)                          # ~tokens, no tokenizer needed
+    condensed = condense(text, "stage_1_analysis")
+    print(condensed.text, condensed.parts)         # parts == 0 → unchanged
+
+    condensed = await acondense(text, "stage_1_analysis")
+"""
+import asyncio
+import logging
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+import config
+from services import prompt_registry
+from services.llm_client import acall_llm_with_fallback, run_sync, task_input_budget
+from services.tokens import BYTES_PER_TOKEN, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+TRUNCATED_NOTE = "\n\n[... truncated ...]"
+
+# Split levels, coarsest first: (separator, joiner used when packing parts back)
+_LEVELS = [
+    (re.compile(r"\n(?=#{1,6} )"), "\n"),          # markdown headings
+    (re.compile(r"\n[ \t]*\n"), "\n\n"),           # paragraphs
+    (re.compile(r"\n"), "\n"),                      # lines
+    (re.compile(r"(?<=[.!?…。])\s+"), " "),         # sentences
+    (re.compile(r"\s+"), " "),                      # words (unpunctuated transcripts)
+]
+
+
+@dataclass
+class Condensed:
+    """Text to send on, and how it was produced."""
+
+    text: str
+    parts: int = 0            # map calls made (0 = content was within budget)
+    original_tokens: int = 0
+    truncated: bool = False   # input exceeded LONG_CONTENT_MAX_PARTS parts
+
+
+# ── Estimate + split ───────────────────────────────────────────────
+
+def _size(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def split_text(text: str, max_tokens: int) -> list[str]:
+    """
+    Split text into chunks of at most ~max_tokens, at the coarsest boundary
+    that works: headings, then paragraphs, lines, sentences, words. Adjacent
+    small pieces are packed back together up to the limit.
+    """
+    return [chunk for chunk in _split(text, max_tokens * BYTES_PER_TOKEN, 0) if chunk.strip()]
+
+
+def _split(text: str, max_bytes: int, level: int) -> list[str]:
+    if _size(text) <= max_bytes:
+        return [text]
+    if level == len(_LEVELS):
+        # No boundary left (e.g. one giant token) — hard cut by characters
+        step = max(1, len(text) * max_bytes // _size(text))
+        return [text[i:i + step] for i in range(0, len(text), step)]
+
+    pattern, joiner = _LEVELS[level]
+    joiner_size = _size(joiner)
+    chunks: list[str] = []
+    current: list[str] = []
+    current_size = 0
+    for piece in pattern.split(text):
+        if not piece.strip():
+            continue
+        piece_size = _size(piece)
+        if piece_size > max_bytes:
+            if current:
+                chunks.append(joiner.join(current))
+                current, current_size = [], 0
+            chunks.extend(_split(piece, max_bytes, level + 1))
+            continue
+        added = piece_size + (joiner_size if current else 0)
+        if current and current_size + added > max_bytes:
+            chunks.append(joiner.join(current))
+            current, current_size = [piece], piece_size
+        else:
+            current.append(piece)
+            current_size += added
+    if current:
+        chunks.append(joiner.join(current))
+    return chunks
+
+
+# ── Map-reduce plan ────────────────────────────────────────────────
+
+def _plan(text: str, task_type: str) -> Optional[tuple[list[str], int, bool, int]]:
+    """
+    (parts, budget, truncated, original_tokens), or None when text fits the
+    task's budget as-is.
+    """
+    budget = task_input_budget(task_type)
+    tokens = estimate_tokens(text)
+    if budget is None or tokens <= budget:
+        return None
+
+    part_tokens = task_input_budget("chunk_summary") or budget
+    parts = split_text(text, part_tokens)
+    truncated = len(parts) > config.LONG_CONTENT_MAX_PARTS
+    if truncated:
+        parts = parts[:config.LONG_CONTENT_MAX_PARTS]
+    logger.info(
+        "Long content: ~%d tokens > %d budget for %s → %d parts%s",
+        tokens, budget, task_type, len(parts), " (truncated)" if truncated else "",
+    )
+    return parts, budget, truncated, tokens
+
+
+def _words(tokens: int) -> int:
+    """Word target for an output of ~tokens (prompts ask for words)."""
+    return max(100, tokens * 3 // 4)
+
+
+def _map_messages(part: str, index: int, total: int, budget: int) -> list[dict]:
+    # Part summaries together should leave the reduce call room to spare
+    max_words = min(800, _words(budget // 2 // total))
+    system_prompt = prompt_registry.render(
+        "chunk_summary.md", part=index + 1, total_parts=total, max_words=max_words,
+    )
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": part},
+    ]
+
+
+def _reduce_messages(summaries: list[str], budget: int) -> list[dict]:
+    system_prompt = prompt_registry.render(
+        "chunk_merge.md", total_parts=len(summaries), max_words=min(2000, _words(budget // 2)),
+    )
+    combined = "\n\n".join(f"## Part {i + 1}\n\n{s}" for i, s in enumerate(summaries))
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": combined},
+    ]
+
+
+def _part_fallback(part: str, total: int, budget: int) -> str:
+    """A failed map call keeps its share of the raw part instead."""
+    share = budget * BYTES_PER_TOKEN // 2 // total
+    return part if _size(part) <= share else part[:share] + TRUNCATED_NOTE
+
+
+def _fit(text: str, budget: int) -> str:
+    """Hard cap at the budget — last resort if reduce fails or overshoots."""
+    limit = budget * BYTES_PER_TOKEN
+    if _size(text) <= limit:
+        return text
+    return text.encode("utf-8")[:limit].decode("utf-8", "ignore") + TRUNCATED_NOTE
+
+
+def _finish(summaries: list[str], merged: Optional[str], plan: tuple) -> Condensed:
+    parts, budget, truncated, tokens = plan
+    text = merged or "\n\n".join(summaries)
+    return Condensed(
+        text=_fit(text, budget), parts=len(parts), original_tokens=tokens, truncated=truncated,
+    )
+
+
+# ── Sync / async entry points ──────────────────────────────────────
+
+def condense(text: str, task_type: str, use_cache: bool = True) -> Condensed:
+    """Sync acondense (scripts, tests) — runs it on a private event loop."""
+    return run_sync(acondense(text, task_type, use_cache))
+
+
+async def acondense(text: str, task_type: str, use_cache: bool = True) -> Condensed:
+    """
+    Fit text into task_type's input budget, map-reducing it if needed.
+
+    Map calls run concurrently on the pooled client. Never raises for LLM
+    failures: a failed part keeps a slice of its raw text, a failed merge
+    falls back to the joined part summaries, and the result is always cut
+    to the budget.
+    """
+    plan = _plan(text, task_type)
+    if plan is None:
+        return Condensed(text=text, original_tokens=estimate_tokens(text))
+    parts, budget, _, _ = plan
+
+    async def summarize(index: int) -> str:
+        try:
+            return await acall_llm_with_fallback(
+                "chunk_summary", _map_messages(parts[index], index, len(parts), budget),
+                use_cache=use_cache,
+            )
+        except Exception as e:
+            logger.warning("Part %d/%d summary failed: %s", index + 1, len(parts), e)
+            return _part_fallback(parts[index], len(parts), budget)
+
+    summaries = list(await asyncio.gather(*(summarize(i) for i in range(len(parts)))))
+
+    merged = None
+    if len(summaries) > 1:
+        try:
+            merged = await acall_llm_with_fallback(
+                task_type="chunk_summary",
+                messages=_reduce_messages(summaries, budget),
+                use_cache=use_cache,
+            )
+        except Exception as e:
+            logger.warning("Merging %d part summaries failed: %s", len(summaries), e)
+    return _finish(summaries, merged, plan)
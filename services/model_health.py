@@ -0,0 +1,240 @@
+"""
+Model Health — per-model scoreboard: rolling latency, success rate and a
+circuit breaker, used to hedge and order the fallback chain.
+
+Every successful network call records its latency: full response time for
+plain calls ("total"), time to first token for streams ("ttft"). Cache hits
+are not recorded, so the numbers describe the model, not the cache.
+
+Circuit states:
+    closed     normal; BREAKER_FAILURE_THRESHOLD consecutive failures → open
+    open       skipped by the fallback chain for BREAKER_COOLDOWN_SECONDS
+    half_open  cool-down over; one probe call is let through —
+               success → closed, failure → open again
+
+Usage:
+    from services import model_health
+
+    model_health.record_success("gemini-3-pro", 12.4)
+    model_health.record_failure("gemini-3-pro", error)
+    model_health.order(["gemini-3-pro", "gemini-3-flash"])  # open models dropped, healthiest first
+    model_health.hedge_delay("gemini-3-pro", 45.0)
+    model_health.scoreboard()                 # {model: {state, calls, success_rate, p50, p95, ...}}
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Optional
+
+import config
+
+WINDOW = 50  # most recent samples per (model, kind) / outcomes per model
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_lock = threading.Lock()
+_latencies: dict[tuple[str, str], deque] = defaultdict(lambda: deque(maxlen=WINDOW))
+_outcomes: dict[str, deque] = defaultdict(lambda: deque(maxlen=WINDOW))  # (monotonic, ok)
+
+
+class _Breaker:
+    """Circuit state of one model (guarded by _lock)."""
+
+    __slots__ = ("state", "consecutive_failures", "opened_at", "probe_at", "last_error")
+
+    def __init__(self):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_at = 0.0
+        self.last_error: Optional[str] = None
+
+    def cooled_down(self, now: float) -> bool:
+        return now - self.opened_at >= config.BREAKER_COOLDOWN_SECONDS
+
+    def available(self, now: float) -> bool:
+        """Whether a call may be sent now (without claiming the probe)."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return self.cooled_down(now)
+        # Half-open: one probe at a time; a probe that never reported back
+        # (cancelled hedge) stops blocking after another cool-down.
+        return now - self.probe_at >= config.BREAKER_COOLDOWN_SECONDS
+
+
+_breakers: dict[str, _Breaker] = defaultdict(_Breaker)
+
+
+# ── Recording ──────────────────────────────────────────────────────
+
+def record_success(model: str, seconds: float, kind: str = "total") -> None:
+    """One successful call: add its latency and close the circuit."""
+    with _lock:
+        _latencies[(model, kind)].append(seconds)
+        _outcomes[model].append((time.monotonic(), True))
+        breaker = _breakers[model]
+        breaker.consecutive_failures = 0
+        breaker.state = CLOSED
+
+
+def record_failure(model: str, error: Optional[BaseException] = None) -> None:
+    """One failed call; opens the circuit at the threshold or on a failed probe."""
+    now = time.monotonic()
+    with _lock:
+        _outcomes[model].append((now, False))
+        breaker = _breakers[model]
+        breaker.consecutive_failures += 1
+        if error is not None:
+            breaker.last_error = f"{type(error).__name__}: {error}"[:200]
+        if breaker.state == HALF_OPEN or (
+            breaker.state == CLOSED
+            and breaker.consecutive_failures >= config.BREAKER_FAILURE_THRESHOLD
+        ):
+            breaker.state = OPEN
+            breaker.opened_at = now
+
+
+def start_attempt(model: str) -> None:
+    """Called right before a chain call; a cooled-down open model becomes the half-open probe."""
+    now = time.monotonic()
+    with _lock:
+        breaker = _breakers[model]
+        if breaker.state != CLOSED and breaker.available(now):
+            breaker.state = HALF_OPEN
+            breaker.probe_at = now
+
+
+# ── Chain ordering ─────────────────────────────────────────────────
+
+def _recent(model: str, now: float) -> list[bool]:
+    """Outcomes within BREAKER_WINDOW_SECONDS — old failures stop counting."""
+    horizon = now - config.BREAKER_WINDOW_SECONDS
+    return [ok for at, ok in _outcomes.get(model, ()) if at >= horizon]
+
+
+def _failure_rate(model: str, now: float) -> float:
+    """Recent failure share; 0 until there are BREAKER_FAILURE_THRESHOLD outcomes."""
+    recent = _recent(model, now)
+    if len(recent) < config.BREAKER_FAILURE_THRESHOLD:
+        return 0.0
+    return recent.count(False) / len(recent)
+
+
+def order(models: list[str]) -> list[str]:
+    """
+    The chain to try: duplicates and unavailable (open) models removed, then
+    healthiest first — by recent failure rate in 10% steps, keeping the
+    configured order between equals (so the primary leads again once its
+    failures age out of the window). A model due for its half-open probe
+    keeps its configured place: one call decides whether it is back.
+    """
+    if not config.BREAKER_ENABLED:
+        return list(dict.fromkeys(models))
+    now = time.monotonic()
+    with _lock:
+        ranked = []
+        for position, model in enumerate(dict.fromkeys(models)):
+            breaker = _breakers[model]
+            if not breaker.available(now):
+                continue
+            probing = breaker.state != CLOSED
+            ranked.append((
+                0.0 if probing else round(_failure_rate(model, now), 1),
+                position,
+                model,
+            ))
+    return [model for *_, model in sorted(ranked)]
+
+
+def retry_in(model: str) -> float:
+    """Seconds until an open model may be probed (0 if available now)."""
+    now = time.monotonic()
+    with _lock:
+        breaker = _breakers.get(model)
+        if breaker is None or breaker.available(now):
+            return 0.0
+        since = breaker.opened_at if breaker.state == OPEN else breaker.probe_at
+        return max(0.0, config.BREAKER_COOLDOWN_SECONDS - (now - since))
+
+
+# ── Latency ────────────────────────────────────────────────────────
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def p95(model: str, kind: str = "total") -> Optional[float]:
+    """95th percentile latency, or None with fewer than HEDGE_MIN_SAMPLES samples."""
+    with _lock:
+        samples = list(_latencies.get((model, kind), ()))
+    if len(samples) < config.HEDGE_MIN_SAMPLES:
+        return None
+    return _percentile(samples, 0.95)
+
+
+def hedge_delay(model: str, budget: float, kind: str = "total") -> float:
+    """
+    Seconds to wait on `model` before hedging with the next one.
+
+    p95 latency × HEDGE_P95_FACTOR once the window has enough samples, never
+    above the task's budget (which is also the cold-start value) and never
+    below HEDGE_MIN_SECONDS.
+    """
+    observed = p95(model, kind)
+    if observed is None:
+        return budget
+    return max(config.HEDGE_MIN_SECONDS, min(observed * config.HEDGE_P95_FACTOR, budget))
+
+
+# ── Reporting ──────────────────────────────────────────────────────
+
+def scoreboard() -> dict:
+    """
+    {model: {"state", "calls", "success_rate", "consecutive_failures",
+    "retry_in", "last_error", "latency": {kind: {"samples", "p50", "p95"}}}}
+    for every model seen since start; calls/success_rate cover the last
+    BREAKER_WINDOW_SECONDS.
+    """
+    now = time.monotonic()
+    with _lock:
+        models = set(_outcomes) | {model for model, _ in _latencies}
+        windows = {key: list(values) for key, values in _latencies.items() if values}
+        rows = {}
+        for model in sorted(models):
+            outcomes = _recent(model, now)
+            breaker = _breakers[model]
+            rows[model] = {
+                "state": breaker.state,
+                "calls": len(outcomes),
+                "success_rate": (outcomes.count(True) / len(outcomes)) if outcomes else None,
+                "consecutive_failures": breaker.consecutive_failures,
+                "last_error": breaker.last_error,
+                "latency": {},
+            }
+    for (model, kind), samples in windows.items():
+        rows[model]["latency"][kind] = {
+            "samples": len(samples),
+            "p50": _percentile(samples, 0.5),
+            "p95": _percentile(samples, 0.95),
+        }
+    for model, row in rows.items():
+        row["retry_in"] = retry_in(model)
+    return rows
+
+
+def reset(model: Optional[str] = None) -> None:
+    """Forget samples and close the circuit — of one model, or all of them."""
+    with _lock:
+        if model is None:
+            _latencies.clear()
+            _outcomes.clear()
+            _breakers.clear()
+            return
+        for key in [k for k in _latencies if k[0] == model]:
+            del _latencies[key]
+        _outcomes.pop(model, None)
+        _breakers.pop(model, None)
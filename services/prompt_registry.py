@@ -0,0 +1,203 @@
+"""
+Prompt Registry — prompt templates loaded once, pre-compiled, invalidated by mtime.
+
+Each template is read from prompts/{LANGUAGE}/ (falling back to prompts/vi/)
+and split into literal/field segments once, so rendering is string joins
+instead of re-reading files and re-parsing format strings per article.
+Renders with the same arguments (Stage 1/2 system prompts within a day)
+come from a small memo.
+
+Files are re-stat'ed at most every PROMPT_RELOAD_CHECK_SECONDS (0 = only on
+an explicit reload()), and a changed mtime recompiles the template.
+
+Usage:
+    from services import prompt_registry
+
+    prompt_registry.preload()                          # every locale, at startup
+    text = prompt_registry.get("weekly.md")            # raw template text
+    prompt = prompt_registry.render("digest.md", n_articles=5)
+    prompt_registry.stats()                            # {name: {renders, memo_hits, avg_ms, ...}}
+    prompt_registry.reload()                           # drop everything (edited prompts)
+"""
+import logging
+import threading
+import time
+from pathlib import Path
+from string import Formatter
+from typing import Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_LANGUAGE = "vi"
+MEMO_SIZE = 8  # distinct argument sets remembered per template
+
+_lock = threading.Lock()
+_templates: dict[tuple[str, str], "_Template"] = {}  # (language, filename) → template
+_stats: dict[str, dict] = {}
+
+
+class _Template:
+    """One prompt file: text, compiled segments and a memo of recent renders."""
+
+    __slots__ = ("path", "mtime", "checked_at", "text", "segments", "memo")
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.mtime = path.stat().st_mtime
+        self.checked_at = time.monotonic()
+        self.text = path.read_text(encoding="utf-8")
+        self.segments = _compile(self.text)
+        self.memo: dict[tuple, str] = {}
+
+    def stale(self, now: float) -> bool:
+        """True if the file changed on disk (checked at most once per interval)."""
+        interval = config.PROMPT_RELOAD_CHECK_SECONDS
+        if interval <= 0 or now - self.checked_at < interval:
+            return False
+        self.checked_at = now
+        try:
+            return self.path.stat().st_mtime != self.mtime
+        except OSError:
+            return True
+
+    def render(self, kwargs: dict) -> str:
+        if self.segments is None:
+            return self.text.format(**kwargs)  # raises the usual format error
+        parts = []
+        for literal, field in self.segments:
+            parts.append(literal)
+            if field is not None:
+                parts.append(str(kwargs[field]))
+        return "".join(parts)
+
+
+def _compile(text: str) -> Optional[list[tuple[str, Optional[str]]]]:
+    """
+    (literal, field name) segments for plain `{name}` fields, or None when the
+    template can't be pre-split (bad braces, format specs, attribute access)
+    — render() then falls back to str.format.
+    """
+    segments = []
+    try:
+        for literal, field, spec, conversion in Formatter().parse(text):
+            if field is not None and (spec or conversion or not field.isidentifier()):
+                return None
+            segments.append((literal, field))
+    except ValueError:
+        return None
+    return segments
+
+
+# ── Lookup ─────────────────────────────────────────────────────────
+
+def _resolve(filename: str) -> Path:
+    """Current-language file, falling back to Vietnamese (as load_prompt always did)."""
+    path = config.PROMPTS_DIR / config.LANGUAGE / filename
+    if path.exists():
+        return path
+    fallback_path = config.PROMPTS_DIR / FALLBACK_LANGUAGE / filename
+    if fallback_path.exists():
+        logger.warning(
+            "Prompt %s not found for locale '%s', falling back to '%s'",
+            filename, config.LANGUAGE, FALLBACK_LANGUAGE,
+        )
+        return fallback_path
+    raise FileNotFoundError(
+        f"Prompt file not found: {path}. "
+        f"Also tried fallback: {fallback_path}"
+    )
+
+
+def _template(filename: str) -> _Template:
+    key = (config.LANGUAGE, filename)
+    now = time.monotonic()
+    with _lock:
+        template = _templates.get(key)
+        if template is not None and not template.stale(now):
+            return template
+    template = _Template(_resolve(filename))
+    with _lock:
+        _templates[key] = template
+    logger.debug("Prompt compiled: %s (%s)", filename, template.path)
+    return template
+
+
+def get(filename: str) -> str:
+    """
+    Raw text of prompts/{LANGUAGE}/{filename} (or the vi fallback).
+
+    Raises:
+        FileNotFoundError: If the prompt file doesn't exist in any locale.
+    """
+    return _template(filename).text
+
+
+def render(filename: str, **kwargs) -> str:
+    """get(filename).format(**kwargs), from compiled segments (memoized)."""
+    template = _template(filename)
+    started = time.perf_counter()
+    try:
+        memo_key = tuple(sorted(kwargs.items()))
+        hash(memo_key)
+    except TypeError:
+        memo_key = None
+
+    with _lock:
+        text = template.memo.get(memo_key) if memo_key is not None else None
+    hit = text is not None
+    if not hit:
+        text = template.render(kwargs)
+        if memo_key is not None:
+            with _lock:
+                if len(template.memo) >= MEMO_SIZE:
+                    template.memo.pop(next(iter(template.memo)))
+                template.memo[memo_key] = text
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    with _lock:
+        entry = _stats.setdefault(filename, {"renders": 0, "memo_hits": 0, "total_ms": 0.0, "max_ms": 0.0})
+        entry["renders"] += 1
+        entry["memo_hits"] += hit
+        entry["total_ms"] += elapsed_ms
+        entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+    return text
+
+
+# ── Management ─────────────────────────────────────────────────────
+
+def preload() -> int:
+    """Load + compile every locale's templates now. Returns how many were loaded."""
+    count = 0
+    for path in sorted(config.PROMPTS_DIR.glob("*/**/*.md")):
+        language = path.relative_to(config.PROMPTS_DIR).parts[0]
+        filename = path.relative_to(config.PROMPTS_DIR / language).as_posix()
+        template = _Template(path)
+        with _lock:
+            _templates[(language, filename)] = template
+        count += 1
+    logger.info("Prompt registry: %d templates preloaded from %s", count, config.PROMPTS_DIR)
+    return count
+
+
+def reload() -> None:
+    """Forget every compiled template; the next access re-reads from disk."""
+    with _lock:
+        _templates.clear()
+    logger.info("Prompt registry cleared — templates reload on next use")
+
+
+def stats() -> dict:
+    """{filename: {"renders", "memo_hits", "total_ms", "avg_ms", "max_ms"}}."""
+    with _lock:
+        result = {name: dict(entry) for name, entry in _stats.items()}
+    for entry in result.values():
+        entry["avg_ms"] = entry["total_ms"] / entry["renders"] if entry["renders"] else 0.0
+    return result
+
+
+def reset_stats() -> None:
+    """Zero the render counters (tests/benchmarks)."""
+    with _lock:
+        _stats.clear()
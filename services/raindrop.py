@@ -12,7 +12,7 @@ from typing import Optional
 import httpx
 
 from config import RAINDROP_API_TOKEN, DATABASE_PATH
-from db.repository import add_article, get_article_by_raindrop_id
+from db.repository import add_articles_bulk, get_existing_raindrop_ids
 
 logger = logging.getLogger(__name__)
 
@@ -100,6 +100,7 @@ def fetch_all_new_raindrops(db_path: Optional[str] = None) -> list[dict]:
 
     Uses stop-at-existing strategy: when a raindrop_id is found in DB,
     stop fetching further pages (older items are already synced).
+    Existence is checked with one bulk query per page.
 
     Args:
         db_path: Path to SQLite DB. Defaults to config DATABASE_PATH.
@@ -118,14 +119,17 @@ def fetch_all_new_raindrops(db_path: Optional[str] = None) -> list[dict]:
         if not items:
             break  # no more items or API error
 
+        existing_ids = get_existing_raindrop_ids(
+            db_path, [str(item.get("_id", "")) for item in items]
+        )
+
         found_existing = False
         for item in items:
             raindrop_id = str(item.get("_id", ""))
             if not raindrop_id:
                 continue
 
-            existing = get_article_by_raindrop_id(db_path, raindrop_id)
-            if existing:
+            if raindrop_id in existing_ids:
                 found_existing = True
                 break  # stop — older items already synced
             else:
@@ -151,6 +155,9 @@ def sync_raindrops_to_db(
     """
     Insert new raindrops into the articles table (dedup by raindrop_id).
 
+    All rows are written in a single transaction via add_articles_bulk();
+    duplicates (already in DB or repeated in the batch) are ignored.
+
     Args:
         raindrops: List of raindrop dicts from API.
         db_path: Path to SQLite DB. Defaults to config DATABASE_PATH.
@@ -162,6 +169,7 @@ def sync_raindrops_to_db(
         db_path = str(DATABASE_PATH)
 
     result = SyncResult(total_fetched=len(raindrops))
+    rows = []
 
     for item in raindrops:
         raindrop_id = str(item.get("_id", ""))
@@ -182,27 +190,21 @@ def sync_raindrops_to_db(
             result.skipped += 1
             continue
 
-        # Dedup check
-        existing = get_article_by_raindrop_id(db_path, raindrop_id)
-        if existing:
-            result.skipped += 1
-            continue
-
-        try:
-            add_article(
-                db_path=db_path,
-                raindrop_id=raindrop_id,
-                title=title,
-                source_url=link,
-                date=created,
-                raw_content=excerpt if excerpt else None,
-                collection_name=collection_name,
-            )
-            result.new_inserted += 1
-            logger.debug(f"Inserted: {title}")
-        except Exception as e:
-            logger.error(f"Failed to insert raindrop {raindrop_id}: {e}")
-            result.skipped += 1
+        rows.append({
+            "raindrop_id": raindrop_id,
+            "title": title,
+            "source_url": link,
+            "date": created,
+            "raw_content": excerpt if excerpt else None,
+            "collection_name": collection_name,
+        })
+
+    try:
+        result.new_inserted = add_articles_bulk(db_path, rows)
+        result.skipped += len(rows) - result.new_inserted
+    except Exception as e:
+        logger.error(f"Failed to insert {len(rows)} raindrops: {e}")
+        result.skipped += len(rows)
 
     logger.info(
         f"Sync complete: {result.new_inserted} new, "
@@ -211,14 +213,21 @@ def sync_raindrops_to_db(
     return result
 
 
-def pick_next_article(db_path: Optional[str] = None) -> Optional[dict]:
+def pick_next_article(
+    db_path: Optional[str] = None,
+    columns: Optional[tuple] = None,
+) -> Optional[dict]:
     """
     Pick the next article from the queue.
 
-    Order: priority DESC, date DESC (newest article first, high priority first).
+    Order: batch-analyzed articles first, then priority DESC, date DESC
+    (newest article first, high priority first) — what /analyze sends next.
+    Sorted and limited in SQL — only one row is loaded.
 
     Args:
         db_path: Path to SQLite DB. Defaults to config DATABASE_PATH.
+        columns: Optional column projection (e.g. ARTICLE_SUMMARY_FIELDS).
+            Defaults to all columns.
 
     Returns:
         Article dict or None if queue is empty.
@@ -226,12 +235,5 @@ def pick_next_article(db_path: Optional[str] = None) -> Optional[dict]:
     if db_path is None:
         db_path = str(DATABASE_PATH)
 
-    from db.repository import get_articles_by_status
-    articles = get_articles_by_status(db_path, "queued")
-
-    if not articles:
-        return None
-
-    # Sort: priority DESC, then date DESC (newest Raindrop article first)
-    articles.sort(key=lambda a: (a.get("priority") or 0, a.get("date") or ""), reverse=True)
-    return articles[0]
+    from db.repository import get_top_queued_article
+    return get_top_queued_article(db_path, columns=columns, include_analyzed=True)
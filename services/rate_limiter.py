@@ -0,0 +1,238 @@
+"""
+Rate Limiter — per-model token buckets for requests/min and estimated tokens/min.
+
+Every LLM request first takes 1 request + its estimated tokens from the
+model's buckets (LLM_RATE_LIMITS in config.py). Callers that don't fit wait
+in a per-model queue ordered by priority, then arrival: interactive calls
+(the default) go before background ones (scheduled jobs wrap themselves in
+`background()`), and nobody overtakes an earlier caller of the same
+priority. Buckets refill continuously and hold LLM_RATE_BURST_SECONDS of
+capacity, so sustained load runs at the configured ceiling instead of
+bursting into 429s.
+
+After a response the estimate is settled against the reported usage, and a
+429 pauses the model's bucket for the Retry-After time.
+
+Usage:
+    from services import rate_limiter
+
+    await rate_limiter.aacquire(model, tokens)     # waits until granted
+    rate_limiter.settle(model, tokens, actual)     # correct the estimate
+    rate_limiter.pause(model, 10.0)                # after a 429
+
+    with rate_limiter.background():
+        ...                                        # calls in here queue behind interactive ones
+"""
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Iterator, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BACKGROUND = 1
+_PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+MAX_POLL_SECONDS = 1.0  # waiters re-check at least this often
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("llm_priority", default=INTERACTIVE)
+_seq = itertools.count()
+
+
+@contextlib.contextmanager
+def background() -> Iterator[None]:
+    """LLM calls inside this block (and tasks it spawns) yield to interactive ones."""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class _Bucket:
+    """Continuously refilled bucket: `rate` units/second, at most `capacity`."""
+
+    __slots__ = ("rate", "capacity", "level", "updated")
+
+    def __init__(self, per_minute: float, now: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * config.LLM_RATE_BURST_SECONDS)
+        self.level = self.capacity
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def need(self, amount: float) -> float:
+        # A request bigger than the whole bucket goes through once it's full
+        return min(amount, self.capacity)
+
+    def wait_time(self, amount: float) -> float:
+        missing = self.need(amount) - self.level
+        return 0.0 if missing <= 0 else missing / self.rate
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "tokens", "granted")
+
+    def __init__(self, priority: int, tokens: int):
+        self.priority = priority
+        self.seq = next(_seq)
+        self.tokens = tokens
+        self.granted = False
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _ModelLimiter:
+    """Buckets + priority queue of one model (all state guarded by `lock`)."""
+
+    def __init__(self, model: str):
+        limits = {**config.LLM_RATE_LIMITS.get("default", {}), **config.LLM_RATE_LIMITS.get(model, {})}
+        now = time.monotonic()
+        self.model = model
+        self.lock = threading.Lock()
+        self.requests = _Bucket(limits.get("rpm", 60), now)
+        self.tokens = _Bucket(limits.get("tpm", 1_000_000), now)
+        self.paused_until = 0.0
+        self.queue: list[_Waiter] = []
+        self.stats = {
+            name: {"granted": 0, "waited": 0, "wait_s": 0.0, "max_wait_s": 0.0}
+            for name in _PRIORITY_NAMES.values()
+        }
+
+    def _dispatch(self, now: float) -> float:
+        """Grant queue heads in order while they fit; seconds until the next head fits."""
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        while self.queue:
+            if now < self.paused_until:
+                return self.paused_until - now
+            head = self.queue[0]
+            delay = max(self.requests.wait_time(1), self.tokens.wait_time(head.tokens))
+            if delay > 0:
+                return delay
+            self.requests.level -= self.requests.need(1)
+            self.tokens.level -= self.tokens.need(head.tokens)
+            head.granted = True
+            heapq.heappop(self.queue)
+        return 0.0
+
+    def enqueue(self, tokens: int) -> _Waiter:
+        waiter = _Waiter(_priority.get(), tokens)
+        with self.lock:
+            heapq.heappush(self.queue, waiter)
+        return waiter
+
+    def poll(self, waiter: _Waiter) -> float:
+        """0 once the waiter is granted, else how long to sleep before polling again."""
+        with self.lock:
+            if not waiter.granted:
+                delay = self._dispatch(time.monotonic())
+                if not waiter.granted:
+                    return min(max(delay, 0.005), MAX_POLL_SECONDS)
+        return 0.0
+
+    def cancel(self, waiter: _Waiter) -> None:
+        with self.lock:
+            if not waiter.granted and waiter in self.queue:
+                self.queue.remove(waiter)
+                heapq.heapify(self.queue)
+
+    def record(self, waiter: _Waiter, waited: float) -> None:
+        with self.lock:
+            entry = self.stats[_PRIORITY_NAMES[waiter.priority]]
+            entry["granted"] += 1
+            if waited >= 0.01:
+                entry["waited"] += 1
+                entry["wait_s"] += waited
+                entry["max_wait_s"] = max(entry["max_wait_s"], waited)
+        if waited >= 1.0:
+            logger.info(
+                "Rate limit: %s waited %.1fs (%s, %d tokens est.)",
+                self.model, waited, _PRIORITY_NAMES[waiter.priority], waiter.tokens,
+            )
+
+
+_limiters: dict[str, _ModelLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _limiter(model: str) -> _ModelLimiter:
+    limiter = _limiters.get(model)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.setdefault(model, _ModelLimiter(model))
+    return limiter
+
+
+# ── Public API ─────────────────────────────────────────────────────
+
+async def aacquire(model: str, tokens: int) -> None:
+    """
+    Wait until the model has capacity for one request of ~tokens, without
+    blocking the event loop; cancellation leaves the queue.
+    """
+    if not config.LLM_RATE_LIMIT_ENABLED:
+        return
+    limiter = _limiter(model)
+    waiter = limiter.enqueue(tokens)
+    started = time.monotonic()
+    try:
+        while delay := limiter.poll(waiter):
+            await asyncio.sleep(delay)
+    finally:
+        limiter.cancel(waiter)
+    limiter.record(waiter, time.monotonic() - started)
+
+
+def settle(model: str, estimated: int, actual: Optional[int]) -> None:
+    """Charge (or refund) the difference between estimated and reported tokens."""
+    if not config.LLM_RATE_LIMIT_ENABLED or not actual:
+        return
+    limiter = _limiter(model)
+    with limiter.lock:
+        bucket = limiter.tokens
+        bucket.level = min(bucket.capacity, bucket.level - (actual - estimated))
+
+
+def pause(model: str, seconds: float) -> None:
+    """Stop granting the model for `seconds` (proxy answered 429)."""
+    if not config.LLM_RATE_LIMIT_ENABLED:
+        return
+    limiter = _limiter(model)
+    with limiter.lock:
+        limiter.paused_until = max(limiter.paused_until, time.monotonic() + seconds)
+        limiter.requests.level = min(limiter.requests.level, 0.0)
+    logger.warning("Rate limit: %s paused for %.1fs after 429", model, seconds)
+
+
+def stats() -> dict:
+    """{model: {"queued", "rpm", "tpm", interactive/background: {granted, waited, wait_s, max_wait_s}}}."""
+    result = {}
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    for limiter in limiters:
+        with limiter.lock:
+            result[limiter.model] = {
+                "queued": len(limiter.queue),
+                "rpm": limiter.requests.rate * 60,
+                "tpm": limiter.tokens.rate * 60,
+                **{name: dict(entry) for name, entry in limiter.stats.items()},
+            }
+    return result
+
+
+def reset() -> None:
+    """Drop all buckets (config changes, tests)."""
+    with _limiters_lock:
+        _limiters.clear()
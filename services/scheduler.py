@@ -8,12 +8,14 @@ Usage:
     info = get_scheduler_info()       # get status for /schedule command
 """
 import asyncio
+import functools
 import logging
 from datetime import datetime
 from typing import Optional
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
 import config
 
@@ -25,6 +27,22 @@ _bot = None  # Telegram bot reference
 
 JOB_ID = "daily_sync_analyze"
 WEEKLY_JOB_ID = "weekly_synthesis"
+LEASE_REAPER_JOB_ID = "lease_reaper"
+BACKUP_JOB_ID = "db_backup"
+CHECKPOINT_JOB_ID = "wal_checkpoint"
+
+_last_backup = None  # db.backup.BackupResult of the latest nightly run
+
+
+def _background(job):
+    """Run a job's LLM calls at background priority (interactive commands go first)."""
+    from services import rate_limiter
+
+    @functools.wraps(job)
+    async def wrapper(*args, **kwargs):
+        with rate_limiter.background():
+            return await job(*args, **kwargs)
+    return wrapper
 
 
 def init_scheduler(bot) -> AsyncIOScheduler:
@@ -76,10 +94,39 @@ def init_scheduler(bot) -> AsyncIOScheduler:
     else:
         logger.info("Scheduler disabled (SCHEDULE_ENABLED=false)")
 
+    # Lease reaper — always on; first run at startup recovers claims from a crash
+    _scheduler.add_job(
+        _reap_leases_job,
+        IntervalTrigger(minutes=5, timezone=config.TIMEZONE),
+        id=LEASE_REAPER_JOB_ID,
+        name="Lease Reaper",
+        next_run_time=datetime.now(_scheduler.timezone),
+        replace_existing=True,
+    )
+
+    # DB maintenance — online backup nightly, PASSIVE WAL checkpoint on an interval
+    if config.BACKUP_ENABLED:
+        _scheduler.add_job(
+            _backup_job,
+            CronTrigger(hour=config.BACKUP_HOUR, minute=0, timezone=config.TIMEZONE),
+            id=BACKUP_JOB_ID,
+            name="DB Backup",
+            replace_existing=True,
+        )
+        logger.info("DB backup job → %02d:00 (%s)", config.BACKUP_HOUR, config.TIMEZONE)
+    _scheduler.add_job(
+        _checkpoint_job,
+        IntervalTrigger(minutes=config.CHECKPOINT_INTERVAL_MINUTES, timezone=config.TIMEZONE),
+        id=CHECKPOINT_JOB_ID,
+        name="WAL Checkpoint",
+        replace_existing=True,
+    )
+
     _scheduler.start()
     return _scheduler
 
 
+@_background
 async def _daily_job() -> None:
     """
     Daily scheduled job: sync from Raindrop → analyze next article → send to Telegram.
@@ -92,8 +139,10 @@ async def _daily_job() -> None:
     from bot.telegram_handler import send_long_message
     from services.raindrop import fetch_all_new_raindrops, sync_raindrops_to_db
     from services.extractor import extract_content
-    from services.analyzer import analyze_article
-    from db.repository import update_article_analysis, update_article_status
+    from services.analyzer import aanalyze_article
+    from services.batch_analysis import aload_analyzed
+    from db import async_repository as adb
+    from db.repository import ARTICLE_SUMMARY_FIELDS
 
     chat_id = config.TELEGRAM_CHAT_ID
     if not chat_id:
@@ -108,8 +157,10 @@ async def _daily_job() -> None:
     except Exception:
         pass
 
+    db_path = str(config.DATABASE_PATH)
+    article = None
+    completed = False
     try:
-        db_path = str(config.DATABASE_PATH)
         loop = _asyncio.get_running_loop()
 
         # Step 1: Sync from Raindrop
@@ -118,15 +169,14 @@ async def _daily_job() -> None:
         )
         if new_raindrops is None:
             new_raindrops = []
-        sync_result = await loop.run_in_executor(
-            None, partial(sync_raindrops_to_db, new_raindrops, db_path)
-        )
+        sync_result = await adb.run_write(sync_raindrops_to_db, new_raindrops, db_path)
         logger.info(f"Synced {sync_result.new_inserted} new articles")
 
-        # Step 2: Pick next queued article (reuse same function as /analyze)
-        from services.raindrop import pick_next_article
-        article = await loop.run_in_executor(
-            None, partial(pick_next_article, db_path)
+        # Step 2: Claim next article (same atomic lease as /analyze);
+        # ones a batch run already analyzed come first
+        article = await adb.claim_next_article(
+            db_path, config.ANALYSIS_LEASE_SECONDS,
+            columns=ARTICLE_SUMMARY_FIELDS + ("raw_content",), include_analyzed=True,
         )
 
         if not article:
@@ -142,47 +192,46 @@ async def _daily_job() -> None:
         fallback_text = article.get("raw_content", "")
         logger.info(f"Processing article #{article_id}: {title[:60]}")
 
-        # Step 3: Extract content (blocking → executor, using partial like /analyze)
-        extraction = await loop.run_in_executor(
-            None, partial(extract_content, source_url, fallback_text)
-        )
-
-        if not extraction.content:
-            await _bot.send_message(
-                chat_id=chat_id,
-                text=f"⚠️ Daily job: không extract được content cho #{article_id}: {title[:60]}",
+        if article.get("batch_analyzed_at"):
+            # Analyzed by a batch run — send the saved analysis, no LLM call
+            analysis = await aload_analyzed(db_path, article)
+        else:
+            # Step 3: Extract content (blocking → executor, using partial like /analyze)
+            extraction = await loop.run_in_executor(
+                None, partial(extract_content, source_url, fallback_text)
             )
-            return
 
-        # Step 4: Analyze (blocking LLM → executor, using partial like /analyze)
-        images = extraction.images if extraction.images else None
-        analysis = await loop.run_in_executor(
-            None,
-            partial(
-                analyze_article,
+            if not extraction.content:
+                await _bot.send_message(
+                    chat_id=chat_id,
+                    text=f"⚠️ Daily job: không extract được content cho #{article_id}: {title[:60]}",
+                )
+                return
+
+            # Step 4: Analyze (async LLM client, same as /analyze)
+            images = extraction.images if extraction.images else None
+            analysis = await aanalyze_article(
                 extraction.content,
                 article_link=source_url,
                 images=images,
-            ),
-        )
+            )
 
-        # Step 5: Save to DB — same as /analyze: update analysis fields + status
-        if extraction.content and extraction.source != "excerpt":
-            from db.repository import _connect
-            with _connect(db_path) as conn:
-                conn.execute(
-                    "UPDATE articles SET raw_content = ? WHERE id = ?",
-                    (extraction.content[:10000], article_id),
+            # Step 5: Save to DB — same as /analyze: update analysis fields + status
+            if extraction.content and extraction.source != "excerpt":
+                await adb.update_article_raw_content(
+                    db_path, article_id, extraction.content[:10000]
                 )
 
-        update_article_analysis(
-            db_path,
-            article_id,
-            summary=analysis.stage_2_output or analysis.stage_1_output or "",
-            researcher_output=analysis.stage_1_output or "",
-            synthesizer_output=analysis.stage_2_output or "",
-        )
-        update_article_status(db_path, article_id, "sent")
+            await adb.update_article_analysis(
+                db_path,
+                article_id,
+                summary=analysis.stage_2_output or analysis.stage_1_output or "",
+                researcher_output=analysis.stage_1_output or "",
+                synthesizer_output=analysis.stage_2_output or "",
+            )
+        completed = await adb.complete_claim(db_path, article_id, article["lease_owner"], "sent")
+        if not completed:
+            logger.warning(f"Lease lost for article #{article_id} — analysis saved anyway")
 
         # Step 6: Send to Telegram — NO parse_mode to avoid 400 errors on LLM output
         lines = [f"☀️ Daily Analysis — #{article_id}\n📰 {title}\n🔗 {source_url}\n"]
@@ -208,8 +257,74 @@ async def _daily_job() -> None:
             )
         except Exception:
             pass
+    finally:
+        if article and not completed:
+            await adb.release_claim(db_path, article["id"], article["lease_owner"])
 
 
+async def _reap_leases_job() -> None:
+    """Return articles claimed by crashed/stalled analyzers to their previous status."""
+    from db import async_repository as adb
+
+    try:
+        reaped = await adb.reap_expired_leases(str(config.DATABASE_PATH))
+        if reaped:
+            logger.warning(f"Reaped {reaped} expired article lease(s)")
+    except Exception as e:
+        logger.error(f"Lease reaper failed: {e}", exc_info=True)
+
+
+async def _backup_job() -> None:
+    """
+    Nightly DB maintenance: online backup → incremental vacuum.
+
+    The backup copies pages in small steps on its own connection, so the
+    writer thread keeps serving the bot while it runs.
+    """
+    global _last_backup
+    from db import async_repository as adb
+    from db.backup import backup_database, incremental_vacuum
+
+    db_path = str(config.DATABASE_PATH)
+    try:
+        loop = asyncio.get_running_loop()
+        _last_backup = await loop.run_in_executor(None, backup_database, db_path)
+        freed = await adb.run_write(incremental_vacuum, db_path)
+        logger.info(
+            "DB backup done: %.1f MB in %.2fs (%d free pages released)",
+            _last_backup.size_bytes / 1024 / 1024, _last_backup.duration_s, freed,
+        )
+    except Exception as e:
+        logger.error(f"DB backup failed: {e}", exc_info=True)
+
+
+async def _checkpoint_job() -> None:
+    """Fold the WAL back into the main file so it doesn't grow between restarts."""
+    from db import async_repository as adb
+    from db import llm_cache, llm_telemetry
+    from db.backup import checkpoint
+
+    db_path = str(config.DATABASE_PATH)
+    try:
+        # Telemetry rows and cache hits still buffered from a quiet period,
+        # then age out old telemetry
+        await adb.run_write(llm_telemetry.flush, db_path)
+        await adb.run_write(llm_cache.flush_hits, db_path)
+        pruned = await adb.run_write(llm_telemetry.prune, db_path)
+        if pruned:
+            logger.info("LLM telemetry: pruned %d rows past retention", pruned)
+    except Exception as e:
+        logger.warning(f"LLM telemetry flush failed: {e}")
+
+    try:
+        result = await adb.run_write(checkpoint, db_path)
+        if result["busy"]:
+            logger.debug("WAL checkpoint incomplete (readers active) — retrying next run")
+    except Exception as e:
+        logger.error(f"WAL checkpoint failed: {e}", exc_info=True)
+
+
+@_background
 async def _weekly_job():
     """
     Weekly scheduled job: generate weekly synthesis → send to Telegram.
@@ -222,9 +337,9 @@ async def _weekly_job():
     logger.info("=== Weekly synthesis job started ===")
 
     try:
-        from services.synthesizer import create_weekly_synthesis
+        from services.synthesizer import acreate_weekly_synthesis
 
-        result = create_weekly_synthesis(db_path)
+        result = await acreate_weekly_synthesis(db_path)
 
         if result.error:
             await _bot.send_message(chat_id=chat_id, text=f"⚠️ Weekly: {result.error}")
@@ -266,11 +381,20 @@ def get_scheduler_info() -> dict:
     if not _scheduler:
         return {"status": "not_initialized"}
 
+    backup = {}
+    if _last_backup:
+        backup = {
+            "last_backup": _last_backup.path,
+            "backup_size_bytes": _last_backup.size_bytes,
+            "backup_duration_s": _last_backup.duration_s,
+        }
+
     job = _scheduler.get_job(JOB_ID)
     if not job:
         return {
             "status": "disabled",
             "enabled": False,
+            **backup,
         }
 
     return {
@@ -281,6 +405,7 @@ def get_scheduler_info() -> dict:
         "timezone": config.TIMEZONE,
         "next_run": str(job.next_run_time) if job.next_run_time else "paused",
         "paused": job.next_run_time is None,
+        **backup,
     }
 
 
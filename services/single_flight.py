@@ -0,0 +1,146 @@
+"""
+Single-flight — concurrent duplicate work shares one execution.
+
+The daily job, a manual /analyze and a pasted URL can all extract and
+analyze the same article at the same moment. While a call for a key is in
+flight, later callers with the same key wait for its outcome (result or
+exception) instead of repeating the work; once it finishes the key is
+free again, so this only collapses overlapping calls — remembering answers
+is the response cache's job.
+
+Three groups are used: `extraction` (keyed by canonical URL), `analysis`
+(keyed by article content hash — see services/analyzer.py, which also fans
+a streamed run out to every caller) and `llm` (keyed by prompt hash). Sync
+callers share a concurrent.futures.Future across threads; async callers
+share an asyncio future on their loop. If an async leader is cancelled
+(e.g. it lost a hedged race), one of its waiters takes over instead of
+failing.
+
+Usage:
+    from services import single_flight
+
+    result = single_flight.extraction.do(key, fn, *args)       # sync, any thread
+    result = await single_flight.llm.ado(key, coro_fn, *args)  # async
+    single_flight.stats()  # {"extraction": {"leaders": .., "coalesced": ..}, "llm": {...}, ...}
+
+A key of None runs fn directly, uncounted.
+"""
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Group:
+    """In-flight calls of one kind, with leader/coalesced counters."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: dict[str, concurrent.futures.Future] = {}
+        self._acalls: dict[str, asyncio.Future] = {}
+        self._counters = {"leaders": 0, "coalesced": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def do(self, key: Optional[str], fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs), or wait for the identical call already running."""
+        if key is None:
+            return fn(*args, **kwargs)
+        with self._lock:
+            shared = self._calls.get(key)
+            if shared is None:
+                shared = self._calls[key] = concurrent.futures.Future()
+                self._counters["leaders"] += 1
+                leader = True
+            else:
+                self._counters["coalesced"] += 1
+                leader = False
+        if not leader:
+            logger.debug("Single-flight %s: joined in-flight %s", self.name, key[:16])
+            return shared.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            shared.set_exception(e)
+            raise
+        else:
+            shared.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    async def ado(
+        self, key: Optional[str], fn: Callable[..., Awaitable[Any]], *args, **kwargs
+    ) -> Any:
+        """Async do(): await fn(*args, **kwargs) or the identical call in flight on this loop."""
+        if key is None:
+            return await fn(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        while True:
+            shared = self._acalls.get(key)
+            if shared is None or shared.get_loop() is not loop:
+                break
+            self._count("coalesced")
+            logger.debug("Single-flight %s: joined in-flight %s", self.name, key[:16])
+            try:
+                # shield: a cancelled waiter mustn't cancel the others' future
+                return await asyncio.shield(shared)
+            except asyncio.CancelledError:
+                if not shared.cancelled():
+                    raise  # this waiter was cancelled
+                # The leader was cancelled — the next one through leads
+
+        shared = self._acalls[key] = loop.create_future()
+        # Nobody may be waiting; don't warn about an unretrieved exception
+        shared.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._count("leaders")
+        try:
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            shared.cancel()
+            raise
+        except BaseException as e:
+            shared.set_exception(e)
+            raise
+        else:
+            shared.set_result(result)
+            return result
+        finally:
+            if self._acalls.get(key) is shared:
+                del self._acalls[key]
+
+    def stats(self) -> dict:
+        """leaders (calls that did the work), coalesced (calls that waited instead), in_flight."""
+        with self._lock:
+            result = dict(self._counters)
+            result["in_flight"] = len(self._calls) + len(self._acalls)
+        return result
+
+    def reset(self) -> None:
+        """Zero the counters (tests/benchmarks)."""
+        with self._lock:
+            for name in self._counters:
+                self._counters[name] = 0
+
+
+extraction = Group("extraction")
+analysis = Group("analysis")
+llm = Group("llm")
+
+
+def stats() -> dict:
+    """Counters of every group: {"extraction": {...}, "analysis": {...}, "llm": {...}}."""
+    return {group.name: group.stats() for group in (extraction, analysis, llm)}
+
+
+def reset() -> None:
+    for group in (extraction, analysis, llm):
+        group.reset()
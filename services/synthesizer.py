@@ -6,6 +6,8 @@ Usage:
 
     result = create_weekly_synthesis(db_path)
     print(result.output)
+
+    result = await acreate_weekly_synthesis(db_path)  # async LLM call
 """
 import logging
 from dataclasses import dataclass
@@ -14,9 +16,12 @@ from typing import Optional
 
 from db.repository import (
     add_weekly_report,
-    get_recent_reflections,
+    get_activity_summary,
+    get_processed_articles_between,
+    iter_reflections,
 )
-from services.llm_client import call_llm_with_fallback, load_prompt
+from db.records import Reflection
+from services.llm_client import acall_llm_with_fallback, call_llm_with_fallback, load_prompt
 
 logger = logging.getLogger(__name__)
 
@@ -103,6 +108,60 @@ def create_weekly_synthesis(db_path: str) -> WeeklyResult:
     return result
 
 
+async def acreate_weekly_synthesis(db_path: str) -> WeeklyResult:
+    """
+    Async create_weekly_synthesis — gathering runs on a DB reader thread,
+    the LLM call is awaited on the pooled client.
+    """
+    from db import async_repository as adb
+
+    result = WeeklyResult()
+    today = date.today()
+    week_start = today - timedelta(days=7)
+    result.week_start = week_start.isoformat()
+
+    try:
+        context_parts = await adb.run_read(_gather_week_data, db_path, week_start, today, result)
+    except Exception as e:
+        logger.error(f"Error gathering weekly data: {e}")
+        result.error = f"Data gathering failed: {e}"
+        return result
+
+    if not context_parts:
+        result.error = "Tuần này chưa có hoạt động học tập nào."
+        return result
+
+    try:
+        logger.info("Generating weekly synthesis...")
+        result.output = await acall_llm_with_fallback(
+            task_type="weekly_synthesis",
+            messages=[
+                {"role": "system", "content": load_prompt("weekly.md")},
+                {"role": "user", "content": "\n\n---\n\n".join(context_parts)},
+            ],
+        )
+        result.success = True
+        logger.info("Weekly synthesis complete ✓")
+    except Exception as e:
+        logger.error(f"Weekly synthesis LLM failed: {e}")
+        result.error = f"LLM synthesis failed: {e}"
+        return result
+
+    try:
+        await adb.add_weekly_report(
+            db_path,
+            week_start=result.week_start,
+            themes_detected=result.output,
+            knowledge_gap="",
+            build_suggestion="",
+        )
+        logger.info("Weekly report saved to DB")
+    except Exception as e:
+        logger.error(f"Error saving weekly report: {e}")
+
+    return result
+
+
 def _gather_week_data(
     db_path: str,
     week_start: date,
@@ -110,24 +169,16 @@ def _gather_week_data(
     result: WeeklyResult,
 ) -> list[str]:
     """Gather all learning data from the past week."""
-    import sqlite3
-
     parts = []
 
-    conn = sqlite3.connect(db_path, timeout=10)
-    conn.row_factory = sqlite3.Row
-
     # ── Articles analyzed this week ──
     start_str = week_start.isoformat()
     end_str = today.isoformat()
-    articles = conn.execute(
-        """SELECT id, title, source_url, summary, status, created_at
-           FROM articles
-           WHERE status != 'queued'
-             AND created_at >= ? AND created_at <= ?
-           ORDER BY created_at DESC""",
-        (start_str, end_str + "T23:59:59"),
-    ).fetchall()
+    activity = get_activity_summary(db_path, start_str, end_str)
+    articles = get_processed_articles_between(
+        db_path, start_str, end_str + "T23:59:59",
+        columns=("id", "title", "source_url", "summary", "status", "created_at"),
+    )
 
     result.articles_count = len(articles)
     if articles:
@@ -142,38 +193,30 @@ def _gather_week_data(
         parts.append("\n".join(article_lines))
 
     # ── Reflections ──
-    reflections = get_recent_reflections(db_path, days=7)
-    result.reflections_count = len(reflections) if reflections else 0
+    # Stats come from the daily rollup; the rows are only needed as LLM context
+    reflections = list(iter_reflections(db_path, since=start_str, record=Reflection))
+    result.reflections_count = activity["reflections"]
+    result.avg_confidence = activity["avg_confidence"]
     if reflections:
         ref_lines = [f"## Reflections ({len(reflections)} entries)\n"]
-        scores = []
         for r in reflections:
-            ref_lines.append(f"- Insight: {r['reflection_text'][:100]}")
-            ref_lines.append(f"  Action: {r['action_item'][:100]}")
-            ref_lines.append(f"  Confidence: {r['confidence_score']}/10")
-            scores.append(r["confidence_score"])
-        result.avg_confidence = sum(scores) / len(scores) if scores else 0
+            ref_lines.append(f"- Insight: {(r.reflection_text or '')[:100]}")
+            ref_lines.append(f"  Action: {(r.action_item or '')[:100]}")
+            ref_lines.append(f"  Confidence: {r.confidence_score}/10")
         parts.append("\n".join(ref_lines))
 
     # ── Sessions ──
-    sessions = conn.execute(
-        """SELECT date, duration_minutes FROM sessions
-           WHERE date >= ? AND date <= ?""",
-        (start_str, end_str),
-    ).fetchall()
-
-    total_minutes = sum(s["duration_minutes"] for s in sessions) if sessions else 0
+    session_count = activity["sessions"]
+    total_minutes = activity["session_minutes"]
     result.total_session_minutes = total_minutes
-    if sessions:
+    if session_count:
         parts.append(
             f"## Sessions\n\n"
-            f"- Tổng: {len(sessions)} sessions\n"
+            f"- Tổng: {session_count} sessions\n"
             f"- Tổng thời gian: {total_minutes} phút\n"
-            f"- Trung bình: {total_minutes // len(sessions)} phút/session"
+            f"- Trung bình: {total_minutes // session_count} phút/session"
         )
 
-    conn.close()
-
     # ── Stats summary ──
     if parts:
         stats = (
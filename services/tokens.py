@@ -0,0 +1,35 @@
+"""
+Token estimates — rough counts without a tokenizer, shared by the long-content
+budgeting and the rate limiter.
+
+Usage:
+    from services.tokens import estimate_tokens, message_tokens
+
+    estimate_tokens("some text")      # UTF-8 bytes / 4
+    message_tokens(messages)          # chat messages, images at a flat rate
+"""
+import math
+
+BYTES_PER_TOKEN = 4  # UTF-8 bytes; ~4 chars/token for English, denser for vi/CJK
+IMAGE_TOKENS = 800   # flat estimate per image part (the base64 payload isn't prompt text)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (UTF-8 bytes / 4) — close enough for budgeting, no tokenizer."""
+    return math.ceil(len(text.encode("utf-8")) / BYTES_PER_TOKEN)
+
+
+def message_tokens(messages: list[dict]) -> int:
+    """Estimated prompt tokens of a chat request (text + multimodal parts)."""
+    total = 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            total += estimate_tokens(content)
+        elif isinstance(content, list):
+            for part in content:
+                if part.get("type") == "text":
+                    total += estimate_tokens(part.get("text", ""))
+                elif part.get("type") == "image_url":
+                    total += IMAGE_TOKENS
+    return total
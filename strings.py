@@ -22,6 +22,7 @@ STRINGS = {
             "📖 *Học tập*\n"
             "/analyze — Phân tích bài tiếp theo\n"
             "/analyze <id> — Phân tích lại bài theo ID\n"
+            "/analyze <id> fresh — Phân tích lại, bỏ qua cache LLM\n"
             "/next — Xem bài tiếp theo (không phân tích)\n"
             "/skip — Bỏ qua bài tiếp theo\n"
             "/overview — Overview 5 bài queued cũ nhất\n"
@@ -29,7 +30,9 @@ STRINGS = {
             "/reflect — Reflect bài vừa đọc\n"
             "/reflect <id> — Reflect bài cụ thể\n"
             "/cancel — Hủy reflection đang làm\n"
-            "/weekly — Tổng hợp tuần học tập\n\n"
+            "/weekly — Tổng hợp tuần học tập\n"
+            "/search <từ khóa> — Tìm trong bài viết + reflections\n"
+            "/search — Trang kết quả tiếp theo\n\n"
             "⏱️ *Tracking*\n"
             "/session start — Bắt đầu session học\n"
             "/session stop — Kết thúc session\n"
@@ -38,6 +41,8 @@ STRINGS = {
             "⚙️ *Quản lý*\n"
             "/sync — Sync bài mới từ Raindrop\n"
             "/schedule — Xem/đổi lịch tự động\n"
+            "/models — Tình trạng các model LLM\n"
+            "/metrics — Latency + tokens LLM theo ngày\n"
             "/reset — Reset status (dev)"
         ),
 
@@ -101,6 +106,7 @@ STRINGS = {
             "📖 *Learning*\n"
             "/analyze — Analyze next article\n"
             "/analyze <id> — Analyze specific article by ID\n"
+            "/analyze <id> fresh — Re-analyze, bypassing the LLM cache\n"
             "/next — Preview next article (no analysis)\n"
             "/skip — Skip next article\n"
             "/overview — Overview 5 oldest queued articles\n"
@@ -108,7 +114,9 @@ STRINGS = {
             "/reflect — Reflect on last read article\n"
             "/reflect <id> — Reflect on specific article\n"
             "/cancel — Cancel ongoing reflection\n"
-            "/weekly — Weekly learning synthesis\n\n"
+            "/weekly — Weekly learning synthesis\n"
+            "/search <query> — Search articles + reflections\n"
+            "/search — Next page of results\n\n"
             "⏱️ *Tracking*\n"
             "/session start — Start learning session\n"
             "/session stop — End session\n"
@@ -117,6 +125,8 @@ STRINGS = {
             "⚙️ *Management*\n"
             "/sync — Sync new articles from Raindrop\n"
             "/schedule — View/change auto schedule\n"
+            "/models — LLM model health\n"
+            "/metrics — LLM latency + tokens per day\n"
             "/reset — Reset status (dev)"
         ),
 
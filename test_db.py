@@ -1,4 +1,5 @@
 """Integration tests for database layer."""
+import contextlib
 import os
 import sys
 import tempfile
@@ -12,6 +13,41 @@ def log(msg):
     print(msg, flush=True)
 
 
+@contextlib.contextmanager
+def mock_llm(handler):
+    """
+    Point the async LLM client at handler(request) → httpx.Response instead of
+    the proxy (handler may be async). Cache, telemetry and rate limits are off.
+    """
+    import httpx
+    import config
+
+    class Client(httpx.AsyncClient):
+        def __init__(self, **kwargs):
+            kwargs.pop("http2", None)
+            super().__init__(transport=httpx.MockTransport(handler), **kwargs)
+
+    names = ("LLM_CACHE_ENABLED", "LLM_TELEMETRY_ENABLED", "LLM_RATE_LIMIT_ENABLED")
+    saved = httpx.AsyncClient, {name: getattr(config, name) for name in names}
+    httpx.AsyncClient = Client
+    for name in names:
+        setattr(config, name, False)
+    try:
+        yield
+    finally:
+        httpx.AsyncClient = saved[0]
+        for name, value in saved[1].items():
+            setattr(config, name, value)
+
+
+def completion(text, model="mock"):
+    """OpenAI-style chat completion body."""
+    return {"id": "c", "object": "chat.completion", "created": 0, "model": model,
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": text}}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}}
+
+
 with open("test_results.txt", "w", encoding="utf-8") as f:
     f.write("=== Database Integration Test Results ===\n\n")
 
@@ -32,12 +68,17 @@ try:
     import sqlite3
     conn = sqlite3.connect(db_path)
     tables = conn.execute(
-        "SELECT name FROM sqlite_master WHERE type='table' ORDER BY name"
+        "SELECT name FROM sqlite_master WHERE type='table' "
+        "AND name NOT LIKE 'search_fts_%' ORDER BY name"  # skip FTS5 shadow tables
     ).fetchall()
     table_names = [t[0] for t in tables]
     conn.close()
 
-    expected = ["articles", "batch_digests", "reflections", "sessions", "weekly_reports"]
+    expected = [
+        "article_content", "articles", "batch_digests", "content_dictionaries",
+        "daily_activity", "llm_cache", "llm_calls", "reflections", "search_fts", "sessions",
+        "weekly_reports",
+    ]
     assert table_names == expected, f"Expected {expected}, got {table_names}"
     log(f"  Tables: {table_names}")
     log("  RESULT: PASS ✓\n")
@@ -50,7 +91,7 @@ try:
     from db.repository import (
         add_article, get_article_by_id, get_articles_by_status,
         update_article_status, update_article_analysis,
-        get_next_queued_article, get_oldest_queued_articles,
+        get_next_queued_article, get_newest_queued_articles,
         count_articles_by_status,
     )
 
@@ -89,9 +130,9 @@ try:
     assert next_art["id"] == id2, "Priority article should be first"
     log(f"  Next queued (priority): {next_art['title']}")
 
-    oldest = get_oldest_queued_articles(db_path, 5)
-    assert len(oldest) == 1, f"Expected 1 queued, got {len(oldest)}"
-    log(f"  Oldest queued: {len(oldest)}")
+    newest = get_newest_queued_articles(db_path, 5)
+    assert len(newest) == 1, f"Expected 1 queued, got {len(newest)}"
+    log(f"  Newest queued: {len(newest)}")
 
     counts = count_articles_by_status(db_path)
     assert counts.get("sent") == 1
@@ -188,6 +229,1317 @@ try:
 except Exception as e:
     log(f"  RESULT: FAIL ✗ — {e}\n")
 
+# ── Test 6: Migrations + query plans ───────────────────────────────
+log("TEST 6: Schema migrations + hot-path indexes...")
+try:
+    from db.models import SCHEMA_VERSION
+
+    conn = sqlite3.connect(db_path)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    assert version == SCHEMA_VERSION, f"Expected user_version {SCHEMA_VERSION}, got {version}"
+    log(f"  user_version: {version}")
+
+    def query_plan(sql, params=()):
+        rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        return " | ".join(r[3] for r in rows)
+
+    plans = {
+        "idx_articles_status_priority_queued": query_plan(
+            "SELECT * FROM articles WHERE status = 'queued' "
+            "ORDER BY priority DESC, queued_at ASC LIMIT 1"
+        ),
+        "idx_articles_status_priority_date": query_plan(
+            "SELECT id, title FROM articles WHERE status = 'queued' "
+            "ORDER BY priority DESC, date DESC, queued_at ASC LIMIT 1"
+        ),
+        "idx_articles_status_queued": query_plan(
+            "SELECT * FROM articles WHERE status = ? ORDER BY queued_at", ("sent",)
+        ),
+        "idx_reflections_created_at": query_plan(
+            "SELECT * FROM reflections WHERE created_at >= ? ORDER BY created_at DESC",
+            ("2026-01-01",),
+        ),
+        "idx_sessions_date": query_plan(
+            "SELECT * FROM sessions WHERE date = ? ORDER BY start_time", ("2026-02-15",)
+        ),
+    }
+    for index_name, plan in plans.items():
+        assert index_name in plan, f"{index_name} not used: {plan}"
+        assert "TEMP B-TREE" not in plan, f"Extra sort step: {plan}"
+        log(f"  {index_name}: {plan}")
+    conn.close()
+
+    # Re-running init_db must not re-apply migrations
+    init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    conn.close()
+    log("  Re-init keeps version: OK ✓")
+
+    log("  RESULT: PASS ✓\n")
+except Exception as e:
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+# ── Test 7: Bulk raindrop sync path ────────────────────────────────
+log("TEST 7: Bulk insert + existence check...")
+try:
+    from db.repository import add_articles_bulk, get_existing_raindrop_ids
+
+    rows = [
+        {"raindrop_id": f"bulk_{i}", "title": f"Bulk {i}", "source_url": f"https://bulk.com/{i}"}
+        for i in range(1200)
+    ]
+    inserted = add_articles_bulk(db_path, rows)
+    assert inserted == 1200, f"Expected 1200 inserted, got {inserted}"
+
+    # Re-insert overlapping batch — duplicates ignored
+    inserted = add_articles_bulk(db_path, rows[1100:] + [
+        {"raindrop_id": "bulk_new", "title": "New", "source_url": "https://bulk.com/new"},
+    ])
+    assert inserted == 1, f"Expected 1 new row, got {inserted}"
+    log("  Duplicates ignored: OK ✓")
+
+    existing = get_existing_raindrop_ids(db_path, [r["raindrop_id"] for r in rows] + ["nope", ""])
+    assert len(existing) == 1200 and "nope" not in existing
+    log(f"  Existing ids found: {len(existing)}")
+
+    log("  RESULT: PASS ✓\n")
+except Exception as e:
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+# ── Test 8: Projected article queries ──────────────────────────────
+log("TEST 8: Column projection + lazy heavy fields...")
+try:
+    from db.repository import (
+        ARTICLE_SUMMARY_FIELDS, get_article_fields, get_top_queued_article,
+    )
+
+    add_article(db_path, "proj_1", "Projected", "https://proj.com/1",
+                raw_content="x" * 5000, priority=5)
+    top = get_top_queued_article(db_path, columns=ARTICLE_SUMMARY_FIELDS)
+    assert top["title"] == "Projected", f"Unexpected top: {top['title']}"
+    assert "raw_content" not in top, "Summary row must not carry raw_content"
+    log(f"  Top queued (summary): #{top['id']} {top['title']}")
+
+    heavy = get_article_fields(db_path, top["id"], ("raw_content",))
+    assert len(heavy["raw_content"]) == 5000
+    log(f"  Lazy raw_content: {len(heavy['raw_content'])} chars")
+
+    try:
+        get_articles_by_status(db_path, "queued", columns=("id", "1; DROP TABLE articles"))
+        log("  Column validation: FAIL ✗ — should have raised")
+    except ValueError:
+        log("  Unknown column rejected: OK ✓")
+
+    log("  RESULT: PASS ✓\n")
+except Exception as e:
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+# ── Test 9: Compressed content store ───────────────────────────────
+log("TEST 9: Compressed content store + migration...")
+try:
+    from db.connection import close_all, get_connection
+    from db.models import _SCHEMA_SQL
+    from db.repository import update_article_raw_content
+    from db.content_store import train_dictionary
+
+    text = "Retrieval-Augmented Generation in production. " * 200
+    aid = add_article(db_path, "store_1", "Stored", "https://store.com/1", raw_content=text)
+    update_article_analysis(db_path, aid, summary="Short summary", synthesizer_output=text)
+
+    conn = sqlite3.connect(db_path)
+    inline = conn.execute("SELECT raw_content, summary FROM articles WHERE id = ?", (aid,)).fetchone()
+    assert inline == (None, None), f"Heavy text still inline: {inline}"
+    codec, size, length = conn.execute(
+        "SELECT codec, length(data), text_length FROM article_content "
+        "WHERE article_id = ? AND field = 'raw_content'", (aid,)
+    ).fetchone()
+    conn.close()
+    assert codec == "zlib" and size < length, f"Not compressed: {codec} {size}/{length}"
+    log(f"  raw_content: {length} chars → {size} bytes ({codec})")
+
+    art = get_article_by_id(db_path, aid)
+    assert art["raw_content"] == text and art["summary"] == "Short summary"
+    assert art["synthesizer_output"] == text
+    log("  Round-trip via get_article_by_id: OK ✓")
+
+    update_article_raw_content(db_path, aid, "Better extraction " * 50)
+    assert get_article_fields(db_path, aid, ("raw_content",))["raw_content"].startswith("Better")
+    log("  update_article_raw_content: OK ✓")
+
+    # Trained dictionary — new writes use it, old blobs stay readable
+    for i in range(5):
+        add_article(db_path, f"dict_{i}", f"Dict {i}", f"https://dict.com/{i}",
+                    raw_content=f"## 🔬 Researcher\nKey insight number {i}.\n"
+                                "## 🏗️ Architect\nHow this fits a production pipeline.\n"
+                                "## 🤔 Skeptic\nWhat could go wrong at scale?\n" + text)
+    conn = get_connection(db_path)
+    with conn:
+        dict_id = train_dictionary(conn)
+    assert dict_id is not None, "Dictionary not trained"
+    did = add_article(db_path, "dict_new", "Dict new", "https://dict.com/new",
+                      raw_content="## 🔬 Researcher\nFresh article. " + text)
+    assert get_article_fields(db_path, did, ("raw_content",))["raw_content"].endswith(text)
+    assert get_article_by_id(db_path, aid)["synthesizer_output"] == text
+    log(f"  Trained dictionary #{dict_id}: OK ✓")
+
+    # Legacy DB at version 2 with inline content → migration 003 moves it
+    legacy_path = os.path.join(tempfile.gettempdir(), "test_learning_legacy.db")
+    if os.path.exists(legacy_path):
+        os.remove(legacy_path)
+    close_all()
+    conn = sqlite3.connect(legacy_path)
+    conn.executescript(_SCHEMA_SQL)
+    conn.execute("PRAGMA user_version = 2")
+    conn.execute(
+        "INSERT INTO articles (raindrop_id, title, raw_content, summary) VALUES (?, ?, ?, ?)",
+        ("legacy_1", "Legacy", text, "Legacy summary"),
+    )
+    conn.commit()
+    conn.close()
+
+    init_db(legacy_path)
+    legacy = get_article_by_id(legacy_path, 1)
+    assert legacy["raw_content"] == text and legacy["summary"] == "Legacy summary"
+    conn = sqlite3.connect(legacy_path)
+    assert conn.execute("SELECT raw_content FROM articles WHERE id = 1").fetchone()[0] is None
+    conn.close()
+    close_all()
+    os.remove(legacy_path)
+    log("  Legacy inline content migrated: OK ✓")
+
+    log("  RESULT: PASS ✓\n")
+except Exception as e:
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+# ── Test 10: Full-text search ──────────────────────────────────────
+log("TEST 10: Full-text search (FTS5)...")
+try:
+    import time
+    from db.repository import search
+
+    sid = add_article(db_path, "fts_1", "Tối ưu hóa truy vấn SQLite", "https://fts.com/1",
+                      raw_content="Bài viết về chỉ mục và kế hoạch truy vấn. " * 20)
+    update_article_analysis(db_path, sid, synthesizer_output="Kết luận: dùng WAL và covering index.")
+    oid = add_article(db_path, "fts_2", "Unrelated note", "https://fts.com/2",
+                      raw_content="Nothing to see here, just a note about gardening.")
+    add_reflection(db_path, oid, "Học được cách dùng toi uu cho pipeline", "Thử FTS5", 8)
+
+    # Diacritics-insensitive, best field per document, title boosted
+    page = search(db_path, "toi uu")
+    kinds = [(r["kind"], r["article_id"]) for r in page["results"]]
+    assert ("article", sid) in kinds and ("reflection", oid) in kinds, kinds
+    assert page["results"][0]["article_id"] == sid, "Title match should rank first"
+    log(f"  'toi uu' → {kinds}: OK ✓")
+
+    # Snippet from compressed content (trigger decoded it via content_text)
+    hit = search(db_path, "covering")["results"][0]
+    assert hit["article_id"] == sid and hit["field"] == "synthesizer_output"
+    assert "«covering»" in hit["snippet"], hit["snippet"]
+    log(f"  Snippet: {hit['snippet']!r}")
+
+    # Prefix match on the last term + FTS syntax in input is inert
+    assert search(db_path, "garden")["results"][0]["article_id"] == oid
+    assert search(db_path, '"garden(')["results"][0]["article_id"] == oid
+    assert search(db_path, "  ")["results"] == []
+    log("  Prefix match + sanitized query: OK ✓")
+
+    # Triggers keep the index in sync on update/delete
+    update_article_analysis(db_path, sid, synthesizer_output="Replaced conclusion about caching.")
+    assert not search(db_path, "covering")["results"], "Stale content still indexed"
+    assert search(db_path, "caching")["results"][0]["article_id"] == sid
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM articles WHERE id = ?", (oid,))
+    conn.commit()
+    conn.close()
+    assert not any(r["kind"] == "article" for r in search(db_path, "gardening")["results"])
+    log("  Index follows updates/deletes: OK ✓")
+
+    # Keyset pagination: pages are disjoint and cover everything
+    for i in range(25):
+        add_article(db_path, f"fts_page_{i}", f"Paging article {i}", f"https://fts.com/p{i}",
+                    raw_content=f"Pagination keyword appears here {i}.")
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = search(db_path, "pagination", limit=10, cursor=cursor)
+        seen.extend(r["article_id"] for r in page["results"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert len(seen) == 25 and len(set(seen)) == 25 and pages == 3, (len(seen), pages)
+    log(f"  Pagination: 25 hits over {pages} pages: OK ✓")
+
+    start = time.perf_counter()
+    for _ in range(20):
+        search(db_path, "pagination keyword")
+    log(f"  Search latency: {(time.perf_counter() - start) / 20 * 1000:.2f} ms/query")
+
+    log("  RESULT: PASS ✓\n")
+except Exception as e:
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+# ── Test 11: Daily activity rollup ─────────────────────────────────
+log("TEST 11: daily_activity rollup...")
+try:
+    from datetime import date, timedelta
+    from db.repository import (
+        add_session, get_activity_summary, get_daily_activity, get_reflection_days,
+    )
+    from bot.telegram_handler import calculate_streak
+
+    # Rollup must match a full scan of the source tables
+    conn = sqlite3.connect(db_path)
+    refl_count, conf_sum = conn.execute(
+        "SELECT COUNT(*), SUM(confidence_score) FROM reflections"
+    ).fetchone()
+    sess_minutes = conn.execute("SELECT SUM(duration_minutes) FROM sessions").fetchone()[0]
+    conn.close()
+    summary = get_activity_summary(db_path)
+    assert summary["reflections"] == refl_count and summary["confidence_sum"] == conf_sum
+    assert summary["session_minutes"] == sess_minutes, (summary, sess_minutes)
+    log(f"  Totals: {refl_count} reflections, avg {summary['avg_confidence']:.1f}: OK ✓")
+
+    # Session + status transition hooks
+    today = date.today().isoformat()
+    before = get_activity_summary(db_path, today, today)
+    add_session(db_path, today, "07:00", "07:45", 45, "reading")
+    aid = add_article(db_path, "activity_1", "Activity", "https://act.com/1")
+    update_article_status(db_path, aid, "sent")
+    update_article_status(db_path, aid, "sent")  # no-op transition isn't counted
+    update_article_status(db_path, aid, "skipped")
+    after = get_activity_summary(db_path, today, today)
+    assert after["session_minutes"] - before["session_minutes"] == 45
+    assert after["sessions"] - before["sessions"] == 1
+    assert after["articles_sent"] - before["articles_sent"] == 1
+    assert after["articles_skipped"] - before["articles_skipped"] == 1
+    log("  Session + status transitions: OK ✓")
+
+    # Deleting a reflection rolls it back out
+    rid = add_reflection(db_path, aid, "Temp", "Temp", 10)
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM reflections WHERE id = ?", (rid,))
+    conn.commit()
+    conn.close()
+    assert get_activity_summary(db_path)["reflections"] == refl_count
+    log("  Reflection delete: OK ✓")
+
+    # Streak from rollup days: three consecutive local days ending today
+    # (created_at is UTC, like CURRENT_TIMESTAMP writes it)
+    conn = sqlite3.connect(db_path)
+    today_d = date.today()
+    for back in (1, 2, 4):
+        conn.execute(
+            "INSERT INTO reflections (article_id, reflection_text, action_item, "
+            "confidence_score, created_at) VALUES (?, 'past', 'past', 5, datetime(?, 'utc'))",
+            (aid, (today_d - timedelta(days=back)).isoformat() + " 12:00:00"),
+        )
+    conn.commit()
+    conn.close()
+    days = get_reflection_days(db_path)
+    assert days[:3] == [(today_d - timedelta(days=n)).isoformat() for n in (0, 1, 2)], days
+    assert calculate_streak(db_path) == 3, calculate_streak(db_path)
+    rows = get_daily_activity(db_path, (today_d - timedelta(days=4)).isoformat(), today_d.isoformat())
+    log(f"  Reflection days: {days[:4]}, rows in window: {len(rows)}: OK ✓")
+
+    # Local midnight..UTC midnight: every counter lands on the local day /status reads
+    import time
+    if hasattr(time, "tzset"):  # not on Windows
+        old_tz = os.environ.get("TZ")
+        os.environ["TZ"] = "Asia/Ho_Chi_Minh"  # UTC+7
+        time.tzset()
+        try:
+            conn = sqlite3.connect(db_path)
+            conn.execute(
+                "INSERT INTO reflections (article_id, reflection_text, action_item, "
+                "confidence_score, created_at) VALUES (?, 'late', 'late', 7, '2026-03-01 20:30:00')",
+                (aid,),
+            )
+            conn.commit()
+            conn.close()
+            local_day = get_activity_summary(db_path, "2026-03-02", "2026-03-02")
+            assert (local_day["reflections"], local_day["confidence_sum"]) == (1, 7), local_day
+            assert get_activity_summary(db_path, "2026-03-01", "2026-03-01")["reflections"] == 0
+            local_today = date.today().isoformat()
+            before = get_activity_summary(db_path, local_today, local_today)["articles_sent"]
+            update_article_status(db_path, add_article(db_path, "activity_tz", "Tz", "https://act.com/tz"), "sent")
+            assert get_activity_summary(db_path, local_today, local_today)["articles_sent"] == before + 1
+        finally:
+            if old_tz is None:
+                os.environ.pop("TZ")
+            else:
+                os.environ["TZ"] = old_tz
+            time.tzset()
+        log("  Reflection at 03:30 local (20:30 UTC) counts on the local day: OK ✓")
+
+    log("  RESULT: PASS ✓\n")
+except Exception as e:
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+# ── Test 12: Async repository facade ───────────────────────────────
+log("TEST 12: Async repository (writer thread + WAL readers)...")
+try:
+    import asyncio
+    import threading
+    import time
+    from db import async_repository as adb
+    from db.connection import get_connection
+
+    def slow_write(path, seconds):
+        """Hold a write transaction open, like a long analysis save."""
+        with get_connection(path) as conn:
+            conn.execute("UPDATE articles SET priority = priority WHERE id = 1")
+            time.sleep(seconds)
+        return threading.current_thread().name
+
+    async def scenario():
+        writer = asyncio.ensure_future(adb.run_write(slow_write, db_path, 0.5))
+        await asyncio.sleep(0.05)  # writer now holds the lock
+        start = time.perf_counter()
+        counts, art = await asyncio.gather(
+            adb.count_articles_by_status(db_path),
+            adb.get_article_by_id(db_path, 1),
+        )
+        read_s = time.perf_counter() - start
+        writer_thread = await writer
+        names = await asyncio.gather(*(
+            adb.run_write(lambda: threading.current_thread().name) for _ in range(5)
+        ))
+        return counts, art, read_s, writer_thread, set(names)
+
+    counts, art, read_s, writer_thread, names = asyncio.run(scenario())
+    assert counts and art["id"] == 1
+    assert read_s < 0.3, f"Reads waited on the writer: {read_s:.2f}s"
+    assert names == {writer_thread}, f"Writes ran on several threads: {names | {writer_thread}}"
+    log(f"  Reads during a 0.5s write: {read_s * 1000:.1f} ms: OK ✓")
+    log(f"  All writes on {writer_thread}: OK ✓")
+    adb.shutdown()
+
+    log("  RESULT: PASS ✓\n")
+except Exception as e:
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+# ── Test 13: Atomic queue claims with leases ───────────────────────
+log("TEST 13: Queue claims + leases...")
+try:
+    from concurrent.futures import ThreadPoolExecutor as _Pool
+    from db.repository import (
+        claim_article, claim_next_article, complete_claim, release_claim,
+        reap_expired_leases,
+    )
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE articles SET status = 'sent' WHERE status = 'queued'")
+    conn.commit()
+    conn.close()
+    ids = [add_article(db_path, f"claim_{i}", f"Claim {i}", f"https://claim.com/{i}",
+                       raw_content=f"Body {i}") for i in range(20)]
+
+    # 8 workers race for 20 articles: every article claimed exactly once
+    def worker(_):
+        got = []
+        while True:
+            row = claim_next_article(db_path, 60, columns=("id", "title", "raw_content"))
+            if not row:
+                return got
+            got.append(row)
+
+    with _Pool(max_workers=8) as pool:
+        claims = [r for batch in pool.map(worker, range(8)) for r in batch]
+    claimed_ids = [r["id"] for r in claims]
+    assert sorted(claimed_ids) == sorted(ids), f"{len(claimed_ids)} claims for {len(ids)} articles"
+    assert all(r["raw_content"].startswith("Body") and r["lease_owner"] for r in claims)
+    assert count_articles_by_status(db_path).get("processing") == 20
+    log(f"  8 workers, 20 articles → {len(set(claimed_ids))} unique claims: OK ✓")
+
+    first, second = claims[0], claims[1]
+    assert claim_article(db_path, first["id"]) is None, "Live lease was stolen"
+    assert complete_claim(db_path, first["id"], first["lease_owner"], "sent")
+    assert not complete_claim(db_path, first["id"], "someone-else", "sent")
+    assert get_article_by_id(db_path, first["id"])["status"] == "sent"
+    assert release_claim(db_path, second["id"], second["lease_owner"])
+    assert get_article_by_id(db_path, second["id"])["status"] == "queued"
+    log("  Complete / release / owner check: OK ✓")
+
+    # Re-analysis claim of a 'sent' article restores 'sent' when reaped
+    again = claim_article(db_path, first["id"], lease_seconds=0)
+    assert again and again["status"] == "processing"
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE articles SET lease_until = datetime('now', '-1 minute') "
+                 "WHERE status = 'processing'")
+    conn.commit()
+    conn.close()
+    reaped = reap_expired_leases(db_path)
+    assert reaped == 19, reaped
+    assert get_article_by_id(db_path, first["id"])["status"] == "sent"
+    assert count_articles_by_status(db_path).get("queued") == 19
+    assert not complete_claim(db_path, first["id"], again["lease_owner"])
+    log(f"  Reaper returned {reaped} expired claims: OK ✓")
+
+    # /reset leaves live leases alone and clears expired ones
+    from db.repository import reset_article_statuses
+    live = claim_article(db_path, ids[2], lease_seconds=600)
+    stale = claim_article(db_path, ids[3], lease_seconds=600)
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE articles SET lease_until = datetime('now', '-1 minute') WHERE id = ?",
+                 (ids[3],))
+    conn.commit()
+    conn.close()
+    reset_article_statuses(db_path)
+    assert get_article_by_id(db_path, ids[2])["status"] == "processing"
+    stale_row = get_article_by_id(db_path, ids[3])
+    assert stale_row["status"] == "queued" and stale_row["lease_owner"] is None
+    assert not complete_claim(db_path, ids[3], stale["lease_owner"])
+    assert complete_claim(db_path, ids[2], live["lease_owner"], "sent")
+    log("  Reset skips live lease, clears expired one: OK ✓")
+
+    # Batch-analyzed articles stay 'queued': skipped by batch claims,
+    # first for the daily job / /analyze, kept through /skip and /reset
+    from db.repository import complete_batch_claim, count_batch_analyzed
+    batch = claim_article(db_path, ids[5])
+    assert not complete_batch_claim(db_path, ids[5], "someone-else")
+    assert complete_batch_claim(db_path, ids[5], batch["lease_owner"])
+    update_article_analysis(db_path, ids[5], researcher_output="Saved output")
+    row = get_article_by_id(db_path, ids[5])
+    assert row["status"] == "queued" and row["batch_analyzed_at"] and row["lease_owner"] is None
+    assert count_batch_analyzed(db_path) == 1
+    plain = claim_next_article(db_path, 60, columns=("id",))
+    assert plain["id"] != ids[5] and not plain["batch_analyzed_at"]
+    ready = claim_next_article(db_path, 60, columns=("id",), include_analyzed=True)
+    assert ready["id"] == ids[5] and ready["batch_analyzed_at"], ready
+    for row in (plain, ready):
+        release_claim(db_path, row["id"], row["lease_owner"])
+    log("  Batch-analyzed claimed first only with include_analyzed: OK ✓")
+
+    update_article_status(db_path, ids[5], "skipped")
+    assert count_batch_analyzed(db_path) == 0
+    reset_article_statuses(db_path)
+    row = get_article_by_id(db_path, ids[5])
+    assert row["status"] == "queued" and row["batch_analyzed_at"]
+    assert row["researcher_output"] == "Saved output"
+    assert count_batch_analyzed(db_path) == 1
+    ready = claim_next_article(db_path, 60, columns=("id",), include_analyzed=True)
+    assert ready["id"] == ids[5]
+    assert complete_claim(db_path, ids[5], ready["lease_owner"], "sent")
+    assert not get_article_by_id(db_path, ids[5])["batch_analyzed_at"]
+    assert count_batch_analyzed(db_path) == 0
+    log("  /skip + /reset keep the saved analysis, send clears the mark: OK ✓")
+
+    # Legacy 'analyzed' rows (before migration 011) become marked 'queued' rows
+    legacy_path = os.path.join(tempfile.gettempdir(), "test_learning_batch_legacy.db")
+    if os.path.exists(legacy_path):
+        os.remove(legacy_path)
+    conn = sqlite3.connect(legacy_path)
+    conn.executescript(_SCHEMA_SQL)
+    conn.execute("PRAGMA user_version = 2")
+    conn.execute("INSERT INTO articles (raindrop_id, title, status) VALUES ('legacy_a', 'A', 'analyzed')")
+    conn.commit()
+    conn.close()
+    init_db(legacy_path)
+    legacy = get_article_by_id(legacy_path, 1)
+    assert legacy["status"] == "queued" and legacy["batch_analyzed_at"], legacy
+    assert count_batch_analyzed(legacy_path) == 1
+    close_all()
+    os.remove(legacy_path)
+    log("  Migration 011 converts legacy 'analyzed' rows: OK ✓")
+
+    log("  RESULT: PASS ✓\n")
+except Exception as e:
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+# ── Test 14: Row materialization paths ─────────────────────────────
+log("TEST 14: Streaming iterators + slotted records...")
+try:
+    from db.records import Article, Reflection, Session
+    from db.repository import iter_articles, iter_reflections, iter_sessions
+
+    dict_rows = list(iter_articles(db_path, status="queued", columns=("id", "title", "raw_content")))
+    recs = list(iter_articles(db_path, status="queued", columns=("id", "title", "raw_content"),
+                              record=Article, batch_size=7))
+    assert [r["id"] for r in dict_rows] == [r.id for r in recs] and len(recs) > 7
+    assert all(d["raw_content"] == r.raw_content for d, r in zip(dict_rows, recs))
+    assert recs[0].summary is None and not hasattr(recs[0], "__dict__")
+    full = next(iter_articles(db_path, record=Article))
+    assert full == Article(**get_article_by_id(db_path, full.id))
+    log(f"  iter_articles: {len(recs)} queued rows as Article, content attached: OK ✓")
+
+    rows = list(iter_articles(db_path, columns=ARTICLE_SUMMARY_FIELDS, record=sqlite3.Row))
+    assert rows and rows[0]["title"] == rows[0][2]
+    try:
+        next(iter_articles(db_path, columns=("id", "summary"), record=sqlite3.Row))
+        raise AssertionError("Row with content fields should be rejected")
+    except ValueError:
+        pass
+    log("  sqlite3.Row path: OK ✓")
+
+    refl = list(iter_reflections(db_path, record=Reflection, batch_size=2))
+    assert len(refl) == len(list(iter_reflections(db_path))) and isinstance(refl[0], Reflection)
+    sess = list(iter_sessions(db_path, record=Session))
+    assert sess and all(isinstance(x.duration_minutes, int) for x in sess)
+    log(f"  iter_reflections={len(refl)}, iter_sessions={len(sess)}: OK ✓")
+
+    log("  RESULT: PASS ✓\n")
+except Exception as e:
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+log("TEST 15: Online backup + WAL checkpoint + incremental vacuum...")
+try:
+    import shutil
+    from db.backup import backup_database, checkpoint, incremental_vacuum
+    from db.connection import get_connection
+    from db.repository import add_session
+
+    backup_dir = tempfile.mkdtemp(prefix="test_backups_")
+    stop = threading.Event()
+    writes = []
+
+    def _writer():
+        # Separate pooled connection → the backup must not block it
+        while not stop.is_set():
+            add_session(db_path, "2026-03-01", "08:00", "08:05", 5, "backup-test")
+            writes.append(1)
+
+    t = threading.Thread(target=_writer)
+    t.start()
+    try:
+        result = backup_database(db_path, backup_dir, pages=4, sleep_ms=2, keep=2)
+    finally:
+        stop.set()
+        t.join()
+    assert writes, "writer made no progress during backup"
+    assert os.path.exists(result.path) and result.size_bytes == os.path.getsize(result.path)
+    assert result.duration_s > 0 and result.steps > 1 and result.pages > 0
+    bconn = sqlite3.connect(result.path)
+    assert bconn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    live = get_connection(db_path).execute("SELECT COUNT(*) AS n FROM articles").fetchone()["n"]
+    assert bconn.execute("SELECT COUNT(*) FROM articles").fetchone()[0] == live
+    bconn.close()
+    log(f"  backup: {result.size_bytes} bytes, {result.pages} pages in {result.steps} steps "
+        f"({result.duration_s:.3f}s) while {len(writes)} writes landed: OK ✓")
+
+    import time as _time
+    for _ in range(2):
+        _time.sleep(1.1)  # timestamped names are per-second
+        last = backup_database(db_path, backup_dir, pages=64, sleep_ms=0, keep=2)
+    kept = sorted(os.listdir(backup_dir))
+    assert len(kept) == 2 and os.path.basename(last.path) == kept[-1] and last.pruned == 1
+    log(f"  pruning keeps newest {len(kept)}: OK ✓")
+
+    cp = checkpoint(db_path)
+    assert set(cp) == {"busy", "wal_pages", "checkpointed"}
+    try:
+        checkpoint(db_path, "bogus")
+        raise AssertionError("bad checkpoint mode accepted")
+    except ValueError:
+        pass
+    log(f"  checkpoint: {cp}: OK ✓")
+
+    conn = get_connection(db_path)
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()["auto_vacuum"] == 2
+    with conn:
+        conn.execute("DELETE FROM sessions WHERE activity_type = 'backup-test'")
+    freed = incremental_vacuum(db_path)
+    assert freed > 0 and conn.execute("PRAGMA freelist_count").fetchone()["freelist_count"] == 0
+    log(f"  incremental_vacuum released {freed} pages: OK ✓")
+
+    shutil.rmtree(backup_dir, ignore_errors=True)
+    log("  RESULT: PASS ✓\n")
+except Exception as e:
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+log("TEST 16: LLM response cache...")
+try:
+    from db import llm_cache
+    import config as _config
+
+    img = {"type": "image_url", "image_url": {"url": "data:image/png;base64," + "A" * 5000}}
+    msgs = [{"role": "system", "content": "Persona\r\n"},
+            {"role": "user", "content": [{"type": "text", "text": " Article "}, img]}]
+    same = [{"role": "system", "content": "Persona"},
+            {"role": "user", "content": [{"type": "text", "text": "Article"}, img]}]
+    key = llm_cache.make_key("m1", msgs)
+    assert key == llm_cache.make_key("m1", same)
+    assert key != llm_cache.make_key("m2", msgs)
+    assert key != llm_cache.make_key("m1", msgs, {"temperature": 0.2})
+    other_img = {"type": "image_url", "image_url": {"url": "data:image/png;base64," + "B" * 5000}}
+    assert key != llm_cache.make_key("m1", [msgs[0], {"role": "user", "content": [{"type": "text", "text": "Article"}, other_img]}])
+    log("  Key: whitespace-normalized, model/params/image-digest sensitive: OK ✓")
+
+    llm_cache.clear(db_path)
+    llm_cache.reset_stats()
+    assert llm_cache.get(db_path, key) is None
+    answer = "## 🔬 Scout\n" + "insight " * 500
+    llm_cache.put(db_path, key, "m1", answer)
+    assert llm_cache.get(db_path, key) == answer
+    assert llm_cache.get(db_path, key, ttl_hours=0) is None  # expired for a 0h TTL
+    s = llm_cache.stats(db_path)
+    assert (s["hits"], s["misses"], s["stores"], s["entries"]) == (1, 2, 1, 1)
+    assert 0 < s["bytes"] < len(answer)  # compressed
+    log(f"  Get/put/TTL + counters {s['hits']}h/{s['misses']}m, {s['bytes']} bytes stored: OK ✓")
+
+    # LRU: touch k0, then insert over a budget that fits ~3 entries
+    llm_cache.clear(db_path)
+    keys = [llm_cache.make_key("m1", [{"role": "user", "content": f"q{i}"}]) for i in range(4)]
+    for i, k in enumerate(keys[:3]):
+        llm_cache.put(db_path, k, "m1", f"answer {i} " + "x" * 40 * (i + 1))
+    llm_cache.get(db_path, keys[0])
+    budget = llm_cache.stats(db_path)["bytes"]
+    evicted = llm_cache.put(db_path, keys[3], "m1", "answer 3", max_bytes=budget)
+    alive = [llm_cache.get(db_path, k) is not None for k in keys]
+    assert evicted >= 1 and alive[0] and alive[3] and not alive[1], alive
+    assert llm_cache.stats(db_path)["bytes"] <= budget
+    log(f"  LRU eviction under {budget} bytes kept recently used: {alive}: OK ✓")
+
+    # get() only reads; buffered hits land with flush_hits() (writer thread)
+    conn = get_connection(db_path)
+    llm_cache.flush_hits(db_path)
+    hits = conn.execute("SELECT hits FROM llm_cache WHERE key = ?", (keys[3],)).fetchone()["hits"]
+    before = conn.total_changes
+    assert llm_cache.get(db_path, keys[3]) and llm_cache.get(db_path, keys[3])
+    assert conn.total_changes == before and llm_cache.pending_hits() == 1
+    assert llm_cache.flush_hits(db_path) == 1 and llm_cache.pending_hits() == 0
+    row = conn.execute("SELECT hits, use_seq FROM llm_cache WHERE key = ?", (keys[3],)).fetchone()
+    top = conn.execute("SELECT MAX(use_seq) AS s FROM llm_cache").fetchone()["s"]
+    assert row["hits"] == hits + 2 and row["use_seq"] == top, dict(row)
+    assert llm_cache.put(db_path, keys[1], "m1", "small") == 0  # under budget: no eviction
+    log("  Read-only get, batched hit/LRU flush, no eviction under budget: OK ✓")
+
+    # call_llm answers from the cache without touching the network
+    from services.llm_client import call_llm
+    old_db, old_enabled = _config.DATABASE_PATH, _config.LLM_CACHE_ENABLED
+    _config.DATABASE_PATH, _config.LLM_CACHE_ENABLED = db_path, True
+    try:
+        q = [{"role": "user", "content": "cached question"}]
+        llm_cache.put(db_path, llm_cache.make_key("offline-model", q), "offline-model", "cached answer")
+        assert call_llm("offline-model", q, max_retries=0) == "cached answer"
+    finally:
+        _config.DATABASE_PATH, _config.LLM_CACHE_ENABLED = old_db, old_enabled
+    log("  call_llm served from cache: OK ✓")
+
+    log("  RESULT: PASS ✓\n")
+except Exception as e:
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+log("TEST 17: LLM call telemetry + rollups...")
+try:
+    from db import llm_telemetry
+    import config as _config
+
+    llm_telemetry.flush(db_path)  # rows from earlier tests' call_llm
+    old_rows = _config.LLM_TELEMETRY_FLUSH_ROWS
+    _config.LLM_TELEMETRY_FLUSH_ROWS = 5
+    try:
+        due = [
+            llm_telemetry.record("m-fast", "stage_1_analysis", prompt_tokens=1000,
+                                 completion_tokens=200, latency_ms=ms, fallback_position=0)
+            for ms in (100, 200, 300, 400)
+        ]
+        due.append(llm_telemetry.record("m-fast", "stage_1_analysis", cache_hit=True))
+    finally:
+        _config.LLM_TELEMETRY_FLUSH_ROWS = old_rows
+    assert due == [False] * 4 + [True], due
+    for ms in range(1000, 21000, 1000):
+        llm_telemetry.record("m-slow", "stage_2_planning", prompt_tokens=50, completion_tokens=10,
+                             latency_ms=ms, ttft_ms=ms // 10, stream=True, fallback_position=1)
+    llm_telemetry.record("m-slow", "stage_2_planning", ok=False, error="APITimeoutError", retries=2)
+    llm_telemetry.record("m-cached", "stage_1_analysis", prompt_tokens=4000, cached_tokens=3000,
+                         completion_tokens=100, latency_ms=50)
+    llm_telemetry.record("m-cached", "stage_1_analysis", prompt_tokens=4000, cached_tokens=0,
+                         completion_tokens=100, latency_ms=80)
+    assert llm_telemetry.flush(db_path) == 28 and llm_telemetry.pending() == 0
+    log("  Buffered 28 rows, flush due at threshold, one batch insert: OK ✓")
+
+    rollup = {(r["model"], r["task_type"]): r for r in llm_telemetry.latency_rollup(db_path, days=1)}
+    slow, fast = rollup[("m-slow", "stage_2_planning")], rollup[("m-fast", "stage_1_analysis")]
+    assert list(rollup)[0] == ("m-slow", "stage_2_planning"), "Slowest p95 first"
+    assert (slow["calls"], slow["failures"], slow["retries"], slow["fallback_calls"]) == (21, 1, 2, 20)
+    assert (slow["p50_ms"], slow["p95_ms"], slow["ttft_p95_ms"]) == (11000, 20000, 2000), slow
+    assert (fast["calls"], fast["cache_hits"], fast["p50_ms"], fast["p95_ms"]) == (5, 1, 300, 400), fast
+    assert fast["ttft_p95_ms"] is None and fast["cached_ratio"] is None
+    assert rollup[("m-cached", "stage_1_analysis")]["cached_ratio"] == 3000 / 8000
+    log(f"  p50/p95 per model+task: slow {slow['p50_ms']}/{slow['p95_ms']}ms, "
+        f"fast {fast['p50_ms']}/{fast['p95_ms']}ms: OK ✓")
+
+    daily = {r["task_type"]: r for r in llm_telemetry.daily_tokens(db_path, days=1)}
+    stage_1 = daily["stage_1_analysis"]
+    assert (stage_1["prompt_tokens"], stage_1["cached_tokens"], stage_1["completion_tokens"]) == (12000, 3000, 1000)
+    assert daily["stage_2_planning"]["calls"] == 21 and daily["stage_2_planning"]["prompt_tokens"] == 1000
+    log(f"  Tokens per day per task: {len(daily)} tasks: OK ✓")
+
+    conn = get_connection(db_path)
+    with conn:
+        conn.execute("UPDATE llm_calls SET ts = '2000-01-01T00:00:00' WHERE model = 'm-fast'")
+    assert llm_telemetry.prune(db_path, days=30) == 5
+    assert conn.execute("SELECT COUNT(*) AS n FROM llm_calls WHERE model LIKE 'm-%'").fetchone()["n"] == 23
+    log("  Retention prune: OK ✓")
+
+    log("  RESULT: PASS ✓\n")
+except Exception as e:
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+# ── Test 18: Analysis-level single-flight ──────────────────────────
+log("TEST 18: Analysis single-flight (daily job + streaming /analyze)...")
+try:
+    import asyncio
+    from services import analyzer, single_flight
+
+    calls = []
+
+    async def fake_llm(task_type, messages, use_cache=True, stream=False, **kwargs):
+        calls.append((task_type, stream))
+        text = f"{task_type} output"
+        await asyncio.sleep(0.01)
+        if not stream:
+            return text
+
+        async def deltas():
+            for delta in (task_type, " output"):
+                await asyncio.sleep(0.01)
+                yield delta
+        return deltas()
+
+    async def scenario(content, streamer_first):
+        streamed = []
+
+        async def on_delta(stage, delta):
+            streamed.append((stage, delta))
+
+        daily = analyzer.aanalyze_article(content, "https://example.com/a")       # _daily_job
+        manual = analyzer.aanalyze_article(content, "https://example.com/a?x=1",  # /analyze
+                                           on_delta=on_delta)
+        first, second = (manual, daily) if streamer_first else (daily, manual)
+        first = asyncio.ensure_future(first)
+        await asyncio.sleep(0.015)  # second caller arrives mid-run
+        results = await asyncio.gather(first, second)
+        return (results[1], results[0]) if streamer_first else results, streamed
+
+    real_llm = analyzer.acall_llm_with_fallback
+    analyzer.acall_llm_with_fallback = fake_llm
+    try:
+        asyncio.run(analyzer.aanalyze_article("Alone."))
+        single_run = len(calls)
+        single_flight.reset()
+
+        for streamer_first in (True, False):
+            calls.clear()
+            (daily, manual), streamed = asyncio.run(scenario(f"Article {streamer_first}.", streamer_first))
+            assert len(calls) == single_run, (streamer_first, calls)
+            assert daily.full_success and manual.full_success
+            assert manual.stage_2_output == daily.stage_2_output == "stage_2_planning output"
+            assert manual.article_link.endswith("?x=1") and daily.article_link.endswith("/a")
+            text = {stage: "".join(d for s, d in streamed if s == stage) for stage in ("stage_1", "stage_2")}
+            assert (text["stage_1"], text["stage_2"]) == (manual.stage_1_output, manual.stage_2_output), streamed
+    finally:
+        analyzer.acall_llm_with_fallback = real_llm
+    flights = single_flight.stats()["analysis"]
+    assert (flights["leaders"], flights["coalesced"], flights["in_flight"]) == (2, 2, 0), flights
+    assert not analyzer._fanouts
+    log(f"  Concurrent daily + streaming /analyze: {single_run} LLM calls, not {2 * single_run}: OK ✓")
+    log("  Streamer joining mid-run replays deltas; joining a non-streamed run gets full stages: OK ✓")
+
+    log("  RESULT: PASS ✓\n")
+except Exception as e:
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+# ── Test 19: Single-flight groups ──────────────────────────────────
+log("TEST 19: Single-flight (sync extraction, async LLM, leader cancel)...")
+try:
+    import asyncio
+    import json
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor as _Pool
+    import httpx
+    from services import extractor, llm_client, single_flight
+
+    # extraction: threads share one run, each gets its own copy
+    runs = []
+
+    def fake_extract(url, excerpt=""):
+        runs.append(threading.get_ident())
+        time.sleep(0.1)
+        return extractor.ExtractionResult(content="body", source="trafilatura", warnings=["w"])
+
+    real_extract = extractor._extract_content
+    extractor._extract_content = fake_extract
+    single_flight.reset()
+    try:
+        urls = ["https://Example.com/post?utm_source=x", "https://example.com/post/"] * 3
+        with _Pool(6) as pool:
+            results = list(pool.map(extractor.extract_content, urls))
+    finally:
+        extractor._extract_content = real_extract
+    assert len(runs) == 1, runs
+    assert all(r.content == "body" for r in results)
+    assert len({id(r.warnings) for r in results}) == 6, "Callers share a mutable list"
+    flights = single_flight.stats()["extraction"]
+    assert (flights["leaders"], flights["coalesced"], flights["in_flight"]) == (1, 5, 0), flights
+    log("  6 threads, 1 extraction, separate result copies: OK ✓")
+
+    def boom(url, excerpt=""):
+        time.sleep(0.1)
+        raise ValueError("extract failed")
+
+    group = single_flight.Group("t")
+    with _Pool(3) as pool:
+        futures = [pool.submit(group.do, "k", boom, "u") for _ in range(3)]
+    errors = [f.exception() for f in futures]
+    assert all(isinstance(e, ValueError) for e in errors) and group.stats()["leaders"] == 1
+    log("  Leader's exception reaches every waiting thread: OK ✓")
+
+    # llm: identical concurrent acall_llm → one request
+    requests = []
+
+    async def handler(request):
+        requests.append(json.loads(request.content)["model"])
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json=completion("shared"))
+
+    messages = [{"role": "user", "content": "same prompt"}]
+
+    async def five_calls():
+        try:
+            return await asyncio.gather(
+                *(llm_client.acall_llm("sf-model", messages, max_retries=0) for _ in range(5)),
+                llm_client.acall_llm("sf-model", messages, max_retries=0, use_cache=False),
+            )
+        finally:
+            await llm_client.aclose_llm_client()
+
+    single_flight.reset()
+    with mock_llm(handler):
+        answers = asyncio.run(five_calls())
+    assert answers == ["shared"] * 6 and len(requests) == 2, requests  # use_cache=False runs alone
+    flights = single_flight.stats()["llm"]
+    assert (flights["leaders"], flights["coalesced"]) == (1, 4), flights
+    log(f"  6 concurrent acall_llm → {len(requests)} requests (1 shared + 1 uncached): OK ✓")
+
+    # Leader cancelled (e.g. lost a hedged race): a waiter takes over
+    async def takeover():
+        group, started = single_flight.Group("t"), []
+
+        async def work(tag):
+            started.append(tag)
+            await asyncio.sleep(0.05)
+            return tag
+
+        leader = asyncio.ensure_future(group.ado("k", work, "leader"))
+        await asyncio.sleep(0)
+        waiters = [asyncio.ensure_future(group.ado("k", work, f"w{i}")) for i in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*waiters)
+        return leader, started, results, group.stats()
+
+    leader, started, results, stats = asyncio.run(takeover())
+    assert leader.cancelled() and started == ["leader", "w0"], started
+    assert results == ["w0", "w0"], results
+    assert (stats["leaders"], stats["in_flight"]) == (2, 0), stats
+    log("  Cancelled leader: first waiter re-runs, the other joins it: OK ✓")
+
+    log("  RESULT: PASS ✓\n")
+except Exception as e:
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+# ── Test 20: Hedged fallback (mocked client) ───────────────────────
+log("TEST 20: Hedged fallback — hedge timing, winner, cancelled losers, max_hedges...")
+try:
+    import config as _config
+    from services import model_health
+
+    DELAYS = {"h-slow": 1.0, "h-fast": 0.02, "h-third": 0.02, "h-slow-2": 1.0, "h-slow-3": 0.3}
+    started, cancelled = {}, []
+
+    def chunk(text):
+        body = {"id": "c", "object": "chat.completion.chunk", "created": 0, "model": "m",
+                "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": None}]}
+        return f"data: {json.dumps(body)}\n\n".encode()
+
+    async def handler(request):
+        body = json.loads(request.content)
+        model = body["model"]
+        started[model] = time.monotonic()
+        try:
+            await asyncio.sleep(DELAYS[model])  # time to first byte
+        except asyncio.CancelledError:
+            cancelled.append(model)
+            raise
+        if body.get("stream"):
+            stream = b"".join(chunk(part) for part in (model, " done")) + b"data: [DONE]\n\n"
+            return httpx.Response(200, content=stream, headers={"content-type": "text/event-stream"})
+        return httpx.Response(200, json=completion(f"from {model}"))
+
+    async def race(chain, hedge_after, max_hedges, stream=False):
+        _config.MODEL_CONFIG["hedge_test"] = {
+            "model": chain[0], "hedge_after": hedge_after, "max_hedges": max_hedges,
+        }
+        _config.FALLBACK_CHAIN = chain[1:]
+        started.clear()
+        cancelled.clear()
+        t0 = time.monotonic()
+        try:
+            messages = [{"role": "user", "content": f"hedge {chain} {stream}"}]
+            result = await llm_client.acall_llm_with_fallback(
+                "hedge_test", messages, max_retries=0, stream=stream,
+            )
+            if stream:
+                result = "".join([delta async for delta in result])
+            await asyncio.sleep(0.05)  # let cancellations land
+            return result, {m: t - t0 for m, t in started.items()}, list(cancelled)
+        finally:
+            await llm_client.aclose_llm_client()
+
+    saved = dict(_config.MODEL_CONFIG), list(_config.FALLBACK_CHAIN), _config.HEDGE_MIN_SECONDS
+    try:
+        with mock_llm(handler):
+            # Slow primary: the next model starts after hedge_after, wins, primary is cancelled
+            result, starts, losers = asyncio.run(race(["h-slow", "h-fast", "h-third"], 0.1, 1))
+            assert result == "from h-fast", result
+            assert 0.08 <= starts["h-fast"] < 0.5, starts
+            assert "h-third" not in starts and losers == ["h-slow"], (starts, losers)
+            log(f"  Hedge after {starts['h-fast']:.2f}s, first success wins, loser cancelled: OK ✓")
+
+            # max_hedges=2 with every model slow: exactly 2 hedges, the 4th never starts
+            result, starts, losers = asyncio.run(
+                race(["h-slow", "h-slow-2", "h-slow-3", "h-fast"], 0.1, 2)
+            )
+            assert result == "from h-slow-3" and set(starts) == {"h-slow", "h-slow-2", "h-slow-3"}, starts
+            assert sorted(losers) == ["h-slow", "h-slow-2"], losers
+            log(f"  max_hedges=2: {len(starts)} contenders, rest of chain untouched: OK ✓")
+
+            # max_hedges=0: never hedges, waits for the slow primary
+            result, starts, losers = asyncio.run(race(["h-slow-3", "h-fast"], 0.05, 0))
+            assert result == "from h-slow-3" and list(starts) == ["h-slow-3"] and not losers
+            log("  max_hedges=0: no hedge: OK ✓")
+
+            # Streaming races on first token; the loser's stream is closed
+            result, starts, losers = asyncio.run(race(["h-slow", "h-fast"], 0.1, 1, stream=True))
+            assert result == "h-fast done" and losers == ["h-slow"], (result, losers)
+            log("  Streaming: first token wins, loser cancelled, no spliced output: OK ✓")
+
+            # Once p95 is known, the hedge fires at p95 instead of the hedge_after budget
+            _config.HEDGE_MIN_SECONDS = 0.01
+            model_health.reset("h-slow")
+            for _ in range(_config.HEDGE_MIN_SAMPLES):
+                model_health.record_success("h-slow", 0.1)
+            result, starts, losers = asyncio.run(race(["h-slow", "h-fast"], 5.0, 1))
+            assert result == "from h-fast" and starts["h-fast"] < 1.0, starts
+            log(f"  p95-driven hedge after {starts['h-fast']:.2f}s (budget 5s): OK ✓")
+    finally:
+        _config.MODEL_CONFIG.clear()
+        _config.MODEL_CONFIG.update(saved[0])
+        _config.FALLBACK_CHAIN, _config.HEDGE_MIN_SECONDS = saved[1], saved[2]
+        for model in DELAYS:
+            model_health.reset(model)
+
+    # A loser that finishes anyway despite the cancel is handed to discard()
+    async def discard_race():
+        discarded = []
+
+        async def start(model):
+            if model == "b":
+                return "b"
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                return "a-late"  # e.g. the response arrived as it was cancelled
+
+        async def discard(result):
+            discarded.append(result)
+
+        winner = await llm_client._arace("t", ["a", "b"], start, 0.01, 1, discard=discard)
+        return winner, discarded
+
+    winner, discarded = asyncio.run(discard_race())
+    model_health.reset("a")
+    model_health.reset("b")
+    assert (winner, discarded) == ("b", ["a-late"]), (winner, discarded)
+    log("  Late result of a cancelled loser is discarded, not returned: OK ✓")
+
+    log("  RESULT: PASS ✓\n")
+except Exception as e:
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+# ── Test 21: LLM rate limiter ──────────────────────────────────────
+log("TEST 21: Rate limiter — refill, RPM/TPM limits, priority (patched clock)...")
+try:
+    import types
+    import config as _config
+    from services import rate_limiter
+
+    clock = types.SimpleNamespace(now=1000.0)
+    clock.monotonic = lambda: clock.now
+    saved = rate_limiter.time, _config.LLM_RATE_LIMITS, _config.LLM_RATE_BURST_SECONDS
+    rate_limiter.time = clock
+    _config.LLM_RATE_LIMITS = {"default": {"rpm": 60, "tpm": 6000}}  # 1 req/s, 100 tokens/s
+    _config.LLM_RATE_BURST_SECONDS = 10  # buckets hold 10 requests, 1000 tokens
+    rate_limiter.reset()
+    try:
+        def take(limiter, tokens):
+            waiter = limiter.enqueue(tokens)
+            limiter.poll(waiter)
+            return waiter
+
+        # RPM: a 10-request burst, then one per second of refill
+        rpm = rate_limiter._limiter("rl-rpm")
+        assert all(take(rpm, 10).granted for _ in range(10))
+        late = take(rpm, 10)
+        assert not late.granted and rpm.poll(late) == 1.0
+        clock.now += 0.5
+        assert rpm.poll(late) == 0.5 and not late.granted
+        clock.now += 0.5
+        assert rpm.poll(late) == 0 and late.granted
+        log("  RPM: burst of 10, 11th granted after exactly 1s of refill: OK ✓")
+
+        # TPM: 800 + 800 tokens needs 600 more at 100/s
+        tpm = rate_limiter._limiter("rl-tpm")
+        assert take(tpm, 800).granted
+        late = take(tpm, 800)
+        clock.now += 5.9
+        assert tpm.poll(late) and not late.granted
+        clock.now += 0.1
+        assert tpm.poll(late) == 0 and late.granted
+        huge = take(tpm, 50_000)  # bigger than the bucket: waits for a full one, then goes
+        clock.now += 9.9
+        assert tpm.poll(huge) and not huge.granted
+        clock.now += 0.1
+        assert tpm.poll(huge) == 0 and huge.granted
+        log("  TPM: waits for 6s of token refill; oversized request waits for a full bucket: OK ✓")
+
+        # settle refunds an over-estimate; pause holds the queue for Retry-After
+        rate_limiter.settle("rl-tpm", 1000, 200)
+        assert take(tpm, 800).granted, "800 refunded tokens available at once"
+        rate_limiter.pause("rl-tpm", 3.0)
+        paused = take(tpm, 1)
+        assert not paused.granted and rate_limiter.stats()["rl-tpm"]["queued"] == 1
+        clock.now += 2.9
+        assert tpm.poll(paused) and not paused.granted
+        clock.now += 0.1
+        assert tpm.poll(paused) == 0 and paused.granted
+        log("  settle() refunds the estimate, pause() holds grants for Retry-After: OK ✓")
+
+        # Priority: interactive waiters overtake background ones, FIFO within a priority
+        prio = rate_limiter._limiter("rl-prio")
+        while take(prio, 1).granted:
+            pass  # drain the burst (the last, ungranted waiter stays queued first)
+        prio.cancel(prio.queue[0])
+        order = []
+        with rate_limiter.background():
+            bg = [take(prio, 1) for _ in range(2)]
+        fg = [take(prio, 1) for _ in range(2)]
+        names = {id(w): n for w, n in zip(bg + fg, ("bg1", "bg2", "fg1", "fg2"))}
+        for _ in range(4):
+            clock.now += 1.0
+            for waiter in bg + fg:
+                if not waiter.granted:
+                    prio.poll(waiter)
+            order += [names[id(w)] for w in bg + fg if w.granted and names[id(w)] not in order]
+        assert order == ["fg1", "fg2", "bg1", "bg2"], order
+        log(f"  Grant order under contention: {order}: OK ✓")
+    finally:
+        rate_limiter.time, _config.LLM_RATE_LIMITS, _config.LLM_RATE_BURST_SECONDS = saved
+        rate_limiter.reset()
+
+    # aacquire: immediate when there is capacity; a cancelled waiter leaves the queue
+    async def cancelled_wait():
+        _config.LLM_RATE_LIMITS = {"default": {"rpm": 60, "tpm": 6000}}
+        try:
+            await rate_limiter.aacquire("rl-async", 10_000)
+            task = asyncio.ensure_future(rate_limiter.aacquire("rl-async", 10_000))
+            await asyncio.sleep(0.01)
+            queued = rate_limiter.stats()["rl-async"]["queued"]
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            return queued, rate_limiter.stats()["rl-async"]["queued"]
+        finally:
+            _config.LLM_RATE_LIMITS = saved[1]
+            rate_limiter.reset()
+
+    assert asyncio.run(cancelled_wait()) == (1, 0)
+    log("  aacquire: cancelled waiter leaves the queue: OK ✓")
+
+    log("  RESULT: PASS ✓\n")
+except Exception as e:
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+# ── Test 22: Prompt registry ───────────────────────────────────────
+log("TEST 22: Prompt registry — compiled render, mtime invalidation, memo...")
+try:
+    import shutil
+    import time
+    from pathlib import Path
+    from string import Formatter
+    import config as _config
+    from services import prompt_registry
+
+    # Every shipped prompt renders exactly like str.format did
+    files = sorted(_config.PROMPTS_DIR.glob("*/**/*.md"))
+    fields_seen = 0
+    for path in files:
+        text = path.read_text(encoding="utf-8")
+        kwargs = {
+            field: f"<{field} value {{braces}}>"
+            for _, field, _, _ in Formatter().parse(text) if field
+        }
+        fields_seen += len(kwargs)
+        template = prompt_registry._Template(path)
+        assert template.segments is not None, f"{path} not pre-compiled"
+        assert template.render(kwargs) == text.format(**kwargs), path
+    assert len(files) >= 20 and fields_seen
+    log(f"  {len(files)} prompt files ({fields_seen} fields) match str.format output: OK ✓")
+
+    # Templates the compiler can't split still behave like str.format
+    odd = prompt_registry._compile("{x!r} {y:>4}")
+    escaped = prompt_registry._compile("{{literal}} {a}")
+    assert odd is None and escaped[-1] == (" ", "a")
+    assert "".join(lit + (f and "A" or "") for lit, f in escaped) == "{literal} A"
+    log("  Escaped braces compile; format specs/conversions fall back to str.format: OK ✓")
+
+    saved = _config.PROMPTS_DIR, _config.LANGUAGE, _config.PROMPT_RELOAD_CHECK_SECONDS
+    prompt_dir = Path(tempfile.mkdtemp(prefix="test_prompts_"))
+    (prompt_dir / "vi").mkdir()
+    prompt_file = prompt_dir / "vi" / "hello.md"
+    prompt_file.write_text("Xin chào {name}", encoding="utf-8")
+    _config.PROMPTS_DIR, _config.LANGUAGE, _config.PROMPT_RELOAD_CHECK_SECONDS = prompt_dir, "en", 0.2
+    prompt_registry.reload()
+    prompt_registry.reset_stats()
+    try:
+        # Repeated lookups: one compiled template, renders memoized per argument set
+        first = prompt_registry._template("hello.md")
+        assert prompt_registry._template("hello.md") is first  # en → vi fallback, cached
+        a1 = prompt_registry.render("hello.md", name="An")
+        a2 = prompt_registry.render("hello.md", name="An")
+        b = prompt_registry.render("hello.md", name="Bình")
+        assert a1 == a2 == "Xin chào An" and a1 is a2 and b == "Xin chào Bình"
+        entry = prompt_registry.stats()["hello.md"]
+        assert (entry["renders"], entry["memo_hits"]) == (3, 1), entry
+        for i in range(prompt_registry.MEMO_SIZE + 2):
+            prompt_registry.render("hello.md", name=str(i))
+        assert len(first.memo) == prompt_registry.MEMO_SIZE
+        log("  Repeated lookups reuse one template; renders memoized (bounded): OK ✓")
+
+        # Touching the file invalidates the cached template (after the check interval)
+        time.sleep(0.25)
+        os.utime(prompt_file, (first.mtime + 5, first.mtime + 5))
+        touched = prompt_registry._template("hello.md")
+        assert touched is not first and not touched.memo
+        prompt_file.write_text("Chào {name}!", encoding="utf-8")
+        os.utime(prompt_file, (first.mtime + 10, first.mtime + 10))
+        assert prompt_registry.render("hello.md", name="An") == "Xin chào An"  # within interval
+        time.sleep(0.25)
+        assert prompt_registry.render("hello.md", name="An") == "Chào An!"
+        log("  mtime change recompiles the template and drops its memo: OK ✓")
+
+        _config.PROMPT_RELOAD_CHECK_SECONDS = 0
+        prompt_file.write_text("Hi {name}", encoding="utf-8")
+        os.utime(prompt_file, (first.mtime + 20, first.mtime + 20))
+        time.sleep(0.25)
+        assert prompt_registry.render("hello.md", name="An") == "Chào An!"
+        prompt_registry.reload()
+        assert prompt_registry.render("hello.md", name="An") == "Hi An"
+        log("  Interval 0: no re-stat until reload(): OK ✓")
+    finally:
+        _config.PROMPTS_DIR, _config.LANGUAGE, _config.PROMPT_RELOAD_CHECK_SECONDS = saved
+        prompt_registry.reload()
+        prompt_registry.reset_stats()
+        shutil.rmtree(prompt_dir, ignore_errors=True)
+
+    log("  RESULT: PASS ✓\n")
+except Exception as e:
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+# ── Test 23: Live-streamed Telegram messages ───────────────────────
+log("TEST 23: LiveMessage — failed edits never lose streamed text...")
+try:
+    import itertools
+    from telegram.error import BadRequest, RetryAfter
+    import config as _config
+    from bot import telegram_handler
+
+    class FakeMessage:
+        def __init__(self, bot, text):
+            self.bot, self.text = bot, text
+
+        async def edit_text(self, text):
+            error = self.bot.edit_error()
+            if error:
+                raise error
+            self.text = text
+
+    class FakeBot:
+        def __init__(self, edit_error=lambda: None, send_error=lambda: None):
+            self.edit_error, self.send_error = edit_error, send_error
+            self.sent = []
+
+        async def send_message(self, chat_id, text, parse_mode=None):
+            error = self.send_error()
+            if error:
+                raise error
+            self.sent.append(FakeMessage(self, text))
+            return self.sent[-1]
+
+    words = [f"w{i}" for i in range(2500)]  # ~15k chars → several rollovers
+    deltas = [" ".join(words[i:i + 7]) + ("\n\n" if i % 140 == 0 else " ") for i in range(0, len(words), 7)]
+
+    async def stream(bot):
+        live = telegram_handler.LiveMessage(bot, "chat", header="📰 Title\n", interval=0)
+        await live.start()
+        for delta in deltas:
+            await live.append(delta)
+        await live.finish("\n\n⚠️ footer")
+        return live
+
+    def delivered(bot):
+        """Words shown in finished messages (no cursor) — what the reader is left with."""
+        done = [m.text for m in bot.sent if not m.text.endswith("▌")]
+        return set(" ".join(done).split()), done
+
+    flood = itertools.cycle([RetryAfter(0), None])       # every other call hits flood control
+    scenarios = {
+        "every edit fails": FakeBot(edit_error=lambda: RuntimeError("message to edit not found")),
+        "flood control on edits": FakeBot(edit_error=lambda: next(flood)),
+        "edits always flood-limited": FakeBot(edit_error=lambda: RetryAfter(0)),
+        "flood on sends too": FakeBot(edit_error=lambda: RetryAfter(0), send_error=lambda: next(flood)),
+    }
+    for name, bot in scenarios.items():
+        asyncio.run(stream(bot))
+        shown, done = delivered(bot)
+        missing = [w for w in words if w not in shown]
+        assert not missing, f"{name}: {len(missing)} words lost, e.g. {missing[:3]}"
+        assert "footer" in shown and done[-1].endswith("⚠️ footer"), name
+        assert all(len(text) <= 4096 for text in done), name
+        log(f"  {name}: all {len(words)} words delivered in {len(done)} message(s): OK ✓")
+
+    healthy, unmodified = FakeBot(), FakeBot(edit_error=lambda: BadRequest("Message is not modified"))
+    asyncio.run(stream(healthy))
+    asyncio.run(stream(unmodified))
+    assert len(unmodified.sent) == len(healthy.sent), "'not modified' must not re-send"
+    log("  'Message is not modified' counts as shown (no duplicate re-send): OK ✓")
+
+    # An exception mid-analysis still removes the cursor and says what happened
+    async def broken_analysis(content, on_delta=None, **kwargs):
+        await on_delta("stage_1", "partial text")
+        raise RuntimeError("proxy down")
+
+    real = telegram_handler.aanalyze_article, _config.TELEGRAM_STREAMING
+    telegram_handler.aanalyze_article, _config.TELEGRAM_STREAMING = broken_analysis, True
+    try:
+        bot = FakeBot()
+        try:
+            asyncio.run(telegram_handler._run_analysis(bot, "chat", "📰 Title\n", "content"))
+            raise AssertionError("exception swallowed")
+        except RuntimeError:
+            pass
+    finally:
+        telegram_handler.aanalyze_article, _config.TELEGRAM_STREAMING = real
+    last = bot.sent[-1].text
+    assert "partial text" in last and "proxy down" in last and not last.endswith("▌"), last
+    log("  Analysis exception: message finished without cursor, error shown: OK ✓")
+
+    log("  RESULT: PASS ✓\n")
+except Exception as e:
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
 # Clean up
 try:
     os.remove(db_path)
@@ -88,21 +88,23 @@ except Exception as e:
 log("TEST 5: Fallback chain (bad primary → fallback model)...")
 try:
     import config
+    original_stage_1 = config.MODEL_CONFIG["stage_1_analysis"]
     config.MODEL_CONFIG["stage_1_analysis"] = "nonexistent-model-xyz"
     start = time.time()
     r = call_llm_with_fallback("stage_1_analysis", [{"role": "user", "content": "Reply OK"}])
     elapsed = time.time() - start
     log(f"  Response: {r.strip()[:50]} [{elapsed:.1f}s]")
     log(f"  Fallback chain used: {config.FALLBACK_CHAIN}")
-    config.MODEL_CONFIG["stage_1_analysis"] = "gemini-3-pro"  # restore
+    config.MODEL_CONFIG["stage_1_analysis"] = original_stage_1  # restore
     log("  RESULT: PASS ✓\n")
 except Exception as e:
-    config.MODEL_CONFIG["stage_1_analysis"] = "gemini-3-pro"  # restore
+    config.MODEL_CONFIG["stage_1_analysis"] = original_stage_1  # restore
     log(f"  RESULT: FAIL ✗ — {e}\n")
 
 # ── Test 6: Graceful Degradation ───────────────────────────────────
 log("TEST 6: Graceful degradation (Stage 2 fail)...")
 try:
+    original_stage_2 = config.MODEL_CONFIG["stage_2_planning"]
     config.MODEL_CONFIG["stage_2_planning"] = "nonexistent-model-xyz"
     old_chain = config.FALLBACK_CHAIN[:]
     config.FALLBACK_CHAIN.clear()  # no fallbacks
@@ -112,11 +114,133 @@ try:
     log(f"  Stage 2 success: {result.stage_2_success}")
     log(f"  Warning: {result.warning}")
     has_warning = result.stage_1_success and not result.stage_2_success and result.warning
-    config.MODEL_CONFIG["stage_2_planning"] = "claude-opus-4-6-thinking"  # restore
+    config.MODEL_CONFIG["stage_2_planning"] = original_stage_2  # restore
     config.FALLBACK_CHAIN.extend(old_chain)  # restore
     log(f"  RESULT: {'PASS ✓' if has_warning else 'FAIL ✗'}\n")
 except Exception as e:
-    config.MODEL_CONFIG["stage_2_planning"] = "claude-opus-4-6-thinking"
+    config.MODEL_CONFIG["stage_2_planning"] = original_stage_2
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+# ── Test 7: Async Client (concurrent, pooled) ──────────────────────
+log("TEST 7: Async client — concurrent calls on one pool...")
+try:
+    import asyncio
+    from services.llm_client import acall_llm, acall_llm_with_fallback, aclose_llm_client, task_model
+
+    async def _concurrent():
+        model = task_model("stage_1_analysis")
+        calls = [acall_llm(model, [{"role": "user", "content": f"Reply with just: OK{i}"}])
+                 for i in range(config.LLM_MAX_CONCURRENCY_PER_MODEL * 2)]
+        calls.append(acall_llm_with_fallback("stage_1_analysis", [{"role": "user", "content": "Reply OK"}]))
+        try:
+            return await asyncio.gather(*calls)
+        finally:
+            await aclose_llm_client()
+
+    start = time.time()
+    replies = asyncio.run(_concurrent())
+    elapsed = time.time() - start
+    ok = all("OK" in r.upper() for r in replies)
+    log(f"  {len(replies)} calls (limit {config.LLM_MAX_CONCURRENCY_PER_MODEL}/model) [{elapsed:.1f}s]")
+    log(f"  RESULT: {'PASS ✓' if ok else 'FAIL ✗'}\n")
+except Exception as e:
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+# ── Test 8: Streaming ──────────────────────────────────────────────
+log("TEST 8: Streaming deltas (sync + async)...")
+try:
+    start = time.time()
+    first_at = None
+    deltas = []
+    for delta in call_llm_with_fallback(
+        "stage_1_analysis", [{"role": "user", "content": "Count from 1 to 20, one per line."}],
+        stream=True, use_cache=False,
+    ):
+        first_at = first_at or time.time() - start
+        deltas.append(delta)
+    log(f"  sync: {len(deltas)} deltas, first after {first_at:.1f}s, total {time.time() - start:.1f}s")
+
+    async def _stream():
+        try:
+            parts = []
+            stream = await acall_llm_with_fallback(
+                "stage_1_analysis", [{"role": "user", "content": "Reply with just: OK"}],
+                stream=True, use_cache=False,
+            )
+            async for delta in stream:
+                parts.append(delta)
+            return "".join(parts)
+        finally:
+            await aclose_llm_client()
+
+    text = asyncio.run(_stream())
+    log(f"  async: {text.strip()[:50]}")
+    ok = len(deltas) > 1 and "OK" in text.upper()
+    log(f"  RESULT: {'PASS ✓' if ok else 'FAIL ✗'}\n")
+except Exception as e:
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+# ── Test 9: Model Scoreboard + Circuit Breaker ─────────────────────
+log("TEST 9: Model scoreboard + circuit breaker (dead primary gets skipped)...")
+try:
+    from services import model_health
+    bad = "nonexistent-model-xyz"
+    config.MODEL_CONFIG["stage_1_analysis"] = bad
+    for _ in range(config.BREAKER_FAILURE_THRESHOLD):
+        call_llm_with_fallback("stage_1_analysis", [{"role": "user", "content": "Reply OK"}])
+    start = time.time()
+    r = call_llm_with_fallback("stage_1_analysis", [{"role": "user", "content": "Reply OK"}], use_cache=False)
+    elapsed = time.time() - start
+    config.MODEL_CONFIG["stage_1_analysis"] = original_stage_1  # restore
+
+    health = check_proxy_health(scoreboard=True)
+    for model, row in health["models"].items():
+        log(f"  {model}: {row['state']}, {row['calls']} calls, success {row['success_rate']}")
+    ok = health["models"][bad]["state"] == model_health.OPEN and "OK" in r.upper()
+    log(f"  With {bad} open: {r.strip()[:30]} [{elapsed:.1f}s]")
+    model_health.reset(bad)
+    log(f"  RESULT: {'PASS ✓' if ok else 'FAIL ✗'}\n")
+except Exception as e:
+    config.MODEL_CONFIG["stage_1_analysis"] = original_stage_1
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+# ── Test 10: Long Content Map-Reduce ───────────────────────────────
+log("TEST 10: Long transcript over the Stage 1 budget → map-reduce...")
+try:
+    from services.llm_client import task_input_budget
+    from services.long_content import condense, estimate_tokens, split_text
+    budget = task_input_budget("stage_1_analysis")
+    sentence = "RAG systems need good chunking, hybrid search and evaluation. "
+    transcript = sentence * (budget * 4 * 3 // len(sentence))  # ~3x the budget
+    parts = split_text(transcript, task_input_budget("chunk_summary"))
+    log(f"  Input: ~{estimate_tokens(transcript)} tokens (budget {budget}) → {len(parts)} parts")
+    start = time.time()
+    condensed = condense(transcript, "stage_1_analysis", use_cache=False)
+    elapsed = time.time() - start
+    log(f"  Condensed: {condensed.parts} parts → ~{estimate_tokens(condensed.text)} tokens [{elapsed:.1f}s]")
+    log(f"  Preview: {condensed.text[:150]}...")
+    ok = condensed.parts == len(parts) and estimate_tokens(condensed.text) <= budget
+    log(f"  RESULT: {'PASS ✓' if ok else 'FAIL ✗'}\n")
+except Exception as e:
+    log(f"  RESULT: FAIL ✗ — {e}\n")
+
+# ── Test 11: Parallel Stage 1 (per-persona fan-out) ────────────────
+log("TEST 11: Parallel Stage 1 — 3 personas as concurrent calls...")
+try:
+    config.STAGE_1_PARALLEL = True
+    start = time.time()
+    result = analyze_article(
+        "Hybrid search (BM25 + dense vectors) beats pure vector search on most RAG benchmarks.",
+        article_link="https://example.com/hybrid-search", use_cache=False,
+    )
+    elapsed = time.time() - start
+    config.STAGE_1_PARALLEL = False
+    found = [name for name in ("SCOUT", "BUILDER", "DEBATER") if name in (result.stage_1_output or "").upper()]
+    log(f"  Personas in Stage 1: {found} [{elapsed:.1f}s total]")
+    log(f"  Warning: {result.warning}")
+    log(f"  RESULT: {'PASS ✓' if result.stage_1_success and len(found) == 3 else 'FAIL ✗'}\n")
+except Exception as e:
+    config.STAGE_1_PARALLEL = False
     log(f"  RESULT: FAIL ✗ — {e}\n")
 
 log("=== All tests done ===")